@@ -0,0 +1,53 @@
+import pytest
+
+from via_patterns.analysis import analyze_via_spacing
+from via_patterns.export import ViaTable
+from via_patterns.project import parse_project_rules
+
+# default netclass: clearance 0.2mm, track width 0.2mm, expected pitch 0.8mm
+RULES = parse_project_rules({})
+
+
+def _table(positions, nets=None) -> ViaTable:
+    table = ViaTable(len(positions))
+    table.net_names = {0: "", 1: "GND", 2: "VCC"}
+    nets = nets or [1] * len(positions)
+    for (x, y), net in zip(positions, nets):
+        table.append(x, y, 600000, 300000, 0, 31, net)
+    return table
+
+
+def test_loose_cluster() -> None:
+    loose = [(i * 1200000, 0) for i in range(5)]
+    tight = [(i * 800000, 10000000) for i in range(5)]
+    report = analyze_via_spacing(_table(loose + tight), RULES)
+
+    assert len(report.clusters) == 1
+    cluster = report.clusters[0]
+    assert cluster.vias == [0, 1, 2, 3, 4]
+    assert cluster.pitch == 1200000
+    assert cluster.expected_pitch == 800000
+    assert cluster.center == (2400000, 0)
+    assert report.area_saving == 5 * (1200000**2 - 800000**2)
+    assert report.near_violations == []
+
+
+def test_near_violations() -> None:
+    positions = [(0, 0), (820000, 0), (5000000, 0), (5700000, 0)]
+    report = analyze_via_spacing(_table(positions, [1, 2, 1, 1]), RULES)
+    assert [(v.a, v.b, v.gap) for v in report.near_violations] == [(0, 1, 220000)]
+
+    # vias of the same net are never violations
+    report = analyze_via_spacing(_table(positions, [1, 1, 1, 1]), RULES)
+    assert report.near_violations == []
+
+
+def test_scattered_vias_are_not_clusters() -> None:
+    positions = [(i * 5000000, 0) for i in range(10)]
+    report = analyze_via_spacing(_table(positions), RULES)
+    assert report.clusters == []
+
+
+def test_invalid_arguments() -> None:
+    with pytest.raises(ValueError, match="must be at least 1"):
+        analyze_via_spacing(_table([(0, 0)]), RULES, search_factor=0.5)
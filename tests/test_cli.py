@@ -1,5 +1,7 @@
+import logging
 import sys
 from contextlib import contextmanager
+from pathlib import Path
 from typing import List
 from unittest.mock import patch
 
@@ -28,9 +30,8 @@ def cli_isolation(monkeypatch):
     yield _isolation
 
 
-@pytest.mark.parametrize("arguments", [[], ["are", "ignored"]])
-def test_cli_arguments(arguments, cli_isolation, caplog) -> None:
-    with cli_isolation(arguments):
+def test_cli_no_command(cli_isolation, caplog) -> None:
+    with cli_isolation([]):
         with pytest.raises(ExitTest):
             app()
 
@@ -38,3 +39,57 @@ def test_cli_arguments(arguments, cli_isolation, caplog) -> None:
         caplog.records[0].message
         == "This plugin is not usable when running as python module"
     )
+
+
+def test_cli_unknown_command(cli_isolation) -> None:
+    with cli_isolation(["are", "ignored"]):
+        with pytest.raises(ExitTest):
+            app()
+
+
+def test_cli_export(tmpdir, cli_isolation, caplog) -> None:
+    board = Path(tmpdir) / "test.kicad_pcb"
+    board.write_text(
+        "(kicad_pcb (version 20221018) (generator pcbnew)\n"
+        '  (net 0 "")\n'
+        '  (net 1 "GND")\n'
+        '  (via (at 1 2) (size 0.6) (drill 0.3) (layers "F.Cu" "B.Cu") (net 1) '
+        "(tstamp 5a4b3c2d-0000-4000-8000-000000000001))\n"
+        ")\n"
+    )
+    output = Path(tmpdir) / "vias.csv"
+    caplog.set_level(logging.INFO)
+    with cli_isolation(["export", str(board), str(output)]):
+        app()
+
+    assert caplog.records[-1].message == f"Exported 1 vias to '{output}'"
+    lines = output.read_text().splitlines()
+    assert lines[1] == "1000000,2000000,600000,300000,0,31,1,-1,GND,"
+
+
+def test_cli_export_unsupported_format(tmpdir, cli_isolation) -> None:
+    board = Path(tmpdir) / "test.kicad_pcb"
+    board.write_text("(kicad_pcb (version 20221018) (generator pcbnew)\n)\n")
+    with cli_isolation(["export", str(board), f"{tmpdir}/vias.xlsx"]):
+        with pytest.raises(ExitTest):
+            app()
+
+
+def test_cli_analyze(tmpdir, cli_isolation, capsys) -> None:
+    board = Path(tmpdir) / "test.kicad_pcb"
+    vias = "".join(
+        f'  (via (at {i * 1.2} 0) (size 0.6) (drill 0.3) (layers "F.Cu" "B.Cu") '
+        "(net 1))\n"
+        for i in range(4)
+    )
+    board.write_text(
+        "(kicad_pcb (version 20221018) (generator pcbnew)\n"
+        '  (net 0 "")\n'
+        '  (net 1 "GND")\n'
+        f"{vias})\n"
+    )
+    with cli_isolation(["analyze", str(board)]):
+        app()
+
+    out = capsys.readouterr().out
+    assert out.startswith("Loose cluster of 4 vias at (1.800, 0.000): pitch 1.200 mm")
@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import pcbnew
+import pytest
+
+from via_patterns import Pattern, add_via_pattern, get_via_table
+from via_patterns.export import (
+    CHUNK_SIZE,
+    FIELDS,
+    ViaTable,
+    read_board_vias,
+    read_npy_header,
+    write_via_table,
+)
+
+
+@pytest.fixture()
+def board_path(tmpdir) -> Path:
+    path = Path(tmpdir) / "test.kicad_pcb"
+    board = pcbnew.CreateEmptyBoard()
+    net = pcbnew.NETINFO_ITEM(board, "Net1")
+    board.Add(net)
+    add_via_pattern(board, 4, Pattern.STAGGER, net="Net1", group=True)
+    add_via_pattern(
+        board, 3, Pattern.PERPENDICULAR, start_position=pcbnew.VECTOR2I_MM(10, 10)
+    )
+    board.Save(str(path))
+    return path
+
+
+def _table(rows: int) -> ViaTable:
+    table = ViaTable()
+    for i in range(rows):
+        table.append(i, -i, 600000, 300000, 0, 31, i % 2)
+    return table
+
+
+def test_via_table_grows_in_chunks() -> None:
+    table = _table(CHUNK_SIZE + 1)
+    assert len(table) == CHUNK_SIZE + 1
+    assert table.capacity == 2 * CHUNK_SIZE
+    assert table.column("y")[-1] == -CHUNK_SIZE
+    assert table.column("pattern").tolist() == [-1] * (CHUNK_SIZE + 1)
+
+
+def test_via_table_grow_with_view() -> None:
+    table = _table(CHUNK_SIZE)
+    view = table.column("y")
+    with pytest.raises(BufferError):
+        table.append(0, 0, 600000, 300000, 0, 31, 0)
+    assert table.capacity == CHUNK_SIZE
+    assert len(table.column("x")) == CHUNK_SIZE
+    view.release()
+    table.append(0, 0, 600000, 300000, 0, 31, 0)
+    assert len(table) == CHUNK_SIZE + 1
+
+
+def test_read_board_vias(board_path) -> None:
+    table = read_board_vias(board_path)
+    expected = get_via_table(pcbnew.LoadBoard(str(board_path)))
+    assert len(table) == 7
+    assert sorted(table.rows()) == sorted(expected.rows())
+    assert table.pattern_names == expected.pattern_names
+    assert table.column("pattern").tolist().count(0) == 4
+    assert table.net_names[1] == "Net1"
+
+
+def test_write_npy(tmpdir) -> None:
+    table = _table(10)
+    path = Path(tmpdir) / "vias.npy"
+    write_via_table(table, path)
+    header = read_npy_header(path)
+    assert header["shape"] == (10, len(FIELDS))
+    assert header["fortran_order"]
+    assert path.stat().st_size % 64 == (10 * len(FIELDS) * 8) % 64
+
+    np = pytest.importorskip("numpy")
+    data = np.load(path)
+    assert data[:, 0].tolist() == list(range(10))
+    assert data[:, FIELDS.index("net")].tolist() == [i % 2 for i in range(10)]
+
+
+def test_write_csv(tmpdir) -> None:
+    table = _table(2)
+    table.net_names = {0: "", 1: "GND"}
+    path = Path(tmpdir) / "vias.csv"
+    write_via_table(table, path)
+    assert path.read_text().splitlines() == [
+        ",".join([*FIELDS, "net_name", "pattern_name"]),
+        "0,0,600000,300000,0,31,0,-1,,",
+        "1,-1,600000,300000,0,31,1,-1,GND,",
+    ]
+
+
+def test_write_arrow(tmpdir) -> None:
+    pa = pytest.importorskip("pyarrow")
+    table = _table(3)
+    path = Path(tmpdir) / "vias.arrow"
+    write_via_table(table, path)
+    with pa.memory_map(str(path)) as source:
+        arrow_table = pa.ipc.open_file(source).read_all()
+    assert arrow_table.column_names == list(FIELDS)
+    assert arrow_table.column("y").to_pylist() == [0, -1, -2]
+
+
+def test_write_unsupported_format(tmpdir) -> None:
+    with pytest.raises(ValueError, match="Unsupported export format 'xlsx'"):
+        write_via_table(_table(1), Path(tmpdir) / "vias.xlsx")
@@ -0,0 +1,89 @@
+import math
+
+import pytest
+
+from via_patterns.geometry import (
+    Direction,
+    Pattern,
+    get_companion_offsets,
+    get_pattern_offsets,
+    get_pattern_positions,
+    get_ring_positions,
+    get_sequence_positions,
+    ring_via_count,
+    transform_positions,
+)
+
+
+def test_sequence_of_equal_vias_matches_perpendicular_pattern() -> None:
+    offsets = get_pattern_offsets(Pattern.PERPENDICULAR, 600, 200, 250)
+    expected = get_pattern_positions(Pattern.PERPENDICULAR, 5, *offsets)
+    assert get_sequence_positions([600] * 5, [200] * 5, 250) == expected
+
+
+@pytest.mark.parametrize("direction", [Direction.HORIZONTAL, Direction.VERTICAL])
+def test_sequence_positions_pairwise_pitch(direction) -> None:
+    positions = get_sequence_positions(
+        [1000, 600, 600], [300, 200, 200], 200, 50, direction
+    )
+    distances = [0, 300 + 800 + 50, 300 + 800 + 50 + 200 + 600 + 50]
+    if direction == Direction.HORIZONTAL:
+        assert positions == [(d, 0) for d in distances]
+    else:
+        assert positions == [(0, d) for d in distances]
+
+
+def test_sequence_positions_length_mismatch() -> None:
+    with pytest.raises(ValueError, match="must have equal length"):
+        get_sequence_positions([600, 600], [200], 200)
+
+
+@pytest.mark.parametrize(
+    "params", [(0, 800, 1), (300, 800, 1), (400, 800, 2), (1000, 800, 7)]
+)
+def test_ring_via_count(params) -> None:
+    radius, pitch, expected = params
+    assert ring_via_count(radius, pitch) == expected
+
+
+@pytest.mark.parametrize("rings", [1, 2, 4])
+def test_ring_positions_respect_pitch(rings) -> None:
+    pitch = 800
+    positions = get_ring_positions(1000, pitch, rings)
+    distances = [
+        math.dist(a, b) for i, a in enumerate(positions) for b in positions[i + 1 :]
+    ]
+    # allow for rounding to integer coordinates
+    assert min(distances) >= pitch - 1
+    radii = {round(math.hypot(x, y), -1) for x, y in positions}
+    assert radii == {1000 + i * pitch for i in range(rings)}
+
+
+@pytest.mark.parametrize("count", [1, 4, 8, 12])
+def test_companion_offsets_are_at_least_pitch_away(count) -> None:
+    offsets = get_companion_offsets(1000, count)
+    assert len(offsets) == count
+    assert offsets[0] == (1000, 0)
+    for x, y in offsets:
+        assert 1000 <= math.hypot(x, y) < 1002
+
+
+def test_transform_positions_translation() -> None:
+    positions = [(0, 0), (100, 0), (200, 50)]
+    instances = transform_positions(positions, [(0, 0), (1000, -500)])
+    assert instances == [positions, [(1000, -500), (1100, -500), (1200, -450)]]
+
+
+@pytest.mark.parametrize(
+    "angle,expected",
+    [
+        (0, [(10, 10), (110, 10)]),
+        # counterclockwise on board with y axis pointing down
+        (90, [(10, 10), (10, -90)]),
+        (180, [(10, 10), (-90, 10)]),
+        (-90, [(10, 10), (10, 110)]),
+    ],
+)
+def test_transform_positions_rotation(angle, expected) -> None:
+    instances = transform_positions([(10, 10), (110, 10)], [(0, 0, angle)], (10, 10))
+    assert instances == [expected]
@@ -0,0 +1,123 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from via_patterns.geometry import Direction, Pattern
+from via_patterns.plan import plan_via_pattern
+from via_patterns.project import expand_net_range, load_project_rules
+
+
+def _write_project(path: Path, clearance: float, track_width: float) -> None:
+    data = {
+        "net_settings": {
+            "classes": [
+                {
+                    "name": "Default",
+                    "clearance": 0.2,
+                    "track_width": 0.2,
+                    "via_diameter": 0.6,
+                    "via_drill": 0.3,
+                },
+                {
+                    "name": "Power",
+                    "clearance": clearance,
+                    "track_width": track_width,
+                    "via_diameter": 0.8,
+                    "via_drill": 0.4,
+                },
+            ],
+            "netclass_patterns": [{"netclass": "Power", "pattern": "+*"}],
+        }
+    }
+    path.write_text(json.dumps(data))
+
+
+@pytest.fixture()
+def project(tmpdir) -> Path:
+    path = Path(tmpdir) / "test.kicad_pro"
+    _write_project(path, 0.3, 0.5)
+    return path
+
+
+def test_plan_via_pattern(project) -> None:
+    plan = plan_via_pattern(project, 4, Pattern.PERPENDICULAR)
+    assert plan.via_width == 600000
+    assert plan.pitch == 800000
+    assert plan.positions == [(0, 0), (800000, 0), (1600000, 0), (2400000, 0)]
+    assert plan.bbox == (-300000, -300000, 2700000, 300000)
+    assert plan.size == (3000000, 600000)
+
+
+def test_plan_via_pattern_uses_net_netclass(project) -> None:
+    board_path = project.with_suffix(".kicad_pcb")
+    plan = plan_via_pattern(
+        board_path, 3, Pattern.PERPENDICULAR, net="+3V3", direction=Direction.VERTICAL
+    )
+    assert plan.via_width == 800000
+    assert plan.via_clearance == 300000
+    assert plan.positions == [(0, 0), (0, 1100000), (0, 2200000)]
+
+
+def test_plan_via_pattern_missing_project(tmpdir) -> None:
+    plan = plan_via_pattern(Path(tmpdir) / "missing.kicad_pro", 2, Pattern.STAGGER)
+    assert plan.via_width == 600000
+    assert plan.via_clearance == 200000
+
+
+def test_project_rules_cache(project) -> None:
+    rules = load_project_rules(project)
+    assert load_project_rules(project) is rules
+
+    _write_project(project, 0.4, 0.5)
+    stat = os.stat(project)
+    os.utime(project, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    new_rules = load_project_rules(project)
+    assert new_rules is not rules
+    assert new_rules.get_netclass("+5V").clearance == 400000
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    [
+        ({"count": 0}, "The `count` argument must be greater than 0"),
+        ({"pattern": "NO_SUCH_PATTERN"}, "Unsupported pattern"),
+        ({"track_width": -1}, "must not be negative"),
+    ],
+)
+def test_plan_via_pattern_invalid_arguments(kwargs, message, project) -> None:
+    arguments = {"count": 3, "pattern": Pattern.STAGGER, **kwargs}
+    with pytest.raises(ValueError, match=message):
+        plan_via_pattern(project, **arguments)
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        ("D[0..3]", ["D0", "D1", "D2", "D3"]),
+        ("/bus/A[2..0]_N", ["/bus/A2_N", "/bus/A1_N", "/bus/A0_N"]),
+        ("CLK[5..5]", ["CLK5"]),
+    ],
+)
+def test_expand_net_range(params) -> None:
+    expression, expected = params
+    assert expand_net_range(expression) == expected
+
+
+@pytest.mark.parametrize("expression", ["D0", "D[0..]", "D[a..b]"])
+def test_expand_net_range_invalid(expression) -> None:
+    with pytest.raises(ValueError, match="is not a valid net range"):
+        expand_net_range(expression)
+
+
+def test_plan_does_not_import_pcbnew() -> None:
+    # run in new interpreter, pcbnew is already imported by `conftest`
+    code = "import sys, via_patterns.plan; assert 'pcbnew' not in sys.modules"
+    subprocess.run(
+        [sys.executable, "-c", code],
+        check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
@@ -1,4 +1,5 @@
 import logging
+import logging.handlers
 import os
 from pathlib import Path
 from unittest.mock import MagicMock, patch
@@ -6,7 +7,12 @@ from unittest.mock import MagicMock, patch
 import pcbnew
 import pytest
 
-from via_patterns.plugin_action import get_kicad_version, setup_logging
+from via_patterns.plugin_action import (
+    get_kicad_version,
+    get_settings_path,
+    setup_logging,
+    shutdown_logging,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +29,39 @@ def test_setup_logging(tmpdir: Path) -> None:
     assert Path(f"{tmpdir}/plugin.log").exists()
 
 
+def test_setup_logging_level(tmpdir: Path) -> None:
+    setup_logging(str(tmpdir), "warning")
+    logger.info("not logged")
+    logger.warning("logged %s", "message")
+    shutdown_logging()
+
+    content = Path(f"{tmpdir}/plugin.log").read_text()
+    assert "not logged" not in content
+    assert "logged message" in content
+
+
+def test_setup_logging_unknown_level(tmpdir: Path, monkeypatch) -> None:
+    monkeypatch.setenv("VIA_PATTERNS_LOG_LEVEL", "verbose")
+    setup_logging(str(tmpdir))
+    assert logging.root.level == logging.INFO
+    shutdown_logging()
+
+    content = Path(f"{tmpdir}/plugin.log").read_text()
+    assert "Unknown log level 'verbose', using INFO" in content
+
+
+def test_shutdown_logging_removes_queue_handler(tmpdir: Path) -> None:
+    setup_logging(str(tmpdir))
+    shutdown_logging()
+    assert not any(
+        isinstance(h, logging.handlers.QueueHandler) for h in logging.root.handlers
+    )
+
+
+def test_get_settings_path() -> None:
+    assert get_settings_path().endswith("via_patterns.json")
+
+
 def test_get_kicad_version() -> None:
     assert get_kicad_version()[0] in ["7", "8"]
 
@@ -0,0 +1,43 @@
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from via_patterns.render import Track, get_view_box, render_svg
+
+SVG_NS = "{http://www.w3.org/2000/svg}"
+
+
+def test_view_box() -> None:
+    positions = [(0, 0), (800000, 0), (1600000, 400000)]
+    tracks = [Track((0, 0), (0, 2000000), 200000)]
+    assert get_view_box(positions, 600000, 200000, tracks) == (
+        -500000,
+        -500000,
+        2100000,
+        2100000,
+    )
+
+
+def test_view_box_empty() -> None:
+    with pytest.raises(ValueError, match="Nothing to render"):
+        get_view_box([], 600000)
+
+
+def test_render_svg() -> None:
+    positions = [(0, 0), (800000, 0), (1600000, 0)]
+    svg = render_svg(
+        positions,
+        600000,
+        200000,
+        drill=300000,
+        tracks=[Track((0, 0), (0, 1000000), 200000)],
+        margin=0,
+        background=None,
+    )
+    root = ET.fromstring(svg)
+    assert root.get("viewBox") == "-0.5 -0.5 2.6 1.6"
+    assert root.get("width") == "2.6mm"
+    # clearance outline, copper and drill of each via
+    assert len(root.findall(f"{SVG_NS}circle")) == 3 * len(positions)
+    assert len(root.findall(f"{SVG_NS}line")) == 1
+    assert len(root.findall(f"{SVG_NS}rect")) == 0
@@ -0,0 +1,164 @@
+import json
+import os
+import socket
+import threading
+from pathlib import Path
+from typing import Any, Dict
+
+import pcbnew
+import pytest
+
+from via_patterns.server import (
+    INTERNAL_ERROR,
+    INVALID_PARAMS,
+    METHOD_NOT_FOUND,
+    PARSE_ERROR,
+    SERVER_ERROR,
+    BoardCache,
+    BoardCacheFull,
+    PatternServer,
+    PatternService,
+)
+
+
+def _create_board(path: Path) -> str:
+    board = pcbnew.CreateEmptyBoard()
+    board.Save(str(path))
+    return str(path)
+
+
+@pytest.fixture()
+def board_paths(tmpdir):
+    return [_create_board(Path(tmpdir) / f"test{i}.kicad_pcb") for i in range(3)]
+
+
+def _vias(path: str):
+    board = pcbnew.LoadBoard(path)
+    return [t for t in board.GetTracks() if t.Type() == pcbnew.PCB_VIA_T]
+
+
+def test_service_add_rotate_save(board_paths) -> None:
+    path = board_paths[0]
+    service = PatternService()
+    result = service.add_via_pattern(path, 3, "perpendicular")
+    assert len(result["vias"]) == 3
+    assert result["positions"] == [[0, 0], [800000, 0], [1600000, 0]]
+
+    positions = service.rotate_via_pattern(path, result["vias"], "CLOCKWISE")
+    assert positions == [[0, 0], [0, 800000], [0, 1600000]]
+
+    # nothing written until explicit save
+    assert len(_vias(path)) == 0
+    service.save(path)
+    assert len(_vias(path)) == 3
+
+
+def test_service_plan(board_paths) -> None:
+    service = PatternService()
+    plan = service.plan_via_pattern(board_paths[0], 2, "stagger", direction="VERTICAL")
+    assert plan["pattern"] == "Stagger"
+    assert len(plan["positions"]) == 2
+    assert plan["pitch"] > 0
+
+
+def test_board_cache_evicts_least_recently_used(board_paths) -> None:
+    cache = BoardCache(max_boards=2)
+    cache.get(board_paths[0])
+    cache.get(board_paths[1])
+    cache.get(board_paths[0])
+    cache.get(board_paths[2])
+    assert len(cache) == 2
+    assert board_paths[0] in cache
+    assert board_paths[1] not in cache
+
+
+def test_board_cache_keeps_unsaved_boards(board_paths) -> None:
+    cache = BoardCache(max_boards=2)
+    cache.get(board_paths[0]).dirty = True
+    cache.get(board_paths[1])
+    cache.get(board_paths[2])
+    assert board_paths[0] in cache
+    assert board_paths[1] not in cache
+
+    cache.get(board_paths[2]).dirty = True
+    with pytest.raises(BoardCacheFull):
+        cache.get(board_paths[1])
+
+    cache.close(board_paths[0], save=True)
+    cache.get(board_paths[1])
+    assert len(cache) == 2
+
+
+def _handle(service: PatternService, request: Dict[str, Any]) -> Dict[str, Any]:
+    response = service.handle(request)
+    assert response is not None
+    return response
+
+
+def _broken() -> None:
+    msg = "Not a client error"
+    raise TypeError(msg)
+
+
+def test_service_errors() -> None:
+    service = PatternService()
+    response = _handle(service, {"jsonrpc": "2.0", "id": 1, "method": "nope"})
+    assert response["error"]["code"] == METHOD_NOT_FOUND
+
+    response = _handle(
+        service, {"jsonrpc": "2.0", "id": 2, "method": "save", "params": {"foo": 1}}
+    )
+    assert response["error"]["code"] == INVALID_PARAMS
+
+    # errors raised inside of method are not reported as invalid params
+    service.methods["broken"] = _broken
+    response = _handle(service, {"jsonrpc": "2.0", "id": 3, "method": "broken"})
+    assert response["error"]["code"] == INTERNAL_ERROR
+
+    response = _handle(
+        service,
+        {"jsonrpc": "2.0", "id": 4, "method": "save", "params": ["not_opened.pcb"]},
+    )
+    assert response["error"]["code"] == SERVER_ERROR
+    assert "is not opened" in response["error"]["message"]
+
+    # notifications have no response
+    assert service.handle({"jsonrpc": "2.0", "method": "list"}) is None
+
+
+def test_server_roundtrip(board_paths) -> None:
+    with PatternServer(port=0) as server:
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            address = ("127.0.0.1", server.server_address[1])
+            with socket.create_connection(address) as connection:
+                f = connection.makefile("rwb")
+                requests = [
+                    {
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "add_via_pattern",
+                        "params": {
+                            "path": board_paths[0],
+                            "count": 4,
+                            "pattern": "Diagonal",
+                        },
+                    },
+                    {"jsonrpc": "2.0", "id": 2, "method": "list"},
+                ]
+                for r in requests:
+                    f.write(json.dumps(r).encode() + b"\n")
+                f.write(b"not a json\n")
+                f.flush()
+
+                responses = [json.loads(f.readline()) for _ in range(3)]
+        finally:
+            server.shutdown()
+            thread.join()
+
+    assert len(responses[0]["result"]["vias"]) == 4
+    assert responses[1]["result"] == [
+        {"path": os.path.abspath(board_paths[0]), "dirty": True}
+    ]
+    assert responses[2]["error"]["code"] == PARSE_ERROR
@@ -0,0 +1,28 @@
+import json
+from pathlib import Path
+
+from via_patterns.geometry import Pattern
+from via_patterns.settings import LastPattern, load_last_pattern, save_last_pattern
+
+
+def test_last_pattern_roundtrip(tmpdir) -> None:
+    path = Path(tmpdir) / "settings" / "via_patterns.json"
+    assert load_last_pattern(path) is None
+
+    last = LastPattern(Pattern.STAGGER, 6, 200000, rotation=3)
+    save_last_pattern(path, last)
+    loaded = load_last_pattern(path)
+    assert loaded == last
+    # parsed value is cached until file changes
+    assert load_last_pattern(path) is loaded
+
+
+def test_last_pattern_normalizes_rotation() -> None:
+    data = {"pattern": "diagonal", "count": 2, "track_width": 0, "rotation": -1}
+    assert LastPattern.from_dict(data).rotation == 3
+
+
+def test_last_pattern_malformed_file(tmpdir) -> None:
+    path = Path(tmpdir) / "via_patterns.json"
+    path.write_text(json.dumps({"last_pattern": {"pattern": "NO_SUCH_PATTERN"}}))
+    assert load_last_pattern(path) is None
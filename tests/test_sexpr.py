@@ -0,0 +1,107 @@
+import logging
+from pathlib import Path
+
+import pcbnew
+import pytest
+
+from via_patterns import Direction, Pattern, add_via_pattern
+from via_patterns.sexpr import append_via_pattern, read_board_header
+
+logger = logging.getLogger(__name__)
+
+
+@pytest.fixture()
+def board_path(tmpdir) -> Path:
+    path = Path(tmpdir) / "test.kicad_pcb"
+    board = pcbnew.CreateEmptyBoard()
+    for i in range(1, 3):
+        net = pcbnew.NETINFO_ITEM(board, f"Net{i}")
+        board.Add(net)
+        # add dummy tracks to avoid orphaned net removal on board save
+        track = pcbnew.PCB_TRACK(board)
+        track.SetStart(pcbnew.VECTOR2I_MM(0, i + 10))
+        track.SetEnd(pcbnew.VECTOR2I_MM(5, i + 10))
+        track.SetLayer(pcbnew.F_Cu)
+        board.Add(track)
+        track.SetNet(net)
+    board.Save(str(path))
+    return path
+
+
+def _via_positions(board: pcbnew.BOARD):
+    return sorted(
+        (t.GetX(), t.GetY()) for t in board.GetTracks() if t.Type() == pcbnew.PCB_VIA_T
+    )
+
+
+def test_read_board_header(board_path) -> None:
+    header = read_board_header(board_path)
+    assert header.version > 0
+    assert header.nets == {"": 0, "Net1": 1, "Net2": 2}
+
+
+@pytest.mark.parametrize(
+    "pattern", [Pattern.PERPENDICULAR, Pattern.DIAGONAL, Pattern.STAGGER]
+)
+@pytest.mark.parametrize("direction", [Direction.HORIZONTAL, Direction.VERTICAL])
+def test_append_via_pattern(pattern, direction, board_path) -> None:
+    start = (pcbnew.FromMM(10), pcbnew.FromMM(5))
+    positions = append_via_pattern(
+        board_path,
+        5,
+        pattern,
+        start_position=start,
+        direction=direction,
+        net="Net1",
+    )
+    assert len(positions) == 5
+    assert positions[0] == start
+
+    board = pcbnew.LoadBoard(str(board_path))
+    assert _via_positions(board) == sorted(positions)
+    vias = [t for t in board.GetTracks() if t.Type() == pcbnew.PCB_VIA_T]
+    assert sorted(v.GetNetname() for v in vias) == ["", "", "", "", "Net1"]
+
+    # must be the same as pattern created with pcbnew
+    expected = pcbnew.CreateEmptyBoard()
+    add_via_pattern(
+        expected,
+        5,
+        pattern,
+        start_position=pcbnew.VECTOR2I(*start),
+        direction=direction,
+    )
+    assert _via_positions(expected) == sorted(positions)
+
+
+def test_append_via_pattern_with_template(board_path) -> None:
+    board = pcbnew.LoadBoard(str(board_path))
+    via = pcbnew.PCB_VIA(board)
+    via.SetPosition(pcbnew.VECTOR2I_MM(3, 3))
+    via.SetWidth(pcbnew.FromMM(0.8))
+    via.SetDrill(pcbnew.FromMM(0.4))
+    board.Add(via)
+    via.SetNet(board.FindNet("Net2"))
+    template = via.m_Uuid.AsString()
+    board.Save(str(board_path))
+
+    positions = append_via_pattern(board_path, 3, Pattern.STAGGER, template=template)
+    assert len(positions) == 3
+    assert positions[0] == (pcbnew.FromMM(3), pcbnew.FromMM(3))
+
+    board = pcbnew.LoadBoard(str(board_path))
+    vias = [t for t in board.GetTracks() if t.Type() == pcbnew.PCB_VIA_T]
+    assert len(vias) == 3
+    for v in vias:
+        assert v.GetWidth() == pcbnew.FromMM(0.8)
+        assert v.GetDrill() == pcbnew.FromMM(0.4)
+
+
+def test_append_via_pattern_unknown_template(board_path) -> None:
+    with pytest.raises(ValueError, match="Via 'abc' not found"):
+        append_via_pattern(board_path, 3, Pattern.STAGGER, template="abc")
+
+
+def test_append_via_pattern_unknown_net(board_path) -> None:
+    with pytest.raises(ValueError, match="Net 'NoSuchNet' not found"):
+        append_via_pattern(board_path, 3, Pattern.STAGGER, net="NoSuchNet")
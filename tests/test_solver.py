@@ -0,0 +1,161 @@
+import math
+from pathlib import Path
+
+import pytest
+
+from via_patterns.geometry import (
+    Pattern,
+    get_pattern_offsets,
+    get_pattern_positions,
+)
+from via_patterns.solver import (
+    EscapeTrack,
+    PitchTable,
+    ViaShape,
+    clearance_margin,
+    fit_pattern,
+    fit_pattern_in_rectangle,
+    fit_pattern_in_span,
+    min_pitch,
+    shortest_pattern,
+)
+
+VIA_WIDTH = 600000
+CLEARANCE = 200000
+TRACK_WIDTH = 200000
+
+
+def _last_position(fit, track_width: int = TRACK_WIDTH):
+    offset_x, offset_y = get_pattern_offsets(
+        fit.pattern, VIA_WIDTH, CLEARANCE, track_width, fit.extra_space
+    )
+    return get_pattern_positions(fit.pattern, fit.count, offset_x, offset_y)[-1]
+
+
+@pytest.mark.parametrize("count", [2, 6, 32])
+def test_shortest_pattern(count) -> None:
+    fit = shortest_pattern(count, VIA_WIDTH, CLEARANCE, TRACK_WIDTH)
+    assert fit.count == count
+    for pattern in [Pattern.PERPENDICULAR, Pattern.DIAGONAL, Pattern.STAGGER]:
+        offset_x, offset_y = get_pattern_offsets(
+            pattern, VIA_WIDTH, CLEARANCE, TRACK_WIDTH
+        )
+        x, _ = get_pattern_positions(pattern, count, offset_x, offset_y)[-1]
+        assert fit.length <= x
+    assert _last_position(fit)[0] == fit.length
+
+
+def test_shortest_pattern_wide_track() -> None:
+    # DIAGONAL and STAGGER make no sense when track is wider than via
+    fit = shortest_pattern(4, VIA_WIDTH, CLEARANCE, 700000)
+    assert fit.pattern == Pattern.PERPENDICULAR
+
+
+@pytest.mark.parametrize("length", [0, 799999, 800000, 5000000])
+def test_fit_pattern(length) -> None:
+    fit = fit_pattern(length, VIA_WIDTH, CLEARANCE, TRACK_WIDTH)
+    x, y = _last_position(fit)
+    assert x <= length
+    assert y == fit.lateral
+    # one more via with the same pattern must not fit
+    offset_x, offset_y = get_pattern_offsets(
+        fit.pattern, VIA_WIDTH, CLEARANCE, TRACK_WIDTH
+    )
+    positions = get_pattern_positions(fit.pattern, fit.count + 1, offset_x, offset_y)
+    assert positions[-1][0] > length
+
+
+def test_fit_pattern_lateral_limit() -> None:
+    fit = fit_pattern(5000000, VIA_WIDTH, CLEARANCE, TRACK_WIDTH, lateral=0)
+    assert fit.pattern == Pattern.PERPENDICULAR
+    assert fit.count == 7
+    assert fit.lateral == 0
+    # extra space stretches pattern to cover the span
+    assert 5000000 - _last_position(fit)[0] < fit.count
+
+
+def test_fit_pattern_in_rectangle() -> None:
+    fit = fit_pattern_in_rectangle(5600000, 1400000, VIA_WIDTH, CLEARANCE, TRACK_WIDTH)
+    assert fit.pattern == Pattern.STAGGER
+    assert fit.count == 9
+    assert fit.lateral + VIA_WIDTH <= 1400000
+
+
+def test_fit_pattern_in_rectangle_too_small() -> None:
+    with pytest.raises(ValueError, match="too small to fit single via"):
+        fit_pattern_in_rectangle(500000, 1000000, VIA_WIDTH, CLEARANCE, TRACK_WIDTH)
+
+
+def test_fit_pattern_in_span() -> None:
+    fit = fit_pattern_in_span((0, 0), (3000000, 4000000), VIA_WIDTH, CLEARANCE, 0)
+    assert fit == fit_pattern(5000000, VIA_WIDTH, CLEARANCE, 0)
+
+
+def _escape_tracks(track_width: int):
+    # the same escape tracks as used by DRC tests of horizontal patterns
+    return (
+        EscapeTrack(0, track_width, (0, 1), 1000000),
+        EscapeTrack(31, track_width, (0, -1), 1000000),
+    )
+
+
+@pytest.mark.parametrize("track_width", [100000, 200000, 650000])
+def test_min_pitch_perpendicular(track_width) -> None:
+    via = ViaShape(VIA_WIDTH)
+    tracks = _escape_tracks(track_width)
+    pitch = min_pitch((1, 0), via, via, CLEARANCE, tracks, tracks)
+    offset_x, _ = get_pattern_offsets(
+        Pattern.PERPENDICULAR, VIA_WIDTH, CLEARANCE, track_width
+    )
+    assert abs(pitch - offset_x) <= 1
+
+
+@pytest.mark.parametrize("track_width", [100000, 200000])
+def test_min_pitch_diagonal(track_width) -> None:
+    via = ViaShape(VIA_WIDTH)
+    tracks = _escape_tracks(track_width)
+    pitch = min_pitch((1, 1), via, via, CLEARANCE, tracks, tracks)
+    offset_x, _ = get_pattern_offsets(
+        Pattern.DIAGONAL, VIA_WIDTH, CLEARANCE, track_width
+    )
+    assert abs(pitch / math.sqrt(2) - offset_x) <= 1
+
+
+def test_min_pitch_is_tight() -> None:
+    via_a = ViaShape(800000)
+    via_b = ViaShape(400000)
+    tracks_a = (EscapeTrack(0, 300000, (0, 1), 1000000),)
+    tracks_b = (EscapeTrack(0, 150000, (0, 1), 1000000),)
+    args = (via_a, via_b, CLEARANCE, tracks_a, tracks_b)
+    pitch = min_pitch((1, 0), *args)
+    assert pitch == 800000
+    assert clearance_margin(pitch, (1, 0), *args) >= 0
+    assert clearance_margin(pitch - 1, (1, 0), *args) < 0
+
+
+def test_min_pitch_blind_vias() -> None:
+    top = ViaShape(VIA_WIDTH, 0, 1)
+    # vias without common layer can be placed on top of each other
+    assert min_pitch((1, 0), top, ViaShape(VIA_WIDTH, 2, 31), CLEARANCE) == 0
+    # ...but not when they share at least one layer
+    pitch = min_pitch((1, 0), top, ViaShape(VIA_WIDTH, 1, 31), CLEARANCE)
+    assert pitch == VIA_WIDTH + CLEARANCE
+    # tracks of blind via interact only with vias on the same layer
+    tracks = (EscapeTrack(0, 200000, (1, 0), 1000000),)
+    pitch = min_pitch((0, 1), top, ViaShape(VIA_WIDTH, 2, 31), CLEARANCE, tracks)
+    assert pitch == 0
+    pitch = min_pitch((0, 1), top, ViaShape(VIA_WIDTH, 0, 0), CLEARANCE, tracks)
+    assert pitch == VIA_WIDTH + CLEARANCE
+
+
+def test_pitch_table(tmpdir) -> None:
+    path = Path(tmpdir) / "cache" / "pitch.json"
+    table = PitchTable(path)
+    via = ViaShape(VIA_WIDTH)
+    pitch = table.min_pitch((1, 0), via, via, CLEARANCE)
+    assert pitch == VIA_WIDTH + CLEARANCE
+    table.save()
+
+    table = PitchTable(path)
+    assert len(table) == 1
+    assert table.min_pitch((1, 0), via, via, CLEARANCE) == pitch
@@ -0,0 +1,69 @@
+import math
+
+import pytest
+
+from via_patterns.spatial import CopperIndex, poisson_disk_select
+
+
+def test_query_returns_each_shape_once() -> None:
+    index = CopperIndex(100)
+    index.add((0, 0), (1000, 0), 50, net=1)
+    shapes = list(index.query((500, 0), 600))
+    assert len(shapes) == 1
+
+
+def test_slack_without_copper_is_limit() -> None:
+    index = CopperIndex(100)
+    index.add_circle((5000, 5000), 300, net=1, clearance=200)
+    assert index.slack((0, 0), 300, 2, 200, 1000) == 1000
+
+
+@pytest.mark.parametrize(
+    "net,expected",
+    [
+        # other net: gap 400 - clearance 200
+        (2, 200),
+        # same net: only gap
+        (1, 400),
+    ],
+)
+def test_slack_of_circle(net, expected) -> None:
+    index = CopperIndex(500)
+    index.add_circle((0, 0), 300, net=1, clearance=200)
+    assert index.slack((1000, 0), 300, net, 100, 5000) == expected
+
+
+def test_slack_of_segment_uses_closest_point() -> None:
+    index = CopperIndex(500)
+    index.add((0, 0), (10000, 0), 100, net=1, clearance=200)
+    # closest point is in the middle of segment, far from both ends
+    assert index.slack((5000, 700), 300, 2, 200, 5000) == 100
+    assert index.slack((5000, 500), 300, 2, 200, 5000) == -100
+
+
+def test_invalid_cell() -> None:
+    with pytest.raises(ValueError, match="must be greater than 0"):
+        CopperIndex(0)
+
+
+@pytest.mark.parametrize("radius", [1000, 2500, 4000])
+def test_poisson_disk_select_keeps_coverage(radius) -> None:
+    positions = [(x * 1000, y * 1000) for y in range(20) for x in range(20)]
+    kept = poisson_disk_select(positions, radius)
+    kept_positions = [positions[i] for i in kept]
+
+    for i, (x, y) in enumerate(kept_positions):
+        for px, py in kept_positions[i + 1 :]:
+            assert math.hypot(px - x, py - y) >= radius
+    for x, y in positions:
+        assert any(math.hypot(px - x, py - y) < radius for px, py in kept_positions)
+
+
+def test_poisson_disk_select_respects_fixed() -> None:
+    positions = [(0, 0), (500, 0), (3000, 0)]
+    assert poisson_disk_select(positions, 1000, fixed=[(0, 100)]) == [2]
+
+
+def test_poisson_disk_select_invalid_radius() -> None:
+    with pytest.raises(ValueError, match="must be greater than 0"):
+        poisson_disk_select([(0, 0)], 0)
@@ -13,7 +13,23 @@ import pytest
 from via_patterns import (
     Direction,
     Pattern,
+    PatternSpec,
+    ViaDefinition,
+    ViaIndex,
+    add_fanout_vias,
+    add_return_vias,
     add_via_pattern,
+    add_via_ring,
+    add_via_sequence,
+    compact_vias,
+    create_stamp,
+    ensure_via_pattern,
+    flatten_stamps,
+    get_pattern_groups,
+    place_stamp,
+    regenerate_patterns,
+    replicate_via_pattern,
+    thin_vias,
 )
 
 from .conftest import KICAD_VERSION, generate_render
@@ -52,6 +68,28 @@ def _add_via(
     return via
 
 
+def _group_vias(group: pcbnew.PCB_GROUP) -> List[pcbnew.BOARD_ITEM]:
+    return [i for i in group.GetItems() if i.Type() == pcbnew.PCB_VIA_T]
+
+
+def _add_bga(
+    board: pcbnew.BOARD, rows: int, columns: int, pitch: float
+) -> pcbnew.FOOTPRINT:
+    footprint = pcbnew.FOOTPRINT(board)
+    board.Add(footprint)
+    for row in range(rows):
+        for column in range(columns):
+            pad = pcbnew.PAD(footprint)
+            pad.SetAttribute(pcbnew.PAD_ATTRIB_SMD)
+            pad.SetShape(pcbnew.PAD_SHAPE_CIRCLE)
+            pad.SetLayerSet(pad.SMDMask())
+            pad.SetSize(pcbnew.VECTOR2I_MM(pitch / 2, pitch / 2))
+            pad.SetPosition(pcbnew.VECTOR2I_MM(column * pitch + 20, row * pitch + 20))
+            footprint.Add(pad)
+            pad.SetNet(board.FindNet(f"Net{row * columns + column + 1}"))
+    return footprint
+
+
 @pytest.fixture()
 def board_path(tmpdir) -> str:
     return f"{tmpdir}/test.kicad_pcb"
@@ -224,6 +262,519 @@ def test_via_pattern(
             assert_drc(tmpdir, board_with_vias_moved_path, log=False)
 
 
+@pytest.mark.parametrize("direction", [Direction.HORIZONTAL, Direction.VERTICAL])
+def test_via_pattern_stubs(direction, work_board) -> None:
+    stub_length = pcbnew.FromMM(1)
+    track_width = pcbnew.FromMM(0.3)
+    with work_board() as board:
+        vias = add_via_pattern(
+            board,
+            4,
+            Pattern.STAGGER,
+            direction=direction,
+            track_width=track_width,
+            stub_length=stub_length,
+        )
+        tracks = [t for t in board.GetTracks() if t.Type() == pcbnew.PCB_TRACE_T]
+        assert len(tracks) == 2 * len(vias)
+
+        via_positions = {(v.GetX(), v.GetY()) for v in vias}
+        for t in tracks:
+            assert (t.GetStart().x, t.GetStart().y) in via_positions
+            assert t.GetLength() == stub_length
+            assert t.GetWidth() == track_width
+            move = t.GetEnd() - t.GetStart()
+            if direction == Direction.HORIZONTAL:
+                assert move.x == 0
+            else:
+                assert move.y == 0
+            f_cu_sign = 1 if t.GetLayer() == pcbnew.F_Cu else -1
+            assert (move.x + move.y) * f_cu_sign > 0
+
+
+def test_via_pattern_custom_stub_directions(work_board) -> None:
+    stub_length = pcbnew.FromMM(2)
+    with work_board() as board:
+        vias = add_via_pattern(
+            board,
+            3,
+            Pattern.PERPENDICULAR,
+            stub_length=stub_length,
+            stub_directions={pcbnew.F_Cu: (-1, 0)},
+        )
+        tracks = [t for t in board.GetTracks() if t.Type() == pcbnew.PCB_TRACE_T]
+        assert len(tracks) == len(vias)
+        for t in tracks:
+            assert t.GetLayer() == pcbnew.F_Cu
+            assert t.GetEnd() - t.GetStart() == pcbnew.VECTOR2I(-stub_length, 0)
+
+
+def test_via_pattern_negative_stub_length(work_board) -> None:
+    with work_board() as board:
+        with pytest.raises(
+            ValueError, match="The `stub_length` argument must be greater or equal 0"
+        ):
+            add_via_pattern(board, 5, Pattern.PERPENDICULAR, stub_length=-10)
+
+
+def test_via_pattern_group(board_path, work_board) -> None:
+    with work_board() as board:
+        vias = add_via_pattern(
+            board,
+            5,
+            Pattern.DIAGONAL,
+            direction=Direction.VERTICAL,
+            extra_space=pcbnew.FromMM(0.1),
+            stub_length=pcbnew.FromMM(1),
+            group=True,
+        )
+        groups = get_pattern_groups(board)
+        assert len(groups) == 1
+        group, spec = groups[0]
+        assert spec == PatternSpec(
+            Pattern.DIAGONAL,
+            5,
+            Direction.VERTICAL,
+            extra_space=pcbnew.FromMM(0.1),
+            stub_length=pcbnew.FromMM(1),
+        )
+        assert len(group.GetItems()) == 3 * len(vias)
+
+        positions = [v.GetPosition() for v in vias]
+        group.Move(pcbnew.VECTOR2I_MM(1, 2))
+        for v, p in zip(vias, positions):
+            assert v.GetPosition() == p + pcbnew.VECTOR2I_MM(1, 2)
+
+    # group with its spec must survive save & load
+    board = pcbnew.LoadBoard(board_path)
+    groups = get_pattern_groups(board)
+    assert len(groups) == 1
+    assert groups[0][1].pattern == Pattern.DIAGONAL
+
+
+def test_regenerate_patterns(work_board) -> None:
+    with work_board(2) as board:
+        unchanged = add_via_pattern(board, 3, Pattern.PERPENDICULAR, group=True)
+        unchanged_group = unchanged[0].GetParentGroup()
+        template = _add_via(board, 0.6, 0.3, "Net1", pcbnew.VECTOR2I_MM(10, 10))
+        vias = add_via_pattern(
+            board,
+            4,
+            Pattern.PERPENDICULAR,
+            via=template,
+            stub_length=pcbnew.FromMM(1),
+            group=True,
+        )
+        vias[2].SetNet(board.FindNet("Net2"))
+        group = template.GetParentGroup()
+        group.Rotate(template.GetPosition(), pcbnew.EDA_ANGLE(90, pcbnew.DEGREES_T))
+        old_pitch = (vias[1].GetPosition() - template.GetPosition()).EuclideanNorm()
+
+        assert regenerate_patterns(board) == []
+
+        template.SetWidth(pcbnew.FromMM(0.8))
+        regenerated = regenerate_patterns(board)
+        assert len(regenerated) == 1
+        assert unchanged_group.GetName() in [g.GetName() for g in board.Groups()]
+
+        groups = get_pattern_groups(board)
+        assert len(groups) == 2
+        new_group = template.GetParentGroup()
+        assert new_group.GetName() != group.GetName()
+        new_vias = sorted(
+            [i for i in new_group.GetItems() if i.Type() == pcbnew.PCB_VIA_T],
+            key=lambda v: (v.GetPosition() - template.GetPosition()).EuclideanNorm(),
+        )
+        assert len(new_vias) == 4
+        assert len(new_group.GetItems()) == 12
+        assert new_vias[0].m_Uuid.AsString() == template.m_Uuid.AsString()
+        assert new_vias[2].GetNetname() == "Net2"
+        for v in new_vias:
+            # orientation of rotated pattern is preserved
+            assert v.GetX() == template.GetX()
+            assert v.GetY() <= template.GetY()
+        new_pitch = (new_vias[1].GetPosition() - template.GetPosition()).EuclideanNorm()
+        assert new_pitch == old_pitch + pcbnew.FromMM(0.2)
+
+        assert regenerate_patterns(board) == []
+
+
+def test_regenerate_stagger_pattern_keeps_axis(work_board) -> None:
+    with work_board(1) as board:
+        template = _add_via(board, 0.6, 0.3, "Net1", pcbnew.VECTOR2I_MM(10, 10))
+        # angle of the last via of even count STAGGER pattern depends on pitch
+        add_via_pattern(board, 4, Pattern.STAGGER, via=template, group=True)
+
+        template.SetWidth(pcbnew.FromMM(0.8))
+        assert len(regenerate_patterns(board)) == 1
+
+        new_vias = sorted(
+            _group_vias(template.GetParentGroup()),
+            key=lambda v: (v.GetPosition() - template.GetPosition()).EuclideanNorm(),
+        )
+        assert len(new_vias) == 4
+        # every other via lies on the pattern axis
+        assert new_vias[2].GetY() == template.GetY()
+        assert new_vias[2].GetX() > template.GetX()
+
+
+def test_regenerate_diagonal_pattern_created_as_perpendicular(work_board) -> None:
+    with work_board(1) as board:
+        template = _add_via(board, 0.6, 0.3, "Net1", pcbnew.VECTOR2I_MM(10, 10))
+        # track wider than via, vias are placed with PERPENDICULAR pattern
+        vias = add_via_pattern(
+            board,
+            3,
+            Pattern.DIAGONAL,
+            via=template,
+            track_width=pcbnew.FromMM(0.7),
+            group=True,
+        )
+        assert all(v.GetY() == template.GetY() for v in vias)
+
+        # track no longer wider than via, vias are placed diagonally
+        template.SetWidth(pcbnew.FromMM(0.8))
+        assert len(regenerate_patterns(board)) == 1
+
+        origin = template.GetPosition()
+        for v in _group_vias(template.GetParentGroup()):
+            move = v.GetPosition() - origin
+            assert move.x == move.y
+            assert move.x >= 0
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        PatternSpec(Pattern.STAGGER, 6),
+        PatternSpec(Pattern.PERPENDICULAR, 3, Direction.VERTICAL, 250000, 10000),
+        PatternSpec(Pattern.DIAGONAL, 4, stub_length=10, stub_directions={0: (1, 0)}),
+        PatternSpec(Pattern.STAGGER, 2, template="abc", fingerprint="0123"),
+        PatternSpec(Pattern.STAGGER, 4, template="abc", fingerprint="0", angle=16.38),
+    ],
+)
+def test_pattern_spec_name_roundtrip(spec) -> None:
+    result = PatternSpec.from_name(spec.to_name())
+    assert result is not None
+    assert result == spec
+    assert result.template == spec.template
+    assert result.fingerprint == spec.fingerprint
+    assert result.angle == spec.angle
+
+
+@pytest.mark.parametrize("name", ["", "Group1", "ViaPattern:Stagger", "ViaPattern:X"])
+def test_pattern_spec_from_unrelated_name(name) -> None:
+    assert PatternSpec.from_name(name) is None
+
+
+@pytest.mark.parametrize("track_width", [0, 0.65])
+def test_via_pattern_auto(track_width, work_board) -> None:
+    track_width = cast(int, pcbnew.FromMM(track_width))
+    with work_board() as board:
+        vias = add_via_pattern(board, 6, Pattern.AUTO, track_width=track_width)
+        length = max(v.GetX() for v in vias) - min(v.GetX() for v in vias)
+        for pattern in [Pattern.PERPENDICULAR, Pattern.DIAGONAL, Pattern.STAGGER]:
+            other = add_via_pattern(
+                board,
+                6,
+                pattern,
+                start_position=pcbnew.VECTOR2I_MM(0, 10),
+                track_width=track_width,
+            )
+            assert length <= max(v.GetX() for v in other)
+            for v in other:
+                board.Remove(v)
+
+
+def test_via_pattern_custom_rules(board_path) -> None:
+    board = pcbnew.CreateEmptyBoard()
+    zone = pcbnew.ZONE(board)
+    zone.SetIsRuleArea(True)
+    zone.SetZoneName("wide")
+    zone.SetLayerSet(pcbnew.LSET.AllCuMask())
+    outline = zone.Outline()
+    outline.NewOutline()
+    for x, y in [(5, -5), (50, -5), (50, 5), (5, 5)]:
+        outline.Append(pcbnew.FromMM(x), pcbnew.FromMM(y))
+    board.Add(zone)
+    board.Save(board_path)
+    Path(board_path).with_suffix(".kicad_dru").write_text(
+        "(version 1)\n"
+        "(rule wide\n"
+        "  (condition \"A.insideArea('wide')\")\n"
+        "  (constraint clearance (min 0.5mm)))\n"
+    )
+    board = pcbnew.LoadBoard(board_path)
+
+    # pattern partially inside the rule area must use its clearance
+    vias = add_via_pattern(board, 8, Pattern.PERPENDICULAR)
+    assert vias[1].GetX() - vias[0].GetX() == pcbnew.FromMM(0.6 + 0.5)
+
+    vias = add_via_pattern(
+        board, 3, Pattern.PERPENDICULAR, start_position=pcbnew.VECTOR2I_MM(0, 20)
+    )
+    assert vias[1].GetX() - vias[0].GetX() == pcbnew.FromMM(0.6 + 0.2)
+
+    # grouped pattern inside the rule area is not rebuilt when nothing changed
+    add_via_pattern(board, 8, Pattern.PERPENDICULAR, group=True)
+    assert regenerate_patterns(board) == []
+
+
+def test_via_pattern_stamps(board_path, work_board) -> None:
+    with work_board(1) as board:
+        stamp = create_stamp(board, 4, Pattern.STAGGER)
+        assert create_stamp(board, 4, Pattern.STAGGER) is stamp
+        library = Path(board_path).parent / "via_patterns.pretty"
+        assert len(list(library.glob("*.kicad_mod"))) == 1
+
+        footprints = [
+            place_stamp(board, stamp, pcbnew.VECTOR2I_MM(10 + 5 * i, 10), net="Net1")
+            for i in range(3)
+        ]
+        expected = [p.GetPosition() for f in footprints for p in f.Pads()]
+
+        vias = flatten_stamps(board, footprints)
+        assert [v.GetPosition() for v in vias] == expected
+        assert len(board.GetFootprints()) == 0
+        assert len(vias) == 3 * 4
+        for v in vias:
+            assert v.GetNetname() == "Net1"
+            assert v.GetWidth() == pcbnew.FromMM(0.6)
+
+
+def test_via_pattern_stamps_depend_on_drill(work_board) -> None:
+    with work_board(1) as board:
+        small_drill = _add_via(board, 0.6, 0.3, "", pcbnew.VECTOR2I_MM(10, 10))
+        large_drill = _add_via(board, 0.6, 0.4, "", pcbnew.VECTOR2I_MM(20, 10))
+        a = create_stamp(board, 3, Pattern.PERPENDICULAR, via=small_drill)
+        b = create_stamp(board, 3, Pattern.PERPENDICULAR, via=large_drill)
+        assert a.GetFPID().GetLibItemName() != b.GetFPID().GetLibItemName()
+        assert [p.GetDrillSize().x for p in b.Pads()] == [pcbnew.FromMM(0.4)] * 3
+
+
+def test_via_pattern_stamps_through_vias_only(work_board) -> None:
+    with work_board(1) as board:
+        via = _add_via(board, 0.6, 0.3, "", pcbnew.VECTOR2I_MM(10, 10))
+        via.SetViaType(pcbnew.VIATYPE_BLIND_BURIED)
+        via.SetBottomLayer(pcbnew.In1_Cu)
+        with pytest.raises(ValueError, match="Stamps support only through vias"):
+            create_stamp(board, 3, Pattern.PERPENDICULAR, via=via)
+
+
+def test_via_pattern_stamps_unsaved_board() -> None:
+    board = pcbnew.CreateEmptyBoard()
+    with pytest.raises(ValueError, match="Board is not saved"):
+        create_stamp(board, 3, Pattern.PERPENDICULAR)
+
+
+@pytest.mark.parametrize("direction", [Direction.HORIZONTAL, Direction.VERTICAL])
+def test_via_sequence(direction, tmpdir, board_path, work_board) -> None:
+    large = ViaDefinition(pcbnew.FromMM(1.2), pcbnew.FromMM(0.6))
+    small = ViaDefinition(pcbnew.FromMM(0.6), pcbnew.FromMM(0.3))
+    with work_board(1) as board:
+        start = pcbnew.VECTOR2I_MM(20, 20)
+        vias = add_via_sequence(
+            board,
+            [large, small, small, large],
+            start_position=start,
+            direction=direction,
+            net="Net1",
+        )
+        assert [ViaDefinition.from_via(v) for v in vias] == [
+            large,
+            small,
+            small,
+            large,
+        ]
+        assert vias[0].GetNetname() == "Net1"
+        assert vias[0].GetPosition() == start
+
+        # default clearance and track width are 0.2mm
+        distances = [
+            (b.GetPosition() - a.GetPosition()).EuclideanNorm()
+            for a, b in zip(vias, vias[1:])
+        ]
+        assert distances == [
+            pcbnew.FromMM(0.9 + 0.2),
+            pcbnew.FromMM(0.6 + 0.2),
+            pcbnew.FromMM(0.9 + 0.2),
+        ]
+    assert_drc(tmpdir, board_path)
+
+
+@pytest.mark.parametrize("rings", [1, 3])
+def test_via_ring(rings, tmpdir, board_path, work_board) -> None:
+    pattern = Pattern.RING if rings == 1 else Pattern.RADIAL
+    with work_board(1) as board:
+        footprint = _add_bga(board, 1, 1, 2.0)
+        pad = next(iter(footprint.Pads()))
+        vias = add_via_ring(board, pattern, rings=rings, pad=pad, net="Net1")
+        assert len(vias) > 6 * rings
+
+        center = pad.GetPosition()
+        radii = {round((v.GetPosition() - center).EuclideanNorm(), -3) for v in vias}
+        assert len(radii) == rings
+        for v in vias:
+            assert v.GetNetname() == "Net1"
+    assert_drc(tmpdir, board_path)
+
+
+def test_via_ring_wrong_rings(work_board) -> None:
+    with work_board() as board:
+        with pytest.raises(ValueError, match="The `rings` must be 1 for RING"):
+            add_via_ring(board, Pattern.RING, rings=2, radius=pcbnew.FromMM(2))
+
+
+def test_ensure_via_pattern(work_board) -> None:
+    def _count_vias(board) -> int:
+        return sum(1 for t in board.GetTracks() if t.Type() == pcbnew.PCB_VIA_T)
+
+    with work_board(1) as board:
+        start = pcbnew.VECTOR2I_MM(20, 20)
+        add_via_pattern(board, 3, Pattern.STAGGER, start_position=start, net="Net1")
+        assert _count_vias(board) == 3
+
+        index = ViaIndex(board)
+        report = ensure_via_pattern(
+            board, 5, Pattern.STAGGER, start_position=start, index=index
+        )
+        assert len(report.vias) == 5
+        assert len(report.skipped) == 3
+        assert report.created == report.vias[3:]
+        assert report.vias[0].GetNetname() == "Net1"
+        assert _count_vias(board) == 5
+
+        report = ensure_via_pattern(
+            board, 5, Pattern.STAGGER, start_position=start, index=index
+        )
+        assert len(report.created) == 0
+        assert len(report.skipped) == 5
+        assert _count_vias(board) == 5
+
+
+def test_ensure_via_pattern_leaves_existing_vias_untouched(work_board) -> None:
+    with work_board(4) as board:
+        start = pcbnew.VECTOR2I_MM(20, 20)
+        existing = add_via_pattern(
+            board, 2, Pattern.PERPENDICULAR, start_position=start, group=True
+        )
+        existing_group = existing[0].GetParentGroup().GetName()
+
+        report = ensure_via_pattern(
+            board,
+            4,
+            Pattern.PERPENDICULAR,
+            start_position=start,
+            nets="Net[1..4]",
+            stub_length=1000000,
+            group=True,
+        )
+        assert len(report.skipped) == 2
+        for v in report.skipped:
+            assert v.GetNetCode() == 0
+            assert v.GetParentGroup().GetName() == existing_group
+        assert [v.GetNetname() for v in report.created] == ["Net3", "Net4"]
+
+        tracks = [t for t in board.GetTracks() if t.Type() == pcbnew.PCB_TRACE_T]
+        stubs = [t for t in tracks if t.GetLength() == 1000000]
+        assert {t.GetNetname() for t in stubs} == {"Net3", "Net4"}
+
+
+def test_ensure_via_pattern_stubs_of_created_first_via(work_board) -> None:
+    with work_board(1) as board:
+        report = ensure_via_pattern(
+            board, 3, Pattern.PERPENDICULAR, net="Net1", stub_length=1000000
+        )
+        assert len(report.created) == 3
+        tracks = [t for t in board.GetTracks() if t.Type() == pcbnew.PCB_TRACE_T]
+        assert len([t for t in tracks if t.GetLength() == 1000000]) == 3
+
+
+@pytest.mark.parametrize(
+    "nets",
+    [
+        "Net[1..4]",
+        ["Net1", "Net2", 3, "Net4"],
+        lambda i: f"Net{i + 1}",
+    ],
+)
+def test_via_pattern_nets(nets, work_board) -> None:
+    with work_board(4) as board:
+        vias = add_via_pattern(
+            board, 4, Pattern.PERPENDICULAR, nets=nets, stub_length=1000000
+        )
+        assert [v.GetNetname() for v in vias] == ["Net1", "Net2", "Net3", "Net4"]
+        tracks = [t for t in board.GetTracks() if t.Type() == pcbnew.PCB_TRACE_T]
+        stubs = [t for t in tracks if t.GetLength() == 1000000]
+        assert {t.GetNetname() for t in stubs} == {"Net1", "Net2", "Net3", "Net4"}
+
+
+def test_via_pattern_nets_wrong_count(work_board) -> None:
+    with work_board(4) as board:
+        with pytest.raises(ValueError, match="The `nets` must define net of each"):
+            add_via_pattern(board, 3, Pattern.PERPENDICULAR, nets="Net[1..4]")
+
+
+def test_via_pattern_nets_unknown_net(work_board) -> None:
+    with work_board(1) as board:
+        with pytest.raises(ValueError, match="Net 'Net2' not found"):
+            add_via_pattern(board, 2, Pattern.PERPENDICULAR, nets="Net[1..2]")
+
+
+def test_via_pattern_nets_renamed_net(work_board) -> None:
+    with work_board(2) as board:
+        add_via_pattern(board, 2, Pattern.PERPENDICULAR, nets="Net[1..2]")
+        board.FindNet("Net1").SetNetname("D0")
+        with pytest.raises(ValueError, match="Net 'Net1' not found"):
+            add_via_pattern(board, 2, Pattern.PERPENDICULAR, nets="Net[1..2]")
+        vias = add_via_pattern(board, 2, Pattern.PERPENDICULAR, nets=["D0", "Net2"])
+        assert vias[0].GetNetname() == "D0"
+
+
+@pytest.mark.parametrize("pattern", [Pattern.PERPENDICULAR, Pattern.STAGGER])
+def test_compact_vias(pattern, work_board) -> None:
+    with work_board(1) as board:
+        # hand placed vias with loose pitch, on the negative side of line
+        positions = [(20 + 2 * i, 20 - (i % 2)) for i in range(4)]
+        vias = [
+            _add_via(board, 0.6, 0.3, "Net1", pcbnew.VECTOR2I_MM(x, y))
+            for x, y in reversed(positions)
+        ]
+        tracks = [
+            _add_track(
+                board,
+                v.GetPosition(),
+                v.GetPosition() + pcbnew.VECTOR2I_MM(0, -2),
+                pcbnew.F_Cu,
+            )
+            for v in vias
+        ]
+        for t in tracks:
+            t.SetNet(board.FindNet("Net1"))
+
+        compacted = compact_vias(board, vias, pattern)
+        assert compacted[0].GetPosition() == pcbnew.VECTOR2I_MM(20, 20)
+        assert [v.GetX() for v in compacted] == sorted(v.GetX() for v in compacted)
+
+        expected = pcbnew.CreateEmptyBoard()
+        pattern_vias = add_via_pattern(
+            expected, 4, pattern, start_position=pcbnew.VECTOR2I_MM(20, 20)
+        )
+        for v, e in zip(compacted, pattern_vias):
+            assert v.GetX() == e.GetX()
+            assert v.GetY() - 2 * pcbnew.FromMM(20) == -e.GetY()
+
+        for t in tracks:
+            assert any(t.GetStart() == v.GetPosition() for v in compacted)
+
+
+def test_compact_vias_single_via(work_board) -> None:
+    with work_board() as board:
+        via = _add_via(board, 0.6, 0.3, "", pcbnew.VECTOR2I_MM(20, 20))
+        with pytest.raises(ValueError, match="must contain at least 2 vias"):
+            compact_vias(board, [via])
+
+
 def test_via_pattern_wrong_net_type(work_board) -> None:
     with work_board() as board:
         with pytest.raises(TypeError, match="The `net` argument must be str or int"):
@@ -259,7 +810,13 @@ def test_via_pattern_negative_track_width(work_board) -> None:
 
 
 @pytest.mark.parametrize(
-    "params", [("diagonal", Pattern.DIAGONAL), ("StaGGEr", Pattern.STAGGER)]
+    "params",
+    [
+        ("diagonal", Pattern.DIAGONAL),
+        ("StaGGEr", Pattern.STAGGER),
+        ("auto", Pattern.AUTO),
+        ("RADIAL", Pattern.RADIAL),
+    ],
 )
 def test_pattern_enum_from_string(params) -> None:
     string, expected = params
@@ -269,3 +826,187 @@ def test_pattern_enum_from_string(params) -> None:
 def test_pattern_enum_from_illegal_string() -> None:
     with pytest.raises(ValueError, match=r"'.*' is not a valid Pattern"):
         _ = Pattern.get("NO_SUCH_PATTERN")
+
+
+@pytest.mark.parametrize("size", [(1, 2), (4, 4), (5, 3)])
+def test_fanout_vias(size, tmpdir, board_path, work_board) -> None:
+    rows, columns = size
+    pitch = 1.27
+    with work_board(rows * columns) as board:
+        footprint = _add_bga(board, rows, columns, pitch)
+        vias = add_fanout_vias(board, footprint)
+        assert len(vias) == rows * columns
+
+        netclass = board.GetAllNetClasses()["Default"]
+        for via in vias:
+            assert via.GetWidth() == netclass.GetViaDiameter()
+            assert via.GetDrill() == netclass.GetViaDrill()
+
+        pads = list(footprint.Pads())
+        center = pcbnew.VECTOR2I_MM(
+            20 + (columns - 1) * pitch / 2, 20 + (rows - 1) * pitch / 2
+        )
+        for pad, via in zip(pads, vias):
+            assert via.GetNetCode() == pad.GetNetCode()
+            move = via.GetPosition() - pad.GetPosition()
+            assert abs(move.x) == abs(move.y) == pcbnew.FromMM(pitch / 2)
+            # vias must escape away from the footprint center
+            assert (move.x > 0) == (pad.GetPosition().x >= center.x)
+            assert (move.y > 0) == (pad.GetPosition().y >= center.y)
+
+        tracks = [t for t in board.GetTracks() if t.Type() == pcbnew.PCB_TRACE_T]
+        fanout_tracks = [t for t in tracks if t.GetStart().x >= pcbnew.FromMM(20)]
+        assert len(fanout_tracks) == rows * columns
+    assert_drc(tmpdir, board_path)
+
+
+def test_fanout_vias_clearance_violation(work_board) -> None:
+    with work_board(4) as board:
+        # default 0.6mm via is too close to neighbouring 0.5mm pads
+        footprint = _add_bga(board, 2, 2, 1.0)
+        with pytest.raises(ValueError, match="would violate clearance"):
+            add_fanout_vias(board, footprint)
+        assert not [t for t in board.GetTracks() if t.GetX() >= pcbnew.FromMM(20)]
+
+        via = _add_via(board, 0.4, 0.2, "Net1", pcbnew.VECTOR2I(0, 0))
+        assert len(add_fanout_vias(board, footprint, via=via)) == 4
+
+
+def test_fanout_vias_no_pitch(work_board) -> None:
+    with work_board(1) as board:
+        footprint = _add_bga(board, 1, 1, 1.0)
+        with pytest.raises(ValueError, match="Unable to determine pad pitch"):
+            add_fanout_vias(board, footprint)
+        vias = add_fanout_vias(board, footprint, offset=pcbnew.FromMM(0.5))
+        assert len(vias) == 1
+
+
+def test_add_return_vias(work_board) -> None:
+    with work_board(3) as board:
+        signal = _add_via(board, 0.6, 0.3, "Net1", pcbnew.VECTOR2I_MM(20, 20))
+        # only direction towards negative x is free
+        for x, y in [(1, 0), (1, 1), (1, -1), (0, 1), (0, -1), (-1, 1), (-1, -1)]:
+            _add_via(board, 0.6, 0.3, "Net2", pcbnew.VECTOR2I_MM(20 + x, 20 + y))
+
+        added = add_return_vias(board, nets="Net[1..1]", ground_net="Net3")
+        assert len(added) == 1
+        assert added[0].GetNetname() == "Net3"
+        assert added[0].GetY() == signal.GetY()
+        assert added[0].GetX() < signal.GetX()
+
+
+def test_add_return_vias_grouped_signal(work_board) -> None:
+    with work_board(2) as board:
+        template = _add_via(board, 0.6, 0.3, "Net1", pcbnew.VECTOR2I_MM(20, 20))
+        vias = add_via_pattern(
+            board, 3, Pattern.PERPENDICULAR, via=template, group=True
+        )
+        group = template.GetParentGroup()
+
+        added = add_return_vias(board, [template], ground_net="Net2")
+        assert len(added) == 1
+        assert added[0].GetParentGroup() is None
+        assert len(_group_vias(group)) == len(vias)
+        assert regenerate_patterns(board) == []
+        assert len(_group_vias(group)) == len(vias)
+
+
+def test_add_return_vias_no_free_space(work_board) -> None:
+    with work_board(3) as board:
+        signal = _add_via(board, 0.6, 0.3, "Net1", pcbnew.VECTOR2I_MM(20, 20))
+        for x, y in [(i, j) for i in (-1, 0, 1) for j in (-1, 0, 1) if i or j]:
+            _add_via(board, 0.6, 0.3, "Net2", pcbnew.VECTOR2I_MM(20 + x, 20 + y))
+
+        assert add_return_vias(board, [signal], ground_net="Net3") == []
+
+
+def test_thin_vias(work_board) -> None:
+    with work_board(1) as board:
+        vias = [
+            _add_via(board, 0.6, 0.3, "Net1", pcbnew.VECTOR2I_MM(10 + x, 10 + y))
+            for y in range(10)
+            for x in range(10)
+        ]
+        connected = vias[55]
+        track = _add_track(
+            board,
+            connected.GetPosition(),
+            connected.GetPosition() + pcbnew.VECTOR2I_MM(0, -2),
+            pcbnew.F_Cu,
+        )
+        track.SetNet(board.FindNet("Net1"))
+
+        kept = thin_vias(board, vias, max_pitch=pcbnew.FromMM(3))
+        assert 0 < len(kept) < len(vias)
+        remaining = [t for t in board.GetTracks() if t.Type() == pcbnew.PCB_VIA_T]
+        assert len(remaining) == len(kept)
+        assert any(v.m_Uuid == connected.m_Uuid for v in kept)
+
+        pitch = pcbnew.FromMM(3)
+        for v in vias:
+            assert any(
+                (v.GetPosition() - k.GetPosition()).EuclideanNorm() < pitch
+                for k in kept
+            )
+
+
+def test_thin_vias_invalid_arguments(work_board) -> None:
+    with work_board() as board:
+        with pytest.raises(ValueError, match="Exactly one of"):
+            thin_vias(board, [], max_pitch=1000000, density=1.0)
+        with pytest.raises(ValueError, match="must be specified"):
+            thin_vias(board, density=1.0)
+
+
+def test_replicate_via_pattern(work_board) -> None:
+    with work_board(1) as board:
+        start = pcbnew.VECTOR2I_MM(20, 20)
+        vias = add_via_pattern(
+            board, 3, Pattern.PERPENDICULAR, start_position=start, net="Net1"
+        )
+        offsets = [(pcbnew.FromMM(5) * i, 0) for i in range(1, 4)]
+        copies = replicate_via_pattern(board, vias, offsets)
+
+        assert len(copies) == 3
+        for (dx, dy), copy in zip(offsets, copies):
+            for v, c in zip(vias, copy):
+                assert c.GetPosition() == v.GetPosition() + pcbnew.VECTOR2I(dx, dy)
+                assert c.GetNetCode() == v.GetNetCode()
+        total = sum(1 for t in board.GetTracks() if t.Type() == pcbnew.PCB_VIA_T)
+        assert total == 12
+
+
+def test_replicate_via_pattern_group(work_board) -> None:
+    with work_board(4) as board:
+        start = pcbnew.VECTOR2I_MM(20, 20)
+        add_via_pattern(
+            board,
+            2,
+            Pattern.PERPENDICULAR,
+            start_position=start,
+            nets="Net[1..2]",
+            stub_length=1000000,
+            group=True,
+        )
+        (group, spec), *_ = get_pattern_groups(board)
+
+        copies = replicate_via_pattern(
+            board, group, [(0, pcbnew.FromMM(5), 90)], nets=["Net[3..4]"]
+        )
+        assert [v.GetNetname() for v in copies[0]] == ["Net3", "Net4"]
+        assert copies[0][0].GetPosition() == pcbnew.VECTOR2I_MM(20, 25)
+        assert copies[0][1].GetX() == copies[0][0].GetX()
+
+        groups = get_pattern_groups(board)
+        assert len(groups) == 2
+        template = copies[0][0].m_Uuid.AsString()
+        new_group, new_spec = next(g for g in groups if g[1].template == template)
+        assert new_spec == spec
+        assert len(new_group.GetItems()) == len(group.GetItems())
+
+
+def test_replicate_via_pattern_nets_mismatch(work_board) -> None:
+    with work_board(1) as board:
+        vias = add_via_pattern(board, 2, Pattern.PERPENDICULAR)
+        with pytest.raises(ValueError, match="must define nets of each"):
+            replicate_via_pattern(board, vias, [(0, 0), (1000, 0)], nets=["Net1"])
@@ -1,6 +1,8 @@
+import importlib
 import inspect
 import logging
 from logging import NullHandler
+from typing import TYPE_CHECKING
 
 try:
     from ._version import __version__
@@ -27,8 +29,67 @@ def __is_in_call_stack(function_name: str, module_name: str) -> bool:
 
 
 if __is_in_call_stack("LoadPluginModule", "pcbnew"):
-    from .plugin_action import PluginAction
+    from .plugin_action import PalettePluginAction, PluginAction, RepeatPluginAction
 
     PluginAction().register()
-else:
-    from .via_patterns import Direction, Pattern, add_via_pattern
+    RepeatPluginAction().register()
+    PalettePluginAction().register()
+
+if TYPE_CHECKING:
+    from .stamp import StampCache, create_stamp, flatten_stamps, place_stamp
+    from .via_patterns import (
+        ClearanceResolver,
+        Direction,
+        Pattern,
+        PatternSpec,
+        ViaDefinition,
+        ViaIndex,
+        add_fanout_vias,
+        add_return_vias,
+        add_via_pattern,
+        add_via_ring,
+        add_via_sequence,
+        compact_vias,
+        ensure_via_pattern,
+        get_pattern_groups,
+        get_via_table,
+        regenerate_patterns,
+        replicate_via_pattern,
+        thin_vias,
+    )
+
+# pcbnew dependent names, imported on first access (PEP 562) so that pcbnew
+# independent modules (like `sexpr` or `plan`) do not pay for pcbnew import
+_lazy_names = {
+    "StampCache": ".stamp",
+    "create_stamp": ".stamp",
+    "flatten_stamps": ".stamp",
+    "place_stamp": ".stamp",
+    "ClearanceResolver": ".via_patterns",
+    "Direction": ".via_patterns",
+    "Pattern": ".via_patterns",
+    "PatternSpec": ".via_patterns",
+    "ViaDefinition": ".via_patterns",
+    "ViaIndex": ".via_patterns",
+    "add_fanout_vias": ".via_patterns",
+    "add_return_vias": ".via_patterns",
+    "add_via_pattern": ".via_patterns",
+    "add_via_ring": ".via_patterns",
+    "add_via_sequence": ".via_patterns",
+    "compact_vias": ".via_patterns",
+    "ensure_via_pattern": ".via_patterns",
+    "get_pattern_groups": ".via_patterns",
+    "get_via_table": ".via_patterns",
+    "regenerate_patterns": ".via_patterns",
+    "replicate_via_pattern": ".via_patterns",
+    "thin_vias": ".via_patterns",
+}
+
+
+def __getattr__(name: str) -> object:
+    if name not in _lazy_names:
+        msg = f"module {__name__!r} has no attribute {name!r}"
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(_lazy_names[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -1,12 +1,104 @@
+import argparse
 import logging
 import sys
 
+from .analysis import analyze_via_spacing
+from .export import WRITERS, read_board_vias, write_via_table
+from .project import load_project_rules, project_path
+
 logger = logging.getLogger(__name__)
 
 
+def export(args: argparse.Namespace) -> None:
+    table = read_board_vias(args.board)
+    write_via_table(table, args.output, args.format)
+    logger.info("Exported %s vias to '%s'", len(table), args.output)
+
+
+def _mm(value: float) -> str:
+    return f"{value / 1e6:.3f}"
+
+
+def analyze(args: argparse.Namespace) -> None:
+    table = read_board_vias(args.board)
+    rules = load_project_rules(project_path(args.board))
+    report = analyze_via_spacing(
+        table, rules, tolerance=args.tolerance, near_margin=int(args.margin * 1e6)
+    )
+
+    for cluster in report.clusters:
+        x, y = cluster.center
+        print(
+            f"Loose cluster of {len(cluster.vias)} vias at ({_mm(x)}, {_mm(y)}): "
+            f"pitch {_mm(cluster.pitch)} mm, expected {_mm(cluster.expected_pitch)} "
+            f"mm, possible saving {cluster.area_saving / 1e12:.3f} mm^2"
+        )
+    xs, ys = table.column("x"), table.column("y")
+    for v in report.near_violations:
+        print(
+            f"Near violation at ({_mm(xs[v.a])}, {_mm(ys[v.a])}) and "
+            f"({_mm(xs[v.b])}, {_mm(ys[v.b])}): gap {_mm(v.gap)} mm, "
+            f"clearance {_mm(v.clearance)} mm"
+        )
+    logger.info(
+        "Analyzed %s vias: %s loose clusters (%.3f mm^2), %s near violations",
+        len(table),
+        len(report.clusters),
+        report.area_saving / 1e12,
+        len(report.near_violations),
+    )
+
+
 def app():
-    logger.error("This plugin is not usable when running as python module")
-    sys.exit(1)
+    parser = argparse.ArgumentParser(
+        prog="via_patterns",
+        description="Via patterns command line tools, "
+        "plugin actions are available only in KiCad",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    export_parser = subparsers.add_parser("export", help="Export vias of board file")
+    export_parser.add_argument("board", help="Path to .kicad_pcb file")
+    export_parser.add_argument("output", help="Output file path")
+    export_parser.add_argument(
+        "--format",
+        choices=sorted(WRITERS),
+        default=None,
+        help="Output format, guessed from output file extension by default",
+    )
+    export_parser.set_defaults(func=export)
+
+    analyze_parser = subparsers.add_parser(
+        "analyze", help="Report loosely placed vias and near clearance violations"
+    )
+    analyze_parser.add_argument("board", help="Path to .kicad_pcb file")
+    analyze_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Relative pitch excess above which cluster is reported",
+    )
+    analyze_parser.add_argument(
+        "--margin",
+        type=float,
+        default=0.05,
+        help="Clearance margin in mm below which via pair is reported",
+    )
+    analyze_parser.set_defaults(func=analyze)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command is None:
+        logger.error("This plugin is not usable when running as python module")
+        parser.print_usage()
+        sys.exit(1)
+
+    try:
+        args.func(args)
+    except (OSError, ValueError, ImportError) as e:
+        logger.error(e)
+        sys.exit(1)
 
 
 if __name__ == "__main__":
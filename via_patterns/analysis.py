@@ -0,0 +1,171 @@
+"""Board-wide via spacing analysis.
+
+Finds clusters of vias placed with pitch looser than the one used by
+`add_via_pattern` for their netclass, and pairs of vias of different nets
+which are close to clearance violation. Neighbours are found with uniform
+grid, so each via is compared only with vias in adjacent cells.
+Does not require pcbnew, works on `export.ViaTable`.
+"""
+
+from __future__ import annotations
+
+import math
+import statistics
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from .export import ViaTable
+from .geometry import Pattern, get_pattern_offsets
+from .project import NetclassRules, ProjectRules
+
+
+@dataclass
+class SpacingCluster:
+    # row indices of via table
+    vias: List[int]
+    # median distance of each via to its nearest neighbour
+    pitch: int
+    expected_pitch: int
+    center: Tuple[int, int]
+
+    @property
+    def area_saving(self) -> int:
+        """Estimated area (nm^2) freed by placing vias with expected pitch"""
+        return len(self.vias) * (self.pitch**2 - self.expected_pitch**2)
+
+
+@dataclass
+class NearViolation:
+    a: int
+    b: int
+    # copper to copper distance and required clearance
+    gap: int
+    clearance: int
+
+
+@dataclass
+class SpacingReport:
+    clusters: List[SpacingCluster] = field(default_factory=list)
+    near_violations: List[NearViolation] = field(default_factory=list)
+
+    @property
+    def area_saving(self) -> int:
+        return sum(c.area_saving for c in self.clusters)
+
+
+class _DisjointSet:
+    def __init__(self, size: int) -> None:
+        self.parent = list(range(size))
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def expected_pitch(via_width: int, netclass: NetclassRules) -> int:
+    """Pitch of PERPENDICULAR pattern created by `add_via_pattern`"""
+    offset_x, _ = get_pattern_offsets(
+        Pattern.PERPENDICULAR, via_width, netclass.clearance, netclass.track_width
+    )
+    return offset_x
+
+
+def analyze_via_spacing(
+    table: ViaTable,
+    rules: ProjectRules,
+    *,
+    search_factor: float = 2.0,
+    tolerance: float = 0.1,
+    near_margin: int = 50000,
+) -> SpacingReport:
+    """Find loosely placed via clusters and near clearance violations.
+
+    Vias closer than `search_factor` times their expected pitch form
+    a cluster. Cluster is reported when its median nearest neighbour
+    distance exceeds expected pitch by more than `tolerance` (relative).
+    Pairs of vias of different nets with copper gap smaller than
+    clearance + `near_margin` are reported as near violations.
+    """
+    if search_factor < 1 or tolerance < 0 or near_margin < 0:
+        msg = (
+            "The `search_factor` must be at least 1, "
+            "`tolerance` and `near_margin` must not be negative"
+        )
+        raise ValueError(msg)
+
+    count = len(table)
+    report = SpacingReport()
+    if count < 2:
+        return report
+
+    xs = table.column("x").tolist()
+    ys = table.column("y").tolist()
+    widths = table.column("width").tolist()
+    nets = table.column("net").tolist()
+
+    netclasses: Dict[int, NetclassRules] = {}
+    for net in set(nets):
+        netclasses[net] = rules.get_netclass(table.net_names.get(net, ""))
+    pitches = [expected_pitch(w, netclasses[n]) for w, n in zip(widths, nets)]
+    clearances = [netclasses[n].clearance for n in nets]
+
+    # cell size covers the largest search radius, so only adjacent
+    # cells need to be checked
+    cell = max(1, int(search_factor * max(pitches)), max(pitches) + near_margin)
+    grid: Dict[Tuple[int, int], List[int]] = {}
+    for i, (x, y) in enumerate(zip(xs, ys)):
+        grid.setdefault((x // cell, y // cell), []).append(i)
+
+    nearest = [math.inf] * count
+    clusters = _DisjointSet(count)
+    for (cx, cy), members in grid.items():
+        candidates = [
+            j
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            for j in grid.get((cx + dx, cy + dy), [])
+        ]
+        for i in members:
+            xi, yi, wi, ni = xs[i], ys[i], widths[i], nets[i]
+            for j in candidates:
+                if j <= i:
+                    continue
+                distance = math.hypot(xs[j] - xi, ys[j] - yi)
+                nearest[i] = min(nearest[i], distance)
+                nearest[j] = min(nearest[j], distance)
+                if distance <= search_factor * max(pitches[i], pitches[j]):
+                    clusters.union(i, j)
+                if ni != nets[j] or ni == 0:
+                    clearance = max(clearances[i], clearances[j])
+                    gap = int(distance - (wi + widths[j]) / 2)
+                    if gap < clearance + near_margin:
+                        report.near_violations.append(
+                            NearViolation(i, j, gap, clearance)
+                        )
+
+    members_of: Dict[int, List[int]] = {}
+    for i in range(count):
+        members_of.setdefault(clusters.find(i), []).append(i)
+
+    for vias in members_of.values():
+        if len(vias) < 2:
+            continue
+        pitch = int(statistics.median(nearest[i] for i in vias))
+        expected = max(pitches[i] for i in vias)
+        if pitch > expected * (1 + tolerance):
+            center = (
+                sum(xs[i] for i in vias) // len(vias),
+                sum(ys[i] for i in vias) // len(vias),
+            )
+            report.clusters.append(SpacingCluster(vias, pitch, expected, center))
+
+    report.clusters.sort(key=lambda c: c.area_saving, reverse=True)
+    report.near_violations.sort(key=lambda v: v.gap - v.clearance)
+    return report
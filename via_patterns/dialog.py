@@ -3,7 +3,7 @@ from __future__ import annotations
 import os
 import string
 from dataclasses import dataclass
-from typing import List
+from typing import Callable, Dict, List
 
 import wx
 from wx.lib.embeddedimage import PyEmbeddedImage
@@ -12,6 +12,43 @@ from .via_patterns import Pattern, RotateDirection
 
 TEXT_CTRL_EXTRA_SPACE = 25
 
+# bitmaps obtained with img2py, using KiCad's undo/redo buttons
+ROTATE_LEFT_IMAGE = PyEmbeddedImage(
+    b"iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAQAAADZc7J/AAAB8klEQVRIx2NgAIJQiZDbIbdD"
+    b"JRjIBSFBIf9D/oeGkG9AKNiAcIRIgECoQahTiH+weZAkAyNJBgTJhDSFnAz5AxKBwtfBc4K9"
+    b"GpiIMCBSPGRqyA8krcjwfKgrAQNC6kOegel/ocdD6kM9goyCVUNsQ+JCFoe8gxoy15MdnwEQ"
+    b"Z28MMkKX92QPLgx5A5Y9HCiM24D/IV+D43G5MlIkZD9Yzf40VgzJ0BCQVPC/4LOhRaGKuIxI"
+    b"Yw1ZDjZiCoZUhCzcl6DAPBtSE6yNzYgEDmD8AMMo2BzTDaLBGSG7Qn4hjAmeg82IUBWwml04"
+    b"HBklGBIXuj7kG9iAO9jVBM8Ey2rgSRWx3KEhwROCrLHLBuqDXVhCdrJnYAx5iscTROWczUAD"
+    b"blBgQPB8oAHvKHHBXFCSo8SAPUADrpOtvYEp5Dkwse0g335bcDSWkR+Ei8CJWYlM7UGmIX+B"
+    b"BuwlU3uAQMhVULkRaoAtm1SH7A81w6c9lDNkL9j/k7AHzieg1I+QRJx+Vw29AM7su7EUKGAF"
+    b"MdDidA9mbgeWRm0hn8Haj4fy444gq5AX0NLgakhnSHSIbahlsC+wNNwGyeDATDwtlA1vIIUK"
+    b"hXSHfMdRrJ8OcSMuomRCS0OOgiMLBp+FzA72IqJ+QnELT6hWsHuoX6hZqDSJWukOAGS+H1zu"
+    b"ajCnAAAAAElFTkSuQmCC"
+)
+ROTATE_RIGHT_IMAGE = PyEmbeddedImage(
+    b"iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAQAAADZc7J/AAAB4UlEQVRIx2NgIANEiofcCL4W"
+    b"KspALggNCfkPhEGEVTIGSQabh/iHOoUaBAggGRAONiAUj84GplDvkLkhr8EKIfBPyMngxiAZ"
+    b"ogwIdg+9gKQVGf4ImRIpjtcAT/aQBVDF74IXhcSF2AarBhmFeoQ0hB4P+QcWfxpah9OAQOGQ"
+    b"o2DJ1yEFoWzoskFGIRuh3sFuQBpr6EGw1P5AYZzeiw/5CnUhpgEh08ESy9NYcWmPUAguDDkT"
+    b"DPZKaAi6A03BfjwTyok17rVCq0PPIgXnuwhZdPv3gkI5SB6bdmCUIrT+CtkVnBEohu43bbBk"
+    b"Pw6f3wfLfgvZEBIXKoRVSUgZSEmwKnYDQmxDJoaGxHLjSXtgD9xiIB+E3AIasIwSAz4APTCB"
+    b"EgNAyaOPEgNuAA1YRYkBu4AGXKfEgCpQNIZrkm1AsCo4qVAUCgeABvwMVSG/qDQO+QvMY0cS"
+    b"OMj3xjSwN1Y5sOC1yAzo1irsUmzgBP0/5ECQJJ4C5TtQxXsc0gECISfARrwKKcHMOkBP7oQW"
+    b"rdE4HejJHjwTmu/fhiwPTQ5xCNUNMg0OCGkOOQ8Vfx5qSSg+PFHKHmT4PbgrSpCY8GQM9Q6e"
+    b"E/IcSevfkKOhpZCKhWgArJ+kQ81C/ULcQrXwFiYDCgCpIh3sXAryzgAAAABJRU5ErkJggg=="
+)
+
+# decoded bitmaps, images are decoded once per session
+_bitmaps: Dict[int, wx.Bitmap] = {}
+
+
+def get_bitmap(image: PyEmbeddedImage) -> wx.Bitmap:
+    key = id(image)
+    if key not in _bitmaps:
+        _bitmaps[key] = image.GetBitmap()
+    return _bitmaps[key]
+
 
 @dataclass
 class WindowState:
@@ -169,11 +206,12 @@ class LabeledDropdownCtrl(wx.Panel):
         parent: wx.Window,
         label: str,
         choices: List[str] = [],
+        style: int = wx.CB_DROPDOWN,
     ) -> None:
         super().__init__(parent)
 
         self.label = wx.StaticText(self, -1, label)
-        self.dropdown = wx.ComboBox(self, choices=choices, style=wx.CB_DROPDOWN)
+        self.dropdown = wx.ComboBox(self, choices=choices, style=style)
         self.dropdown.SetValue(choices[0])
 
         sizer = wx.BoxSizer(wx.HORIZONTAL)
@@ -203,6 +241,7 @@ class MainDialog(wx.Dialog):
             Pattern.PERPENDICULAR.value,
             Pattern.DIAGONAL.value,
             Pattern.STAGGER.value,
+            Pattern.AUTO.value,
         ]
         pattern_ctrl = LabeledDropdownCtrl(self, "Type:", choices)
 
@@ -259,38 +298,14 @@ class RotateDialog(wx.Dialog):
         label = wx.StaticText(
             self, -1, "Rotate:"
         )
-        # bitmaps obtained with img2py, using KiCad's undo/redo buttons
-        rot_left_bitmap = PyEmbeddedImage(
-            b"iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAQAAADZc7J/AAAB8klEQVRIx2NgAIJQiZDbIbdD"
-            b"JRjIBSFBIf9D/oeGkG9AKNiAcIRIgECoQahTiH+weZAkAyNJBgTJhDSFnAz5AxKBwtfBc4K9"
-            b"GpiIMCBSPGRqyA8krcjwfKgrAQNC6kOegel/ocdD6kM9goyCVUNsQ+JCFoe8gxoy15MdnwEQ"
-            b"Z28MMkKX92QPLgx5A5Y9HCiM24D/IV+D43G5MlIkZD9Yzf40VgzJ0BCQVPC/4LOhRaGKuIxI"
-            b"Yw1ZDjZiCoZUhCzcl6DAPBtSE6yNzYgEDmD8AMMo2BzTDaLBGSG7Qn4hjAmeg82IUBWwml04"
-            b"HBklGBIXuj7kG9iAO9jVBM8Ey2rgSRWx3KEhwROCrLHLBuqDXVhCdrJnYAx5iscTROWczUAD"
-            b"blBgQPB8oAHvKHHBXFCSo8SAPUADrpOtvYEp5Dkwse0g335bcDSWkR+Ei8CJWYlM7UGmIX+B"
-            b"BuwlU3uAQMhVULkRaoAtm1SH7A81w6c9lDNkL9j/k7AHzieg1I+QRJx+Vw29AM7su7EUKGAF"
-            b"MdDidA9mbgeWRm0hn8Haj4fy444gq5AX0NLgakhnSHSIbahlsC+wNNwGyeDATDwtlA1vIIUK"
-            b"hXSHfMdRrJ8OcSMuomRCS0OOgiMLBp+FzA72IqJ+QnELT6hWsHuoX6hZqDSJWukOAGS+H1zu"
-            b"ajCnAAAAAElFTkSuQmCC"
-        ).GetBitmap()
+        rot_left_bitmap = get_bitmap(ROTATE_LEFT_IMAGE)
         rot_left_button = wx.BitmapButton(self, bitmap=rot_left_bitmap)
         rot_left_button.Bind(
             wx.EVT_BUTTON,
             lambda event: rotate_callback(event, RotateDirection.COUNTERCLOCKWISE),
         )
 
-        rot_right_bitmap = PyEmbeddedImage(
-            b"iVBORw0KGgoAAAANSUhEUgAAACAAAAAgCAQAAADZc7J/AAAB4UlEQVRIx2NgIANEiofcCL4W"
-            b"KspALggNCfkPhEGEVTIGSQabh/iHOoUaBAggGRAONiAUj84GplDvkLkhr8EKIfBPyMngxiAZ"
-            b"ogwIdg+9gKQVGf4ImRIpjtcAT/aQBVDF74IXhcSF2AarBhmFeoQ0hB4P+QcWfxpah9OAQOGQ"
-            b"o2DJ1yEFoWzoskFGIRuh3sFuQBpr6EGw1P5AYZzeiw/5CnUhpgEh08ESy9NYcWmPUAguDDkT"
-            b"DPZKaAi6A03BfjwTyok17rVCq0PPIgXnuwhZdPv3gkI5SB6bdmCUIrT+CtkVnBEohu43bbBk"
-            b"Pw6f3wfLfgvZEBIXKoRVSUgZSEmwKnYDQmxDJoaGxHLjSXtgD9xiIB+E3AIasIwSAz4APTCB"
-            b"EgNAyaOPEgNuAA1YRYkBu4AGXKfEgCpQNIZrkm1AsCo4qVAUCgeABvwMVSG/qDQO+QvMY0cS"
-            b"OMj3xjSwN1Y5sOC1yAzo1irsUmzgBP0/5ECQJJ4C5TtQxXsc0gECISfARrwKKcHMOkBP7oQW"
-            b"rdE4HejJHjwTmu/fhiwPTQ5xCNUNMg0OCGkOOQ8Vfx5qSSg+PFHKHmT4PbgrSpCY8GQM9Q6e"
-            b"E/IcSevfkKOhpZCKhWgArJ+kQ81C/ULcQrXwFiYDCgCpIh3sXAryzgAAAABJRU5ErkJggg=="
-        ).GetBitmap()
+        rot_right_bitmap = get_bitmap(ROTATE_RIGHT_IMAGE)
         rot_right_button = wx.BitmapButton(self, bitmap=rot_right_bitmap)
         rot_right_button.Bind(
             wx.EVT_BUTTON,
@@ -311,6 +326,123 @@ class RotateDialog(wx.Dialog):
         self.SetSizerAndFit(box)
 
 
+class PatternPalette(wx.Frame):
+    """Non-modal editor of 'Repeat Last' settings, created once per session.
+
+    The palette does not modify the board, `save_callback` is called when
+    settings are saved. Closing the palette only hides it.
+    Track width of 0 means netclass track width.
+    """
+
+    def __init__(
+        self: PatternPalette,
+        parent: wx.Window,
+        save_callback: Callable[[], None],
+        units_label: str = "mm",
+    ) -> None:
+        super().__init__(
+            parent,
+            -1,
+            "Via Patterns",
+            style=wx.CAPTION
+            | wx.CLOSE_BOX
+            | wx.FRAME_TOOL_WINDOW
+            | wx.FRAME_FLOAT_ON_PARENT,
+        )
+        self.save_callback = save_callback
+        self.panel = wx.Panel(self)
+
+        choices = [
+            Pattern.PERPENDICULAR.value,
+            Pattern.DIAGONAL.value,
+            Pattern.STAGGER.value,
+            Pattern.AUTO.value,
+        ]
+        pattern_ctrl = LabeledDropdownCtrl(self.panel, "Type:", choices)
+        size_ctrl = LabeledTextCtrl(
+            self.panel, "Size:", value=str(5), width=5, validator=IntValidator()
+        )
+        track_width_ctrl = LabeledTextCtrl(
+            self.panel, "Track width:", value="0", validator=FloatValidator()
+        )
+        self.__units_label = wx.StaticText(self.panel, -1, units_label)
+        # choice index is number of clockwise 90 degree rotations
+        rotation_ctrl = LabeledDropdownCtrl(
+            self.panel,
+            "Rotation:",
+            [f"{i * 90}\N{DEGREE SIGN}" for i in range(4)],
+            style=wx.CB_READONLY,
+        )
+
+        save_button = wx.Button(self.panel, label="Save for Repeat Last")
+        save_button.Bind(wx.EVT_BUTTON, self.on_save)
+
+        row1 = wx.BoxSizer(wx.HORIZONTAL)
+        row1.Add(pattern_ctrl, 0, wx.EXPAND | wx.ALL, 5)
+        row1.Add(size_ctrl, 0, wx.LEFT | wx.RIGHT | wx.ALIGN_CENTER_VERTICAL, 5)
+
+        row2 = wx.BoxSizer(wx.HORIZONTAL)
+        row2.Add(track_width_ctrl, 0, wx.EXPAND | wx.ALL, 5)
+        row2.Add(self.__units_label, 0, wx.LEFT | wx.ALIGN_CENTER_VERTICAL, 5)
+
+        row3 = wx.BoxSizer(wx.HORIZONTAL)
+        row3.Add(rotation_ctrl, 0, wx.EXPAND | wx.ALL, 5)
+        row3.Add(save_button, 1, wx.EXPAND | wx.ALL, 5)
+
+        box = wx.BoxSizer(wx.VERTICAL)
+        box.Add(row1, 0, wx.EXPAND | wx.ALL, 5)
+        box.Add(row2, 0, wx.EXPAND | wx.ALL, 5)
+        box.Add(row3, 0, wx.EXPAND | wx.ALL, 5)
+        self.panel.SetSizer(box)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.panel, 1, wx.EXPAND)
+        self.SetSizerAndFit(sizer)
+
+        self.__number_of_vias = size_ctrl.text
+        self.__pattern_type = pattern_ctrl.dropdown
+        self.__track_width = track_width_ctrl.text
+        self.__rotation = rotation_ctrl.dropdown
+
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+
+    def on_save(self, _: wx.CommandEvent) -> None:
+        if self.panel.Validate():
+            self.save_callback()
+
+    def on_close(self, event: wx.CloseEvent) -> None:
+        if event.CanVeto():
+            event.Veto()
+            self.Hide()
+        else:
+            event.Skip()
+
+    def set_units_label(self, label: str) -> None:
+        if self.__units_label.GetLabel() != label:
+            self.__units_label.SetLabel(label)
+            self.Layout()
+
+    def set_settings(
+        self, pattern: Pattern, count: int, track_width: str, rotation: int
+    ) -> None:
+        self.__pattern_type.SetValue(pattern.value)
+        self.__number_of_vias.SetValue(str(count))
+        self.__track_width.SetValue(track_width)
+        self.__rotation.SetSelection(rotation % 4)
+
+    def get_number_of_vias(self) -> int:
+        return int(self.__number_of_vias.GetValue())
+
+    def get_pattern_type(self) -> Pattern:
+        return Pattern(self.__pattern_type.GetValue())
+
+    def get_track_width(self) -> str:
+        return self.__track_width.GetValue()
+
+    def get_rotation(self) -> int:
+        return self.__rotation.GetSelection()
+
+
 # used for tests
 if __name__ == "__main__":
     import threading
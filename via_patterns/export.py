@@ -0,0 +1,229 @@
+"""Export of via data to CSV, NumPy (`.npy`) and Arrow files.
+
+Vias are collected into preallocated columns of 64-bit integers which
+support buffer protocol, so writers (and consumers like `numpy.frombuffer`)
+use column memory directly without converting items one by one.
+Does not require pcbnew, boards can be read directly from `.kicad_pcb` file.
+"""
+
+from __future__ import annotations
+
+import ast
+import csv
+import os
+import re
+import sys
+from array import array
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from .geometry import PATTERN_GROUP_PREFIX
+from .sexpr import UUID_RE, _iter_blocks, _parse_via, read_board_header
+
+FIELDS = ("x", "y", "width", "drill", "top_layer", "bottom_layer", "net", "pattern")
+# number of rows added at once when table runs out of preallocated space
+CHUNK_SIZE = 4096
+
+GROUP_NAME_RE = re.compile(r'\(group\s+"((?:[^"\\]|\\.)*)"')
+MEMBERS_RE = re.compile(r"\(members\s+([^)]*)\)")
+MEMBER_RE = re.compile(r'"?([0-9a-fA-F-]{36})"?')
+INNER_LAYER_RE = re.compile(r"^In(\d+)\.Cu$")
+
+
+class ViaTable:
+    """Via data stored in columns, one int64 array per field.
+
+    Positions and sizes are in nm, layers are KiCad layer ids, `pattern` is
+    index in `pattern_names` or -1 when via does not belong to any pattern.
+    """
+
+    def __init__(self, capacity: int = 0) -> None:
+        self._size = 0
+        self._columns = {name: array("q", bytes(8 * capacity)) for name in FIELDS}
+        self.net_names: Dict[int, str] = {}
+        self.pattern_names: List[str] = []
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return len(self._columns["x"])
+
+    def append(
+        self,
+        x: int,
+        y: int,
+        width: int,
+        drill: int,
+        top_layer: int,
+        bottom_layer: int,
+        net: int,
+        pattern: int = -1,
+    ) -> None:
+        if self._size == self.capacity:
+            grown: List[array] = []
+            try:
+                for column in self._columns.values():
+                    column.frombytes(bytes(8 * CHUNK_SIZE))
+                    grown.append(column)
+            except BufferError:
+                # column with alive view can't be resized, keep all columns
+                # of the same length
+                for column in grown:
+                    del column[self._size :]
+                raise
+        values = (x, y, width, drill, top_layer, bottom_layer, net, pattern)
+        for column, value in zip(self._columns.values(), values):
+            column[self._size] = value
+        self._size += 1
+
+    def column(self, name: str) -> memoryview:
+        """Get read-only view of column data.
+
+        Views must be released (e.g. with `release()`) before `append` which
+        grows the table, otherwise it raises `BufferError`.
+        """
+        return memoryview(self._columns[name])[: self._size].toreadonly()
+
+    def columns(self) -> Dict[str, memoryview]:
+        return {name: self.column(name) for name in FIELDS}
+
+    def rows(self) -> Iterator[Tuple[int, ...]]:
+        return zip(*self.columns().values())
+
+
+def _layer_id(name: str) -> int:
+    # copper layer ids of KiCad 7 and 8
+    if name == "F.Cu":
+        return 0
+    if name == "B.Cu":
+        return 31
+    match = INNER_LAYER_RE.match(name)
+    if not match:
+        msg = f"'{name}' is not a copper layer"
+        raise ValueError(msg)
+    return int(match.group(1))
+
+
+def read_board_vias(pcb_path: Union[str, os.PathLike]) -> ViaTable:
+    """Read all vias of board file without loading it with pcbnew"""
+    header = read_board_header(pcb_path)
+    table = ViaTable()
+    table.net_names = {code: name for name, code in header.nets.items()}
+
+    via_uuids: List[str] = []
+    pattern_members: Dict[str, int] = {}
+    for keyword, text in _iter_blocks(pcb_path, ("via", "group")):
+        if keyword == "via":
+            via = _parse_via(text)
+            match = UUID_RE.search(text)
+            via_uuids.append(match.group(1) if match else "")
+            table.append(
+                via.position[0],
+                via.position[1],
+                via.width,
+                via.drill,
+                _layer_id(via.layers[0]),
+                _layer_id(via.layers[1]),
+                via.net,
+            )
+        else:
+            name = GROUP_NAME_RE.search(text)
+            members = MEMBERS_RE.search(text)
+            if name and members and name.group(1).startswith(PATTERN_GROUP_PREFIX):
+                for member in MEMBER_RE.findall(members.group(1)):
+                    pattern_members[member] = len(table.pattern_names)
+                table.pattern_names.append(name.group(1))
+
+    if pattern_members:
+        patterns = table._columns["pattern"]
+        for i, via_uuid in enumerate(via_uuids):
+            patterns[i] = pattern_members.get(via_uuid, -1)
+    return table
+
+
+def write_csv(table: ViaTable, path: Union[str, os.PathLike]) -> None:
+    """Write table with additional net and pattern name columns"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([*FIELDS, "net_name", "pattern_name"])
+        for row in table.rows():
+            net, pattern = row[-2], row[-1]
+            writer.writerow(
+                [
+                    *row,
+                    table.net_names.get(net, ""),
+                    table.pattern_names[pattern] if pattern >= 0 else "",
+                ]
+            )
+
+
+def write_npy(table: ViaTable, path: Union[str, os.PathLike]) -> None:
+    """Write table as (rows, fields) int64 array in NumPy file format.
+
+    Array is stored in column-major order, so columns are written one after
+    another straight from their buffers.
+    """
+    endianness = "<" if sys.byteorder == "little" else ">"
+    header = repr(
+        {
+            "descr": f"{endianness}i8",
+            "fortran_order": True,
+            "shape": (len(table), len(FIELDS)),
+        }
+    )
+    # magic (6), version (2), header length (2), header must end with newline
+    # and whole preamble must be aligned to 64 bytes
+    padding = 64 - (10 + len(header) + 1) % 64
+    header = header + " " * padding + "\n"
+    with open(path, "wb") as f:
+        f.write(b"\x93NUMPY\x01\x00")
+        f.write(len(header).to_bytes(2, "little"))
+        f.write(header.encode("latin1"))
+        for column in table.columns().values():
+            f.write(column)
+
+
+def read_npy_header(path: Union[str, os.PathLike]) -> dict:
+    """Read header of file written by `write_npy`"""
+    with open(path, "rb") as f:
+        if f.read(8) != b"\x93NUMPY\x01\x00":
+            msg = f"'{path}' is not a NumPy file"
+            raise ValueError(msg)
+        length = int.from_bytes(f.read(2), "little")
+        return ast.literal_eval(f.read(length).decode("latin1"))
+
+
+def write_arrow(table: ViaTable, path: Union[str, os.PathLike]) -> None:
+    """Write table in Arrow IPC file format, requires `pyarrow`"""
+    import pyarrow as pa
+
+    arrays = [
+        pa.Array.from_buffers(pa.int64(), len(table), [None, pa.py_buffer(column)])
+        for column in table.columns().values()
+    ]
+    arrow_table = pa.table(arrays, names=list(FIELDS))
+    with pa.OSFile(os.fspath(path), "wb") as sink:
+        with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+
+
+WRITERS: Dict[str, Callable[[ViaTable, Union[str, os.PathLike]], None]] = {
+    "csv": write_csv,
+    "npy": write_npy,
+    "arrow": write_arrow,
+}
+
+
+def write_via_table(
+    table: ViaTable, path: Union[str, os.PathLike], fmt: Optional[str] = None
+) -> None:
+    """Write table in format `fmt`, by default guessed from file extension"""
+    if fmt is None:
+        fmt = os.path.splitext(path)[1].lstrip(".").lower()
+    try:
+        writer = WRITERS[fmt]
+    except KeyError:
+        msg = f"Unsupported export format '{fmt}'"
+        raise ValueError(msg) from None
+    writer(table, path)
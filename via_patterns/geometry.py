@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import logging
+import math
+from enum import Enum, auto
+from itertools import accumulate
+from typing import List, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+SQRT2 = math.sqrt(2)
+SQRT3 = math.sqrt(3)
+
+Position = Tuple[int, int]
+# translation (dx, dy) or translation and rotation (dx, dy, degrees)
+Transform = Union[Tuple[int, int], Tuple[int, int, float]]
+
+# name prefix of groups created by `add_via_pattern`
+PATTERN_GROUP_PREFIX = "ViaPattern:"
+
+
+class Pattern(str, Enum):
+    PERPENDICULAR = "Perpendicular"
+    DIAGONAL = "Diagonal"
+    STAGGER = "Stagger"
+    # resolved to the shortest of above patterns by `solver.shortest_pattern`
+    AUTO = "Auto"
+    # circular patterns, single ring and concentric rings, see `add_via_ring`
+    RING = "Ring"
+    RADIAL = "Radial"
+
+    @classmethod
+    def get(cls, name: str) -> Pattern:
+        if isinstance(name, str):
+            try:
+                return Pattern(name.title())
+            except ValueError:
+                # fallback to error below to use 'name' before converting to titlecase
+                pass
+        msg = f"'{name}' is not a valid Pattern"
+        raise ValueError(msg)
+
+
+class Direction(int, Enum):
+    HORIZONTAL = auto()
+    VERTICAL = auto()
+
+
+class RotateDirection(int, Enum):
+    CLOCKWISE = 1
+    COUNTERCLOCKWISE = -1
+
+
+def effective_pattern(pattern: Pattern, via_width: int, track_width: int) -> Pattern:
+    if pattern in [Pattern.STAGGER, Pattern.DIAGONAL] and track_width > via_width:
+        logger.debug(
+            "The '%s' pattern when `track_width` > `via_width` makes no sense, "
+            "replacing with '%s' pattern",
+            pattern,
+            Pattern.PERPENDICULAR,
+        )
+        return Pattern.PERPENDICULAR
+    return pattern
+
+
+def diagonal_track_ignored(
+    via_width: int, via_clearance: int, track_width: int
+) -> bool:
+    """Check if track fits between diagonally placed vias"""
+    return track_width <= 2 * int(
+        ((via_width + via_clearance) / SQRT2) - via_clearance - via_width / 2
+    )
+
+
+def get_pattern_offsets(
+    pattern: Pattern,
+    via_width: int,
+    via_clearance: int,
+    track_width: int,
+    extra_space: int = 0,
+) -> Tuple[int, int]:
+    """Get offsets between consecutive vias of horizontal pattern.
+
+    For STAGGER pattern, `offset_x` is distance between vias in the same row
+    and `offset_y` is distance between rows.
+    """
+    if pattern == Pattern.PERPENDICULAR:
+        offset_x = via_clearance + max(via_width, track_width) + extra_space
+        offset_y = 0
+    elif pattern == Pattern.DIAGONAL:
+        if not diagonal_track_ignored(via_width, via_clearance, track_width):
+            # track too wide to be ignored in DIAGONAL pattern
+            offset_x = int(via_width / 2) + via_clearance + int(track_width / 2)
+        else:
+            logger.debug("Track width small enough to be ignored")
+            offset_x = via_clearance + max(via_width, track_width) + extra_space
+            offset_x = int(offset_x / SQRT2)
+        offset_y = offset_x
+    else:  # Pattern.STAGGER
+        offset_x = (
+            2 * via_clearance + max(via_width, track_width) + track_width + extra_space
+        )
+        r = via_width // 2
+        offset_y = int(
+            math.sqrt(
+                (3 * r * r)
+                + (2 * r * via_clearance)
+                - (r * track_width)
+                - (via_clearance * track_width)
+                - (track_width * track_width) / 4
+            )
+        )
+    return offset_x, offset_y
+
+
+def get_pattern_positions(
+    pattern: Pattern,
+    count: int,
+    offset_x: int,
+    offset_y: int,
+    direction: Direction = Direction.HORIZONTAL,
+) -> List[Position]:
+    """Get positions of pattern vias relative to the first one"""
+    # used for STAGGER pattern:
+    zigzag = [(0.5, 1), (0.5, -1)]
+
+    if direction == Direction.VERTICAL:
+        offset_x, offset_y = offset_y, offset_x
+        zigzag = [(1, 0.5), (-1, 0.5)]
+
+    logger.debug("offsets: x: %s y: %s", offset_x, offset_y)
+
+    x, y = 0, 0
+    positions = [(x, y)]
+    for i in range(0, count - 1):
+        if pattern == Pattern.STAGGER:
+            coeffs = zigzag[i % 2]
+            x += int(offset_x * coeffs[0])
+            y += int(offset_y * coeffs[1])
+        else:
+            x += offset_x
+            y += offset_y
+        positions.append((x, y))
+    return positions
+
+
+def get_sequence_positions(
+    widths: Sequence[int],
+    clearances: Sequence[int],
+    track_width: int,
+    extra_space: int = 0,
+    direction: Direction = Direction.HORIZONTAL,
+) -> List[Position]:
+    """Get positions of in-line vias of different sizes relative to the first one.
+
+    Pitch of each neighbouring pair is computed like for PERPENDICULAR
+    pattern using mean width and larger clearance of the pair.
+    """
+    if len(widths) != len(clearances):
+        msg = "The `widths` and `clearances` must have equal length"
+        raise ValueError(msg)
+
+    pitches = [
+        max(ca, cb) + max((wa + wb) // 2, track_width) + extra_space
+        for wa, wb, ca, cb in zip(widths, widths[1:], clearances, clearances[1:])
+    ]
+    distances = [0, *accumulate(pitches)]
+    if direction == Direction.VERTICAL:
+        return [(0, d) for d in distances]
+    return [(d, 0) for d in distances]
+
+
+def ring_via_count(radius: int, pitch: int) -> int:
+    """Get maximum number of vias on a circle with chord of at least `pitch`"""
+    if 2 * radius < pitch or radius == 0:
+        return 1
+    return max(1, int(math.pi / math.asin(pitch / (2 * radius))))
+
+
+def get_ring_positions(radius: int, pitch: int, rings: int = 1) -> List[Position]:
+    """Get positions of vias on concentric rings relative to the center.
+
+    Consecutive rings are `pitch` apart and every other ring is rotated
+    by half of its angular step, so vias of neighbouring rings interleave.
+    """
+    positions: List[Position] = []
+    for ring in range(rings):
+        r = radius + ring * pitch
+        count = ring_via_count(r, pitch)
+        step = 2 * math.pi / count
+        start = step / 2 if ring % 2 else 0
+        angles = [start + i * step for i in range(count)]
+        positions.extend(
+            (round(r * math.cos(a)), round(r * math.sin(a))) for a in angles
+        )
+    return positions
+
+
+def _round_away(value: float) -> int:
+    # tiny tolerance keeps values like cos(pi/2) at 0
+    return int(math.copysign(math.ceil(abs(value) - 1e-9), value))
+
+
+def get_companion_offsets(pitch: int, count: int = 8) -> List[Position]:
+    """Get `count` candidate positions evenly spread around via.
+
+    Candidates start at positive x axis and are at least `pitch` away from
+    the via (coordinates are rounded away from zero).
+    """
+    if count < 1:
+        msg = "The `count` argument must be greater than 0"
+        raise ValueError(msg)
+    angles = [2 * math.pi * i / count for i in range(count)]
+    return [
+        (_round_away(pitch * math.cos(a)), _round_away(pitch * math.sin(a)))
+        for a in angles
+    ]
+
+
+def transform_positions(
+    positions: Sequence[Position],
+    transforms: Sequence[Transform],
+    origin: Position = (0, 0),
+) -> List[List[Position]]:
+    """Get `positions` of each instance defined by `transforms`.
+
+    Positions are first rotated around `origin` (counterclockwise as seen
+    on board, where y axis points down) and then translated.
+    """
+    ox, oy = origin
+    relative = [(x - ox, y - oy) for x, y in positions]
+    instances = []
+    for dx, dy, *rotation in transforms:
+        angle = math.radians(rotation[0]) if rotation else 0.0
+        cos, sin = math.cos(angle), math.sin(angle)
+        instances.append(
+            [
+                (
+                    round(ox + dx + x * cos + y * sin),
+                    round(oy + dy - x * sin + y * cos),
+                )
+                for x, y in relative
+            ]
+        )
+    return instances
@@ -0,0 +1,125 @@
+"""Read-only pattern planning which does not require pcbnew.
+
+Design rules are read from `.kicad_pro` project file, so geometry of many
+candidate patterns can be evaluated without loading the board.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass
+from typing import List, Tuple, Union
+
+from .geometry import (
+    Direction,
+    Pattern,
+    Position,
+    effective_pattern,
+    get_pattern_offsets,
+    get_pattern_positions,
+)
+from .project import load_project_rules, project_path
+from .solver import shortest_pattern
+
+BoundingBox = Tuple[int, int, int, int]
+
+
+@dataclass
+class PatternPlan:
+    pattern: Pattern
+    via_width: int
+    via_clearance: int
+    track_width: int
+    # offsets of horizontal pattern, as returned by `get_pattern_offsets`
+    offset_x: int
+    offset_y: int
+    positions: List[Position]
+
+    @property
+    def pitch(self) -> int:
+        """Distance between first two vias"""
+        if len(self.positions) < 2:
+            return 0
+        (x0, y0), (x1, y1) = self.positions[:2]
+        return int(math.hypot(x1 - x0, y1 - y0))
+
+    @property
+    def bbox(self) -> BoundingBox:
+        """Bounding box of vias copper in (xmin, ymin, xmax, ymax) format"""
+        r = self.via_width // 2
+        xs = [x for x, _ in self.positions]
+        ys = [y for _, y in self.positions]
+        return min(xs) - r, min(ys) - r, max(xs) + r, max(ys) + r
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        xmin, ymin, xmax, ymax = self.bbox
+        return xmax - xmin, ymax - ymin
+
+
+def plan_via_pattern(
+    project: Union[str, os.PathLike],
+    count: int,
+    pattern: Union[Pattern, str],
+    *,
+    start_position: Position = (0, 0),
+    direction: Direction = Direction.HORIZONTAL,
+    net: str = "",
+    via_width: int = 0,
+    track_width: int = 0,
+    extra_space: int = 0,
+) -> PatternPlan:
+    """Compute pattern geometry using netclass rules of `net`.
+
+    The `project` can be `.kicad_pro` or `.kicad_pcb` path, project file
+    is parsed once and cached until modified. The `via_width` and
+    `track_width` equal 0 means that netclass values are used.
+    """
+    if pattern not in [
+        Pattern.DIAGONAL,
+        Pattern.PERPENDICULAR,
+        Pattern.STAGGER,
+        Pattern.AUTO,
+    ]:
+        msg = "Unsupported pattern"
+        raise ValueError(msg)
+
+    if direction not in [Direction.HORIZONTAL, Direction.VERTICAL]:
+        msg = "Unsupported direction"
+        raise ValueError(msg)
+
+    if count < 1:
+        msg = "The `count` argument must be greater than 0"
+        raise ValueError(msg)
+
+    if via_width < 0 or track_width < 0 or extra_space < 0:
+        msg = "The `via_width`, `track_width` and `extra_space` must not be negative"
+        raise ValueError(msg)
+
+    netclass = load_project_rules(project_path(project)).get_netclass(net)
+    via_width = via_width or netclass.via_diameter
+    track_width = track_width or netclass.track_width
+
+    if pattern == Pattern.AUTO:
+        pattern = shortest_pattern(
+            count, via_width, netclass.clearance, track_width, extra_space=extra_space
+        ).pattern
+    pattern = effective_pattern(Pattern(pattern), via_width, track_width)
+    offset_x, offset_y = get_pattern_offsets(
+        pattern, via_width, netclass.clearance, track_width, extra_space
+    )
+    x0, y0 = start_position
+    positions = [
+        (x0 + x, y0 + y)
+        for x, y in get_pattern_positions(pattern, count, offset_x, offset_y, direction)
+    ]
+    return PatternPlan(
+        pattern=pattern,
+        via_width=via_width,
+        via_clearance=netclass.clearance,
+        track_width=track_width,
+        offset_x=offset_x,
+        offset_y=offset_y,
+        positions=positions,
+    )
@@ -1,16 +1,26 @@
 from __future__ import annotations
 
 import logging
+import logging.handlers
 import os
+import queue
 import sys
-from typing import List, cast
+from typing import Dict, List, Optional, Union, cast
 
 import pcbnew
 import wx
 
-from .dialog import MainDialog, RotateDialog, WindowState
+from .dialog import MainDialog, PatternPalette, RotateDialog, WindowState
+from .settings import (
+    SETTINGS_FILE_NAME,
+    LastPattern,
+    load_last_pattern,
+    save_last_pattern,
+)
 from .via_patterns import (
+    ClearanceResolver,
     RotateDirection,
+    add_fanout_vias,
     add_via_pattern,
     get_netclass,
     rotate_via_pattern,
@@ -18,29 +28,107 @@ from .via_patterns import (
 
 logger = logging.getLogger(__name__)
 
+# overrides default log level, for example VIA_PATTERNS_LOG_LEVEL=DEBUG
+LOG_LEVEL_ENV = "VIA_PATTERNS_LOG_LEVEL"
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+_log_listener: Optional[logging.handlers.QueueListener] = None
+_log_handler: Optional[logging.handlers.QueueHandler] = None
+
+# unit conversion context, does not change during session
+_iu_scale: Optional[pcbnew.EDA_IU_SCALE] = None
+_units_labels: Dict[int, str] = {}
+
+
+def setup_logging(
+    destination: str, level: Union[int, str, None] = None
+) -> logging.handlers.QueueListener:
+    """Log to rotated `plugin.log` file written by background thread.
+
+    The `level` defaults to `VIA_PATTERNS_LOG_LEVEL` environment variable
+    or INFO when not set or unknown.
+    """
+    shutdown_logging()
 
-def setup_logging(destination: str) -> None:
     # Remove all handlers associated with the root logger object.
     for handler in logging.root.handlers[:]:
         logging.root.removeHandler(handler)
 
-    # set up logger
-    logging.basicConfig(
-        level=logging.DEBUG,
-        filename=f"{destination}/plugin.log",
-        filemode="w",
-        format="%(asctime)s %(name)s %(lineno)d: %(message)s",
-        datefmt="%H:%M:%S",
+    if level is None:
+        level = os.environ.get(LOG_LEVEL_ENV, "INFO")
+    invalid_level = None
+    if isinstance(level, str):
+        # returns level number for known names and 'Level <name>' otherwise
+        number = logging.getLevelName(level.upper())
+        if not isinstance(number, int):
+            invalid_level, number = level, logging.INFO
+        level = number
+
+    file_handler = logging.handlers.RotatingFileHandler(
+        f"{destination}/plugin.log",
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    file_handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s %(name)s %(lineno)d: %(message)s", datefmt="%H:%M:%S"
+        )
     )
 
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    global _log_handler, _log_listener
+    _log_handler = logging.handlers.QueueHandler(log_queue)
+    logging.root.addHandler(_log_handler)
+    logging.root.setLevel(level)
+
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler)
+    _log_listener.start()
+    if invalid_level is not None:
+        logger.warning("Unknown log level '%s', using INFO", invalid_level)
+    return _log_listener
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop background logging thread"""
+    global _log_handler, _log_listener
+    # without listener nothing would read records from the queue
+    if _log_handler is not None:
+        logging.root.removeHandler(_log_handler)
+        _log_handler = None
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            handler.close()
+        _log_listener = None
+
+
+def get_settings_path() -> str:
+    settings_dir = pcbnew.SETTINGS_MANAGER.GetUserSettingsPath()
+    return os.path.join(settings_dir, SETTINGS_FILE_NAME)
+
+
+def get_iu_scale() -> pcbnew.EDA_IU_SCALE:
+    global _iu_scale
+    if _iu_scale is None:
+        _iu_scale = pcbnew.EDA_IU_SCALE(pcbnew.PCB_IU_PER_MM)
+    return _iu_scale
+
+
+def get_units_label(user_units: int) -> str:
+    if user_units not in _units_labels:
+        _units_labels[user_units] = pcbnew.GetLabel(user_units)
+    return _units_labels[user_units]
+
 
 def get_kicad_version() -> str:
     version = pcbnew.Version()
     if int(version.split(".")[0]) < 7:
         msg = f"KiCad version {version} is not supported"
         raise Exception(msg)
-    logger.info(f"Plugin executed with KiCad version: {version}")
-    logger.info(f"Plugin executed with python version: {repr(sys.version)}")
+    logger.info("Plugin executed with KiCad version: %s", version)
+    logger.info("Plugin executed with python version: %r", sys.version)
     return version
 
 
@@ -65,18 +153,35 @@ class PluginAction(pcbnew.ActionPlugin):
         _ = get_kicad_version()
 
     def Run(self) -> None:
-        self.Initialize()
+        try:
+            self.Initialize()
+            self.run()
+        finally:
+            shutdown_logging()
 
+    def run(self) -> None:
         board = pcbnew.GetBoard()
 
         selected_items = get_selected_board_items()
         selected_vias = list(
             filter(lambda i: isinstance(i, pcbnew.PCB_VIA), selected_items)
         )
+        selected_footprints = list(
+            filter(lambda i: isinstance(i, pcbnew.FOOTPRINT), selected_items)
+        )
+
+        if len(selected_vias) == 0 and len(selected_footprints) == 1:
+            footprint = pcbnew.Cast_to_FOOTPRINT(selected_footprints[0])
+            footprint.ClearSelected()
+            fanout_vias = add_fanout_vias(board, footprint, select=True)
+            logger.info("Added %s fanout vias", len(fanout_vias))
+            pcbnew.Refresh()
+            return
 
         if len(selected_vias) != 1:
             msg = (
-                "Plugin must be run with selection containing exectly one via. "
+                "Plugin must be run with selection containing exectly one via "
+                "or exactly one footprint. "
                 f"Current selection contains {len(selected_items)} items "
                 f"and {len(selected_vias)} vias. "
                 "Please re-run plugin with proper selection."
@@ -85,14 +190,14 @@ class PluginAction(pcbnew.ActionPlugin):
 
         selected_via = pcbnew.Cast_to_PCB_VIA(selected_vias[0])
 
-        iu_scale = pcbnew.EDA_IU_SCALE(pcbnew.PCB_IU_PER_MM)
+        iu_scale = get_iu_scale()
         user_units = pcbnew.GetUserUnits()
-        units_label: str = pcbnew.GetLabel(user_units)
+        units_label = get_units_label(user_units)
 
         via_netclass = get_netclass(board, selected_via)
         track_width = via_netclass.GetTrackWidth()
         logger.debug(
-            f"via_netclass: {via_netclass.GetName()} track_width: {track_width}"
+            "via_netclass: %s track_width: %s", via_netclass.GetName(), track_width
         )
 
         state = WindowState(
@@ -101,31 +206,159 @@ class PluginAction(pcbnew.ActionPlugin):
         )
 
         added_vias = None
+        last = None
         dlg = MainDialog(self.window, state)
         if dlg.ShowModal() == wx.ID_OK:
-            added_vias = add_via_pattern(
-                board,
-                dlg.get_number_of_vias(),
-                dlg.get_pattern_type(),
-                select=True,
-                via=selected_via,
+            last = LastPattern(
+                pattern=dlg.get_pattern_type(),
+                count=dlg.get_number_of_vias(),
                 track_width=cast(
                     int,
                     pcbnew.ValueFromString(iu_scale, user_units, dlg.get_track_width()),
                 ),
             )
+            added_vias = add_via_pattern(
+                board,
+                last.count,
+                last.pattern,
+                select=True,
+                via=selected_via,
+                track_width=last.track_width,
+            )
 
         dlg.Destroy()
 
-        if added_vias:
+        if added_vias and last:
             pcbnew.Refresh()
 
             def rotate_callback(_, direction: RotateDirection) -> None:
                 rotate_via_pattern(added_vias, direction)
+                last.rotation = (last.rotation + direction) % 4
                 pcbnew.Refresh()
 
             dlg = RotateDialog(self.window, rotate_callback)
             dlg.ShowModal()
             dlg.Destroy()
 
-        logging.shutdown()
+            save_last_pattern(get_settings_path(), last)
+
+
+class RepeatPluginAction(pcbnew.ActionPlugin):
+    """Applies last used pattern to each selected via without any dialogs"""
+
+    def defaults(self) -> None:
+        self.name = "Via Patterns: Repeat Last"
+        self.category = "Modify PCB"
+        self.description = "Add vias using last used pattern settings"
+        self.show_toolbar_button = True
+        self.icon_file_name = os.path.join(os.path.dirname(__file__), "icon.png")
+
+    def Run(self) -> None:
+        try:
+            setup_logging(os.path.dirname(__file__))
+            self.repeat()
+        finally:
+            shutdown_logging()
+
+    def repeat(self) -> None:
+        last = load_last_pattern(get_settings_path())
+        if last is None:
+            msg = (
+                "There is no pattern to repeat, use 'Via Patterns' action "
+                "or save pattern in 'Via Patterns: Palette' first"
+            )
+            raise Exception(msg)
+        logger.info("Repeating pattern: %s", last)
+
+        board = pcbnew.GetBoard()
+        selected_vias = [
+            pcbnew.Cast_to_PCB_VIA(i)
+            for i in get_selected_board_items()
+            if isinstance(i, pcbnew.PCB_VIA)
+        ]
+        # clearance and netclass lookups are shared by all selected vias
+        resolver = ClearanceResolver(board)
+        for via in selected_vias:
+            via.ClearSelected()
+            vias = add_via_pattern(
+                board,
+                last.count,
+                last.pattern,
+                select=True,
+                via=via,
+                track_width=last.track_width,
+                clearance_resolver=resolver,
+            )
+            for _ in range(last.rotation):
+                rotate_via_pattern(vias, RotateDirection.CLOCKWISE)
+
+        if selected_vias:
+            pcbnew.Refresh()
+
+
+class PalettePluginAction(pcbnew.ActionPlugin):
+    """Shows non-modal palette with settings of 'Repeat Last' action.
+
+    The palette never modifies the board, patterns are added by running
+    'Repeat Last' action, so KiCad records them for undo.
+    """
+
+    # palette window is created once and reused by subsequent runs
+    palette: Optional[PatternPalette] = None
+
+    def defaults(self) -> None:
+        self.name = "Via Patterns: Palette"
+        self.category = "Modify PCB"
+        self.description = "Show palette with settings of 'Repeat Last' action"
+        self.show_toolbar_button = True
+        self.icon_file_name = os.path.join(os.path.dirname(__file__), "icon.png")
+
+    def Run(self) -> None:
+        try:
+            setup_logging(os.path.dirname(__file__))
+            _ = get_kicad_version()
+            self.show()
+        finally:
+            shutdown_logging()
+
+    def show(self) -> None:
+        user_units = pcbnew.GetUserUnits()
+        palette = PalettePluginAction.palette
+        if palette is None:
+            palette = PatternPalette(wx.GetActiveWindow(), self.on_save)
+            last = load_last_pattern(get_settings_path())
+            if last is not None:
+                palette.set_settings(
+                    last.pattern,
+                    last.count,
+                    pcbnew.StringFromValue(
+                        get_iu_scale(), user_units, last.track_width
+                    ),
+                    last.rotation,
+                )
+            PalettePluginAction.palette = palette
+        palette.set_units_label(get_units_label(user_units))
+        palette.Show()
+        palette.Raise()
+
+    def on_save(self) -> None:
+        palette = cast(PatternPalette, PalettePluginAction.palette)
+        user_units = pcbnew.GetUserUnits()
+        palette.set_units_label(get_units_label(user_units))
+        last = LastPattern(
+            pattern=palette.get_pattern_type(),
+            count=palette.get_number_of_vias(),
+            track_width=cast(
+                int,
+                pcbnew.ValueFromString(
+                    get_iu_scale(), user_units, palette.get_track_width()
+                ),
+            ),
+            rotation=palette.get_rotation(),
+        )
+        try:
+            save_last_pattern(get_settings_path(), last)
+        except OSError as e:
+            wx.MessageBox(f"Failed to save settings: {e}", "Error")
+            return
+        logger.info("Saved pattern for 'Repeat Last': %s", last)
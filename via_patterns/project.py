@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import fnmatch
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NETCLASS = "Default"
+
+NET_RANGE_RE = re.compile(r"^(.*)\[(\d+)\.\.(\d+)\](.*)$")
+
+
+def mm_to_iu(value: float) -> int:
+    return int(round(value * 1e6))
+
+
+def expand_net_range(expression: str) -> List[str]:
+    """Expand bus-like net range, for example `D[0..3]` to `D0`, `D1`, `D2`, `D3`.
+
+    Descending ranges (`D[3..0]`) are supported as well.
+    """
+    match = NET_RANGE_RE.match(expression)
+    if not match:
+        msg = f"'{expression}' is not a valid net range"
+        raise ValueError(msg)
+    prefix, start, end, suffix = match.groups()
+    first, last = int(start), int(end)
+    step = 1 if last >= first else -1
+    return [f"{prefix}{i}{suffix}" for i in range(first, last + step, step)]
+
+
+@dataclass(frozen=True)
+class NetclassRules:
+    """Netclass values used for pattern calculation, in internal units (nm)"""
+
+    name: str = DEFAULT_NETCLASS
+    clearance: int = 200000
+    track_width: int = 200000
+    via_diameter: int = 600000
+    via_drill: int = 300000
+
+
+@dataclass
+class ProjectRules:
+    netclasses: Dict[str, NetclassRules]
+    # exact net name assignments (KiCad 7) and wildcard patterns (KiCad 8)
+    assignments: Dict[str, str]
+    patterns: List[Tuple[str, str]]
+
+    def get_netclass(self, net_name: str = "") -> NetclassRules:
+        name = self.assignments.get(net_name)
+        if name is None and net_name:
+            name = next(
+                (c for p, c in self.patterns if fnmatch.fnmatchcase(net_name, p)),
+                None,
+            )
+        if name is None or name not in self.netclasses:
+            name = DEFAULT_NETCLASS
+        return self.netclasses.get(name, NetclassRules())
+
+
+def _iu_value(data: dict, key: str, default: int) -> int:
+    value = data.get(key)
+    return mm_to_iu(value) if value is not None else default
+
+
+def parse_project_rules(data: dict) -> ProjectRules:
+    net_settings = data.get("net_settings", {})
+    defaults = NetclassRules()
+    netclasses = {}
+    for c in net_settings.get("classes", []):
+        name = c.get("name", DEFAULT_NETCLASS)
+        netclasses[name] = NetclassRules(
+            name=name,
+            clearance=_iu_value(c, "clearance", defaults.clearance),
+            track_width=_iu_value(c, "track_width", defaults.track_width),
+            via_diameter=_iu_value(c, "via_diameter", defaults.via_diameter),
+            via_drill=_iu_value(c, "via_drill", defaults.via_drill),
+        )
+    assignments = net_settings.get("netclass_assignments") or {}
+    patterns = [
+        (p["pattern"], p["netclass"])
+        for p in net_settings.get("netclass_patterns") or []
+        if "pattern" in p and "netclass" in p
+    ]
+    return ProjectRules(netclasses, dict(assignments), patterns)
+
+
+# parsed project files keyed by path, each entry holds file modification time
+_rules_cache: Dict[str, Tuple[int, ProjectRules]] = {}
+
+
+def load_project_rules(path: Union[str, os.PathLike]) -> ProjectRules:
+    """Read netclass rules from `.kicad_pro` file.
+
+    Parsed rules are cached until file modification time changes.
+    When project file does not exist, KiCad's default netclass is used.
+    """
+    path = os.path.abspath(path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        logger.debug("Project file '%s' not found, using defaults", path)
+        return ProjectRules({}, {}, [])
+
+    cached = _rules_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with open(path, encoding="utf-8") as f:
+        rules = parse_project_rules(json.load(f))
+    _rules_cache[path] = (mtime, rules)
+    return rules
+
+
+def project_path(pcb_path: Union[str, os.PathLike]) -> str:
+    return os.path.splitext(os.fspath(pcb_path))[0] + ".kicad_pro"
@@ -0,0 +1,124 @@
+"""Preview images of patterns rendered directly from computed geometry.
+
+Does not require pcbnew, the SVG viewBox is computed from via and track
+dimensions so no plotting or post-processing is needed.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, List, Optional, Sequence, Tuple
+
+from .geometry import Position
+from .plan import BoundingBox, PatternPlan
+
+VIA_COLOR = "#c83434"
+TRACK_COLOR = "#4d7fc4"
+CLEARANCE_COLOR = "#808080"
+DRILL_COLOR = "#ffffff"
+BACKGROUND_COLOR = "#001023"
+
+
+@dataclass
+class Track:
+    start: Position
+    end: Position
+    width: int
+
+
+def _mm(value: float) -> str:
+    # coordinates are in nm, SVG user unit is 1mm
+    return f"{value / 1e6:.4f}".rstrip("0").rstrip(".")
+
+
+def get_view_box(
+    positions: Sequence[Position],
+    via_width: int,
+    via_clearance: int = 0,
+    tracks: Sequence[Track] = (),
+    margin: int = 0,
+) -> BoundingBox:
+    """Bounding box in (xmin, ymin, xmax, ymax) format of rendered items"""
+    r = via_width // 2 + via_clearance + margin
+    boxes = [(x - r, y - r, x + r, y + r) for x, y in positions]
+    for t in tracks:
+        w = t.width // 2 + margin
+        for x, y in (t.start, t.end):
+            boxes.append((x - w, y - w, x + w, y + w))
+    if not boxes:
+        msg = "Nothing to render"
+        raise ValueError(msg)
+    xmins, ymins, xmaxs, ymaxs = zip(*boxes)
+    return min(xmins), min(ymins), max(xmaxs), max(ymaxs)
+
+
+def render_svg(
+    positions: Sequence[Position],
+    via_width: int,
+    via_clearance: int = 0,
+    *,
+    drill: int = 0,
+    tracks: Sequence[Track] = (),
+    margin: int = 100000,
+    background: Optional[str] = BACKGROUND_COLOR,
+) -> str:
+    """Render vias, their clearance outlines and tracks as SVG document"""
+    xmin, ymin, xmax, ymax = get_view_box(
+        positions, via_width, via_clearance, tracks, margin
+    )
+    width, height = xmax - xmin, ymax - ymin
+
+    elements: List[str] = []
+    if background:
+        elements.append(
+            f'<rect x="{_mm(xmin)}" y="{_mm(ymin)}" width="{_mm(width)}" '
+            f'height="{_mm(height)}" fill="{background}"/>'
+        )
+    for t in tracks:
+        (x1, y1), (x2, y2) = t.start, t.end
+        elements.append(
+            f'<line x1="{_mm(x1)}" y1="{_mm(y1)}" x2="{_mm(x2)}" y2="{_mm(y2)}" '
+            f'stroke="{TRACK_COLOR}" stroke-width="{_mm(t.width)}" '
+            'stroke-linecap="round"/>'
+        )
+    r = via_width / 2
+    for x, y in positions:
+        cx, cy = _mm(x), _mm(y)
+        if via_clearance:
+            elements.append(
+                f'<circle cx="{cx}" cy="{cy}" r="{_mm(r + via_clearance)}" '
+                f'fill="none" stroke="{CLEARANCE_COLOR}" stroke-width="0.01" '
+                'stroke-dasharray="0.05 0.05"/>'
+            )
+        elements.append(
+            f'<circle cx="{cx}" cy="{cy}" r="{_mm(r)}" fill="{VIA_COLOR}"/>'
+        )
+        if drill:
+            elements.append(
+                f'<circle cx="{cx}" cy="{cy}" r="{_mm(drill / 2)}" '
+                f'fill="{DRILL_COLOR}"/>'
+            )
+
+    header = (
+        '<svg xmlns="http://www.w3.org/2000/svg" '
+        f'width="{_mm(width)}mm" height="{_mm(height)}mm" '
+        f'viewBox="{_mm(xmin)} {_mm(ymin)} {_mm(width)} {_mm(height)}">'
+    )
+    return "\n".join([header, *elements, "</svg>"]) + "\n"
+
+
+def render_plan(plan: PatternPlan, **kwargs: Any) -> str:
+    """Render SVG of pattern computed by `plan.plan_via_pattern`"""
+    return render_svg(plan.positions, plan.via_width, plan.via_clearance, **kwargs)
+
+
+def render_png(svg: str, path: str, size: Tuple[int, int]) -> None:
+    """Rasterize SVG to PNG file, requires wxPython (available in KiCad)"""
+    import wx
+    import wx.svg
+
+    # bitmap operations require application object
+    _ = wx.App.Get() or wx.App()
+    image = wx.svg.SVGimage.CreateFromBytes(svg.encode())
+    bitmap = image.ConvertToScaledBitmap(wx.Size(*size))
+    bitmap.SaveFile(path, wx.BITMAP_TYPE_PNG)
@@ -0,0 +1,346 @@
+"""Long-lived pattern server keeping pcbnew and recently used boards loaded.
+
+Requests are JSON-RPC 2.0 objects, one per line, sent over local TCP socket.
+Boards are opened on first use and kept in LRU cache, modified boards are
+written to disk only by explicit `save` (or `close` with `save` flag) call.
+"""
+
+from __future__ import annotations
+
+import argparse
+import inspect
+import json
+import logging
+import os
+import socketserver
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional
+
+import pcbnew
+
+from .plan import plan_via_pattern
+from .via_patterns import (
+    Direction,
+    Pattern,
+    RotateDirection,
+    add_via_pattern,
+    compact_vias,
+    rotate_via_pattern,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 5719
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_ERROR = -32000
+
+
+class BoardCacheFull(Exception):
+    pass
+
+
+class _OpenBoard:
+    def __init__(self, board: pcbnew.BOARD) -> None:
+        self.board = board
+        self.dirty = False
+        # vias created or looked up by this server, keyed by uuid
+        self.vias: Dict[str, pcbnew.PCB_VIA] = {}
+
+    def find_via(self, via_uuid: str) -> pcbnew.PCB_VIA:
+        if via_uuid not in self.vias:
+            for item in self.board.GetTracks():
+                if item.Type() == pcbnew.PCB_VIA_T:
+                    self.vias[item.m_Uuid.AsString()] = item
+        try:
+            return self.vias[via_uuid]
+        except KeyError:
+            msg = f"Via '{via_uuid}' not found"
+            raise ValueError(msg) from None
+
+
+class BoardCache:
+    """LRU cache of loaded boards with limited number of entries"""
+
+    def __init__(self, max_boards: int = 4) -> None:
+        if max_boards < 1:
+            msg = "The `max_boards` argument must be greater than 0"
+            raise ValueError(msg)
+        self.max_boards = max_boards
+        self._boards: OrderedDict[str, _OpenBoard] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._boards)
+
+    def __contains__(self, path: str) -> bool:
+        return os.path.abspath(path) in self._boards
+
+    def get(self, path: str) -> _OpenBoard:
+        path = os.path.abspath(path)
+        if path in self._boards:
+            self._boards.move_to_end(path)
+            return self._boards[path]
+
+        if len(self._boards) >= self.max_boards:
+            self._evict()
+        logger.info("Loading board '%s'", path)
+        entry = _OpenBoard(pcbnew.LoadBoard(path))
+        self._boards[path] = entry
+        return entry
+
+    def _evict(self) -> None:
+        # unsaved boards are never dropped silently
+        for path, entry in self._boards.items():
+            if not entry.dirty:
+                logger.info("Evicting board '%s'", path)
+                del self._boards[path]
+                return
+        msg = "All cached boards have unsaved changes, save or close one of them"
+        raise BoardCacheFull(msg)
+
+    def save(self, path: str) -> None:
+        path = os.path.abspath(path)
+        entry = self._boards.get(path)
+        if entry is None:
+            msg = f"Board '{path}' is not opened"
+            raise ValueError(msg)
+        entry.board.Save(path)
+        entry.dirty = False
+
+    def close(self, path: str, *, save: bool = False) -> None:
+        path = os.path.abspath(path)
+        if path not in self._boards:
+            return
+        if save:
+            self.save(path)
+        del self._boards[path]
+
+    def paths(self) -> List[Dict[str, Any]]:
+        return [{"path": p, "dirty": e.dirty} for p, e in self._boards.items()]
+
+
+class PatternService:
+    """Methods exposed by the server, parameters are JSON compatible"""
+
+    def __init__(self, max_boards: int = 4) -> None:
+        self.boards = BoardCache(max_boards)
+        self.methods: Dict[str, Callable[..., Any]] = {
+            "open": self.open,
+            "save": self.save,
+            "close": self.close,
+            "list": self.boards.paths,
+            "add_via_pattern": self.add_via_pattern,
+            "rotate_via_pattern": self.rotate_via_pattern,
+            "compact_vias": self.compact_vias,
+            "plan_via_pattern": self.plan_via_pattern,
+        }
+
+    def open(self, path: str) -> str:
+        self.boards.get(path)
+        return os.path.abspath(path)
+
+    def save(self, path: str) -> None:
+        self.boards.save(path)
+
+    def close(self, path: str, save: bool = False) -> None:
+        self.boards.close(path, save=save)
+
+    def add_via_pattern(
+        self,
+        path: str,
+        count: int,
+        pattern: str,
+        *,
+        via: str = "",
+        start_position: Optional[List[int]] = None,
+        direction: str = Direction.HORIZONTAL.name,
+        net: Any = 0,
+        nets: Any = None,
+        track_width: int = 0,
+        extra_space: int = 0,
+        stub_length: int = 0,
+        group: bool = False,
+    ) -> Dict[str, Any]:
+        entry = self.boards.get(path)
+        start = start_position or [0, 0]
+        vias = add_via_pattern(
+            entry.board,
+            count,
+            Pattern.get(pattern),
+            via=entry.find_via(via) if via else None,
+            start_position=pcbnew.VECTOR2I(*start),
+            direction=Direction[direction],
+            net=net,
+            nets=nets,
+            track_width=track_width,
+            extra_space=extra_space,
+            stub_length=stub_length,
+            group=group,
+        )
+        entry.dirty = True
+        uuids = []
+        for v in vias:
+            uuid = v.m_Uuid.AsString()
+            entry.vias[uuid] = v
+            uuids.append(uuid)
+        return {
+            "vias": uuids,
+            "positions": [[v.GetX(), v.GetY()] for v in vias],
+        }
+
+    def rotate_via_pattern(
+        self,
+        path: str,
+        vias: List[str],
+        direction: str,
+        reference_index: int = 0,
+    ) -> List[List[int]]:
+        entry = self.boards.get(path)
+        items = [entry.find_via(v) for v in vias]
+        rotate_via_pattern(
+            items, RotateDirection[direction], reference_index=reference_index
+        )
+        entry.dirty = True
+        return [[v.GetX(), v.GetY()] for v in items]
+
+    def compact_vias(
+        self,
+        path: str,
+        vias: List[str],
+        pattern: str = Pattern.PERPENDICULAR.value,
+        track_width: int = 0,
+        extra_space: int = 0,
+    ) -> Dict[str, Any]:
+        entry = self.boards.get(path)
+        items = compact_vias(
+            entry.board,
+            [entry.find_via(v) for v in vias],
+            Pattern.get(pattern),
+            track_width=track_width,
+            extra_space=extra_space,
+        )
+        entry.dirty = True
+        return {
+            "vias": [v.m_Uuid.AsString() for v in items],
+            "positions": [[v.GetX(), v.GetY()] for v in items],
+        }
+
+    def plan_via_pattern(
+        self, project: str, count: int, pattern: str, **kwargs: Any
+    ) -> Dict[str, Any]:
+        if "direction" in kwargs:
+            kwargs["direction"] = Direction[kwargs["direction"]]
+        if "start_position" in kwargs:
+            kwargs["start_position"] = tuple(kwargs["start_position"])
+        plan = plan_via_pattern(project, count, Pattern.get(pattern), **kwargs)
+        result = asdict(plan)
+        result["pattern"] = plan.pattern.value
+        result["pitch"] = plan.pitch
+        result["bbox"] = plan.bbox
+        return result
+
+    def handle(self, request: Any) -> Optional[Dict[str, Any]]:
+        """Handle single JSON-RPC request, returns None for notifications"""
+        if not isinstance(request, dict) or "method" not in request:
+            return _error(None, INVALID_REQUEST, "Invalid request")
+
+        request_id = request.get("id")
+        method = self.methods.get(request["method"])
+        if method is None:
+            response = _error(request_id, METHOD_NOT_FOUND, "Method not found")
+        else:
+            params = request.get("params", {})
+            try:
+                if isinstance(params, list):
+                    arguments = inspect.signature(method).bind(*params)
+                elif isinstance(params, dict):
+                    arguments = inspect.signature(method).bind(**params)
+                else:
+                    msg = "Params must be array or object"
+                    raise TypeError(msg)
+            except TypeError as e:
+                response = _error(request_id, INVALID_PARAMS, str(e))
+            else:
+                response = self._call(request, method, arguments)
+
+        return response if "id" in request else None
+
+    def _call(
+        self,
+        request: Dict[str, Any],
+        method: Callable[..., Any],
+        arguments: inspect.BoundArguments,
+    ) -> Dict[str, Any]:
+        request_id = request.get("id")
+        try:
+            result = method(*arguments.args, **arguments.kwargs)
+        except (BoardCacheFull, OSError, KeyError, ValueError) as e:
+            logger.info("Request '%s' failed: %s", request["method"], e)
+            return _error(request_id, SERVER_ERROR, str(e))
+        except Exception as e:
+            # anything else is a bug, not an error of the client
+            logger.exception("Request '%s' failed", request["method"])
+            return _error(request_id, INTERNAL_ERROR, str(e))
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message},
+    }
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        service: PatternService = self.server.service  # type: ignore
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            response: Optional[Dict[str, Any]]
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError:
+                response = _error(None, PARSE_ERROR, "Parse error")
+            else:
+                response = service.handle(request)
+            if response is not None:
+                self.wfile.write(json.dumps(response).encode() + b"\n")
+                self.wfile.flush()
+
+
+class PatternServer(socketserver.TCPServer):
+    """Single threaded server, pcbnew objects must not be shared between threads"""
+
+    allow_reuse_address = True
+
+    def __init__(
+        self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, max_boards: int = 4
+    ) -> None:
+        self.service = PatternService(max_boards)
+        super().__init__((host, port), _RequestHandler)
+
+
+def app() -> None:
+    parser = argparse.ArgumentParser(description="Via patterns server")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port")
+    parser.add_argument(
+        "--max-boards", type=int, default=4, help="Maximum number of opened boards"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with PatternServer(args.host, args.port, args.max_boards) as server:
+        logger.info("Listening on %s:%s", args.host, server.server_address[1])
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Tuple, Union
+
+from .geometry import Pattern
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_FILE_NAME = "via_patterns.json"
+
+
+@dataclass
+class LastPattern:
+    """Pattern settings used by the most recent plugin run"""
+
+    pattern: Pattern
+    count: int
+    track_width: int
+    # net number of clockwise 90 degree rotations applied after creation
+    rotation: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict) -> LastPattern:
+        return cls(
+            pattern=Pattern.get(data["pattern"]),
+            count=int(data["count"]),
+            track_width=int(data["track_width"]),
+            rotation=int(data.get("rotation", 0)) % 4,
+        )
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["pattern"] = self.pattern.value
+        return data
+
+
+# parsed settings keyed by path, each entry holds file modification time
+_cache: Dict[str, Tuple[int, Optional[LastPattern]]] = {}
+
+
+def load_last_pattern(path: Union[str, os.PathLike]) -> Optional[LastPattern]:
+    path = os.path.abspath(path)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+    cached = _cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    last: Optional[LastPattern] = None
+    try:
+        with open(path, encoding="utf-8") as f:
+            last = LastPattern.from_dict(json.load(f)["last_pattern"])
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning("Ignoring malformed settings file '%s': %s", path, e)
+    _cache[path] = (mtime, last)
+    return last
+
+
+def save_last_pattern(path: Union[str, os.PathLike], last: LastPattern) -> None:
+    path = os.path.abspath(path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"last_pattern": last.to_dict()}, f, indent=2)
+    _cache[path] = (os.stat(path).st_mtime_ns, last)
@@ -0,0 +1,275 @@
+"""Headless via insertion working directly on `.kicad_pcb` files.
+
+Only the parts of the board file needed for pattern calculation are parsed
+(file version, nets and optionally template via) and new vias are appended
+at the end of the file, so the board does not have to be loaded with pcbnew.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from .geometry import (
+    Direction,
+    Pattern,
+    Position,
+    effective_pattern,
+    get_pattern_offsets,
+    get_pattern_positions,
+)
+from .project import load_project_rules, mm_to_iu, project_path
+from .solver import shortest_pattern
+
+logger = logging.getLogger(__name__)
+
+# first file format version of KiCad 8, it uses `uuid` instead of `tstamp`,
+# tab indentation and `(free yes)` boolean format
+KICAD8_VERSION = 20240108
+
+VERSION_RE = re.compile(r"\(version (\d+)\)")
+NET_RE = re.compile(r'^\s*\(net (\d+) "((?:[^"\\]|\\.)*)"\)\s*$')
+# first top-level items which follow net declarations
+BOARD_ITEMS_RE = re.compile(
+    r"^\s*\((footprint|module|gr_\w+|segment|arc|via|zone|group|dimension)\b"
+)
+UUID_RE = re.compile(r'\((?:uuid|tstamp) "?([0-9a-fA-F-]+)"?\)')
+AT_RE = re.compile(r"\(at (-?[\d.]+) (-?[\d.]+)\)")
+SIZE_RE = re.compile(r"\(size ([\d.]+)\)")
+DRILL_RE = re.compile(r"\(drill ([\d.]+)\)")
+LAYERS_RE = re.compile(r'\(layers "?([^"\s)]+)"? "?([^"\s)]+)"?\)')
+VIA_NET_RE = re.compile(r"\(net (\d+)\)")
+
+
+@dataclass
+class BoardHeader:
+    version: int = 0
+    nets: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class ViaRecord:
+    width: int
+    drill: int
+    position: Position = (0, 0)
+    layers: Tuple[str, str] = ("F.Cu", "B.Cu")
+    net: int = 0
+
+
+def _unescape(name: str) -> str:
+    return re.sub(r"\\(.)", r"\1", name)
+
+
+def read_board_header(pcb_path: Union[str, os.PathLike]) -> BoardHeader:
+    """Read file version and nets, stops at first board item"""
+    header = BoardHeader()
+    with open(pcb_path, encoding="utf-8") as f:
+        for line in f:
+            if not header.version:
+                if match := VERSION_RE.search(line):
+                    header.version = int(match.group(1))
+            if match := NET_RE.match(line):
+                header.nets[_unescape(match.group(2))] = int(match.group(1))
+            elif BOARD_ITEMS_RE.match(line):
+                break
+    return header
+
+
+def _iter_blocks(
+    pcb_path: Union[str, os.PathLike], keywords: Tuple[str, ...]
+) -> Iterator[Tuple[str, str]]:
+    """Yield keyword and text of expressions starting with one of `keywords`"""
+    start_re = re.compile(rf"^\s*\(({'|'.join(keywords)})\b")
+    with open(pcb_path, encoding="utf-8") as f:
+        block: List[str] = []
+        keyword = ""
+        depth = 0
+        for line in f:
+            if not block:
+                match = start_re.match(line)
+                if not match:
+                    continue
+                keyword = match.group(1)
+            block.append(line)
+            depth += line.count("(") - line.count(")")
+            if depth <= 0:
+                yield keyword, "".join(block)
+                block = []
+                depth = 0
+
+
+def _iter_vias(pcb_path: Union[str, os.PathLike]) -> Iterator[str]:
+    for _, text in _iter_blocks(pcb_path, ("via",)):
+        yield text
+
+
+def find_via(pcb_path: Union[str, os.PathLike], via_uuid: str) -> Optional[ViaRecord]:
+    for text in _iter_vias(pcb_path):
+        match = UUID_RE.search(text)
+        if match and match.group(1) == via_uuid:
+            return _parse_via(text)
+    return None
+
+
+def _parse_via(text: str) -> ViaRecord:
+    at = AT_RE.search(text)
+    size = SIZE_RE.search(text)
+    drill = DRILL_RE.search(text)
+    layers = LAYERS_RE.search(text)
+    net = VIA_NET_RE.search(text)
+    if not (at and size and drill):
+        msg = f"Malformed via: {text.strip()}"
+        raise ValueError(msg)
+    return ViaRecord(
+        width=mm_to_iu(float(size.group(1))),
+        drill=mm_to_iu(float(drill.group(1))),
+        position=(mm_to_iu(float(at.group(1))), mm_to_iu(float(at.group(2)))),
+        layers=(layers.group(1), layers.group(2)) if layers else ("F.Cu", "B.Cu"),
+        net=int(net.group(1)) if net else 0,
+    )
+
+
+def _format_mm(value: int) -> str:
+    text = f"{value / 1e6:.6f}".rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def format_via(
+    via: ViaRecord, position: Position, net: int, version: int, free: bool
+) -> str:
+    kicad8 = version >= KICAD8_VERSION
+    indent = "\t" if kicad8 else "  "
+    x, y = position
+    fields = [
+        f"(at {_format_mm(x)} {_format_mm(y)})",
+        f"(size {_format_mm(via.width)})",
+        f"(drill {_format_mm(via.drill)})",
+        f'(layers "{via.layers[0]}" "{via.layers[1]}")',
+    ]
+    if free:
+        fields.append("(free yes)" if kicad8 else "(free)")
+    fields.append(f"(net {net})")
+    if kicad8:
+        fields.append(f'(uuid "{uuid.uuid4()}")')
+    else:
+        fields.append(f"(tstamp {uuid.uuid4()})")
+    return f"{indent}(via {' '.join(fields)})\n"
+
+
+def _append_lines(pcb_path: Union[str, os.PathLike], lines: List[str]) -> None:
+    """Insert lines before closing parenthesis of `kicad_pcb` expression"""
+    with open(pcb_path, "r+b") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        tail_start = max(0, size - 1024)
+        f.seek(tail_start)
+        tail = f.read()
+        closing = tail.rfind(b")")
+        if closing == -1:
+            msg = f"'{pcb_path}' is not a valid board file"
+            raise ValueError(msg)
+        f.seek(tail_start + closing)
+        f.truncate()
+        f.write("".join(lines).encode("utf-8"))
+        f.write(b")\n")
+
+
+def append_via_pattern(
+    pcb_path: Union[str, os.PathLike],
+    count: int,
+    pattern: Union[Pattern, str],
+    *,
+    template: str = "",
+    start_position: Position = (0, 0),
+    direction: Direction = Direction.HORIZONTAL,
+    net: str = "",
+    track_width: int = 0,
+    extra_space: int = 0,
+) -> List[Position]:
+    """Add via pattern to board file without loading it with pcbnew.
+
+    Works like `via_patterns.add_via_pattern` but design rules are taken from
+    the netclass of via's net, defined in `.kicad_pro` file next to the board.
+    When `template` (uuid of existing via) is used, it becomes first via of
+    the pattern, otherwise new via with netclass via size is created at
+    `start_position`. Returns absolute positions of pattern vias.
+    """
+    if pattern not in [
+        Pattern.DIAGONAL,
+        Pattern.PERPENDICULAR,
+        Pattern.STAGGER,
+        Pattern.AUTO,
+    ]:
+        msg = "Unsupported pattern"
+        raise ValueError(msg)
+
+    if direction not in [Direction.HORIZONTAL, Direction.VERTICAL]:
+        msg = "Unsupported direction"
+        raise ValueError(msg)
+
+    if track_width < 0:
+        msg = "The `track_width` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    if extra_space < 0:
+        msg = "The `extra_space` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    header = read_board_header(pcb_path)
+    rules = load_project_rules(project_path(pcb_path))
+    code_to_net = {code: name for name, code in header.nets.items()}
+
+    if template:
+        via = find_via(pcb_path, template)
+        if via is None:
+            msg = f"Via '{template}' not found"
+            raise ValueError(msg)
+        netclass = rules.get_netclass(code_to_net.get(via.net, ""))
+    else:
+        if net and net not in header.nets:
+            msg = f"Net '{net}' not found"
+            raise ValueError(msg)
+        netclass = rules.get_netclass(net)
+        via = ViaRecord(
+            width=netclass.via_diameter,
+            drill=netclass.via_drill,
+            position=start_position,
+            net=header.nets.get(net, 0),
+        )
+
+    if track_width == 0:
+        track_width = netclass.track_width
+    via_clearance = netclass.clearance
+    logger.debug(
+        "netclass: %s, via_width: %s, via_clearance: %s, track_width: %s",
+        netclass.name,
+        via.width,
+        via_clearance,
+        track_width,
+    )
+
+    if pattern == Pattern.AUTO:
+        pattern = shortest_pattern(
+            count, via.width, via_clearance, track_width, extra_space=extra_space
+        ).pattern
+    pattern = effective_pattern(Pattern(pattern), via.width, track_width)
+    offset_x, offset_y = get_pattern_offsets(
+        pattern, via.width, via_clearance, track_width, extra_space
+    )
+    positions = [
+        (via.position[0] + x, via.position[1] + y)
+        for x, y in get_pattern_positions(pattern, count, offset_x, offset_y, direction)
+    ]
+
+    lines = []
+    if not template:
+        lines.append(format_via(via, positions[0], via.net, header.version, False))
+    for position in positions[1:]:
+        lines.append(format_via(via, position, 0, header.version, True))
+    _append_lines(pcb_path, lines)
+
+    return positions
@@ -0,0 +1,416 @@
+"""Selection of the densest pattern for given space or number of vias.
+
+Pattern fitting is computed in closed form from pattern offsets. Length is
+measured between centers of first and last via along pattern direction,
+lateral extent is measured across it.
+
+For geometries not covered by pattern formulas (different via sizes,
+per-layer track widths, blind/buried vias) `min_pitch` finds the tightest
+pitch numerically.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .geometry import (
+    SQRT2,
+    Pattern,
+    diagonal_track_ignored,
+    effective_pattern,
+    get_pattern_offsets,
+)
+
+logger = logging.getLogger(__name__)
+
+LINEAR_PATTERNS = [Pattern.PERPENDICULAR, Pattern.DIAGONAL, Pattern.STAGGER]
+
+
+@dataclass
+class PatternFit:
+    pattern: Pattern
+    count: int
+    extra_space: int
+    length: int
+    lateral: int
+
+
+def _advance(pattern: Pattern, offset_x: int) -> float:
+    """Distance along pattern direction added by each via"""
+    return offset_x / 2 if pattern == Pattern.STAGGER else offset_x
+
+
+def _lateral(pattern: Pattern, count: int, offset_y: int) -> int:
+    if count < 2:
+        return 0
+    if pattern == Pattern.DIAGONAL:
+        return (count - 1) * offset_y
+    return offset_y if pattern == Pattern.STAGGER else 0
+
+
+def _candidates(via_width: int, track_width: int) -> List[Pattern]:
+    # patterns replaced by PERPENDICULAR because of too wide track are skipped
+    return [
+        p for p in LINEAR_PATTERNS if effective_pattern(p, via_width, track_width) == p
+    ]
+
+
+def _extra_space_for(
+    pattern: Pattern,
+    step: float,
+    via_width: int,
+    via_clearance: int,
+    track_width: int,
+) -> int:
+    """Inverse of `get_pattern_offsets`, extra space needed for given advance"""
+    base_x, _ = get_pattern_offsets(pattern, via_width, via_clearance, track_width)
+    if pattern == Pattern.PERPENDICULAR:
+        extra = step - base_x
+    elif pattern == Pattern.STAGGER:
+        extra = 2 * (step - base_x / 2)
+    else:
+        if not diagonal_track_ignored(via_width, via_clearance, track_width):
+            # extra space is not used by pattern when track is too wide
+            return 0
+        extra = step * SQRT2 - (via_clearance + max(via_width, track_width))
+    return max(0, math.floor(extra))
+
+
+def shortest_pattern(
+    count: int,
+    via_width: int,
+    via_clearance: int,
+    track_width: int,
+    *,
+    extra_space: int = 0,
+) -> PatternFit:
+    """Find pattern with the shortest length for `count` vias"""
+    if count < 1:
+        msg = "The `count` argument must be greater than 0"
+        raise ValueError(msg)
+
+    best: Optional[PatternFit] = None
+    for pattern in _candidates(via_width, track_width):
+        offset_x, offset_y = get_pattern_offsets(
+            pattern, via_width, via_clearance, track_width, extra_space
+        )
+        length = int((count - 1) * _advance(pattern, offset_x))
+        fit = PatternFit(
+            pattern, count, extra_space, length, _lateral(pattern, count, offset_y)
+        )
+        if best is None or fit.length < best.length:
+            best = fit
+    assert best
+    logger.debug("Shortest pattern for %s vias: %s", count, best)
+    return best
+
+
+def fit_pattern(
+    length: int,
+    via_width: int,
+    via_clearance: int,
+    track_width: int,
+    *,
+    lateral: Optional[int] = None,
+) -> PatternFit:
+    """Find pattern which fits the most vias in the `length` span.
+
+    When `lateral` is set, the pattern must also fit within that distance
+    across its direction. Returned `extra_space` stretches pattern to
+    cover whole span.
+    """
+    if length < 0:
+        msg = "The `length` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    best: Optional[PatternFit] = None
+    for pattern in _candidates(via_width, track_width):
+        offset_x, offset_y = get_pattern_offsets(
+            pattern, via_width, via_clearance, track_width
+        )
+        count = int(length // _advance(pattern, offset_x)) + 1
+        if lateral is not None and _lateral(pattern, count, offset_y) > lateral:
+            if pattern == Pattern.DIAGONAL:
+                count = lateral // offset_y + 1
+            else:
+                # STAGGER pattern with more than one via can't fit at all
+                count = 1
+        extra_space = 0
+        if count > 1:
+            extra_space = _extra_space_for(
+                pattern,
+                length / (count - 1),
+                via_width,
+                via_clearance,
+                track_width,
+            )
+            offset_x, offset_y = get_pattern_offsets(
+                pattern, via_width, via_clearance, track_width, extra_space
+            )
+            if lateral is not None and _lateral(pattern, count, offset_y) > lateral:
+                extra_space = 0
+                offset_x, offset_y = get_pattern_offsets(
+                    pattern, via_width, via_clearance, track_width
+                )
+        fit = PatternFit(
+            pattern,
+            count,
+            extra_space,
+            int((count - 1) * _advance(pattern, offset_x)),
+            _lateral(pattern, count, offset_y),
+        )
+        if best is None or fit.count > best.count:
+            best = fit
+    assert best
+    logger.debug("Best pattern for %s span: %s", length, best)
+    return best
+
+
+def fit_pattern_in_span(
+    start: Tuple[int, int],
+    end: Tuple[int, int],
+    via_width: int,
+    via_clearance: int,
+    track_width: int,
+    *,
+    lateral: Optional[int] = None,
+) -> PatternFit:
+    """Find best pattern for span between `start` and `end` via centers.
+
+    Pattern direction is aligned with the span, result's `lateral` tells
+    how far pattern extends across it (unlimited unless `lateral` is set).
+    """
+    length = int(math.hypot(end[0] - start[0], end[1] - start[1]))
+    return fit_pattern(length, via_width, via_clearance, track_width, lateral=lateral)
+
+
+def fit_pattern_in_rectangle(
+    width: int,
+    height: int,
+    via_width: int,
+    via_clearance: int,
+    track_width: int,
+) -> PatternFit:
+    """Find best pattern for rectangle, pattern is directed along `width`"""
+    if width < via_width or height < via_width:
+        msg = "The rectangle is too small to fit single via"
+        raise ValueError(msg)
+    return fit_pattern(
+        width - via_width,
+        via_width,
+        via_clearance,
+        track_width,
+        lateral=height - via_width,
+    )
+
+
+@dataclass(frozen=True)
+class ViaShape:
+    """Round via padstack spanning copper layers from `top` to `bottom`.
+
+    Layers use KiCad copper layer numbering (F_Cu = 0, inner layers,
+    B_Cu = 31) so layers between `top` and `bottom` are connected.
+    """
+
+    width: int
+    top: int = 0
+    bottom: int = 31
+
+    def on_layer(self, layer: int) -> bool:
+        return self.top <= layer <= self.bottom
+
+
+@dataclass(frozen=True)
+class EscapeTrack:
+    """Track starting at via center, `direction` is unit vector"""
+
+    layer: int
+    width: int
+    direction: Tuple[float, float]
+    length: int
+
+
+Point = Tuple[float, float]
+
+
+def _point_segment_distance(p: Point, a: Point, b: Point) -> float:
+    abx, aby = b[0] - a[0], b[1] - a[1]
+    apx, apy = p[0] - a[0], p[1] - a[1]
+    length2 = abx * abx + aby * aby
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, (apx * abx + apy * aby) / length2))
+    return math.hypot(apx - t * abx, apy - t * aby)
+
+
+def _segments_intersect(a: Point, b: Point, c: Point, d: Point) -> bool:
+    def cross(o: Point, p: Point, q: Point) -> float:
+        return (p[0] - o[0]) * (q[1] - o[1]) - (p[1] - o[1]) * (q[0] - o[0])
+
+    d1, d2 = cross(c, d, a), cross(c, d, b)
+    d3, d4 = cross(a, b, c), cross(a, b, d)
+    return d1 * d2 < 0 and d3 * d4 < 0
+
+
+def _segment_distance(a: Point, b: Point, c: Point, d: Point) -> float:
+    if _segments_intersect(a, b, c, d):
+        return 0.0
+    return min(
+        _point_segment_distance(a, c, d),
+        _point_segment_distance(b, c, d),
+        _point_segment_distance(c, a, b),
+        _point_segment_distance(d, a, b),
+    )
+
+
+def _track_end(center: Point, track: EscapeTrack) -> Point:
+    return (
+        center[0] + track.direction[0] * track.length,
+        center[1] + track.direction[1] * track.length,
+    )
+
+
+def clearance_margin(
+    pitch: float,
+    direction: Tuple[float, float],
+    via_a: ViaShape,
+    via_b: ViaShape,
+    clearance: int,
+    tracks_a: Tuple[EscapeTrack, ...] = (),
+    tracks_b: Tuple[EscapeTrack, ...] = (),
+) -> float:
+    """Smallest copper gap minus `clearance` when `via_b` is moved by `pitch`.
+
+    Via `via_a` is at origin, `via_b` at `pitch * direction`, only items
+    sharing copper layer are considered. Negative value means violation.
+    """
+    center_a = (0.0, 0.0)
+    center_b = (pitch * direction[0], pitch * direction[1])
+    margins = []
+
+    layers_a = set(range(via_a.top, via_a.bottom + 1))
+    if any(via_b.on_layer(layer) for layer in layers_a):
+        margins.append(pitch - (via_a.width + via_b.width) / 2)
+
+    for via, center, tracks, other_center in [
+        (via_a, center_a, tracks_b, center_b),
+        (via_b, center_b, tracks_a, center_a),
+    ]:
+        for t in tracks:
+            if via.on_layer(t.layer):
+                gap = _point_segment_distance(
+                    center, other_center, _track_end(other_center, t)
+                )
+                margins.append(gap - (via.width + t.width) / 2)
+
+    for ta in tracks_a:
+        for tb in tracks_b:
+            if ta.layer == tb.layer:
+                gap = _segment_distance(
+                    center_a,
+                    _track_end(center_a, ta),
+                    center_b,
+                    _track_end(center_b, tb),
+                )
+                margins.append(gap - (ta.width + tb.width) / 2)
+
+    return min(margins, default=math.inf) - clearance
+
+
+@functools.lru_cache(maxsize=4096)
+def min_pitch(
+    direction: Tuple[float, float],
+    via_a: ViaShape,
+    via_b: ViaShape,
+    clearance: int,
+    tracks_a: Tuple[EscapeTrack, ...] = (),
+    tracks_b: Tuple[EscapeTrack, ...] = (),
+    *,
+    tolerance: int = 1,
+) -> int:
+    """Find the smallest legal distance between vias along `direction`.
+
+    Uses bisection on `clearance_margin`, which assumes that margin grows
+    with pitch (true for escape tracks not pointing towards other via).
+    """
+    norm = math.hypot(*direction)
+    if norm == 0:
+        msg = "The `direction` must not be zero vector"
+        raise ValueError(msg)
+    direction = (direction[0] / norm, direction[1] / norm)
+
+    def legal(pitch: float) -> bool:
+        return (
+            clearance_margin(
+                pitch, direction, via_a, via_b, clearance, tracks_a, tracks_b
+            )
+            >= 0
+        )
+
+    lo = 0
+    hi = max(1, (via_a.width + via_b.width) // 2 + clearance)
+    while not legal(hi):
+        lo = hi
+        hi *= 2
+        if hi > 1e12:
+            msg = "Unable to find legal pitch"
+            raise ValueError(msg)
+    if legal(lo):
+        return lo
+
+    while hi - lo > tolerance:
+        mid = (lo + hi) // 2
+        if legal(mid):
+            hi = mid
+        else:
+            lo = mid
+    return hi
+
+
+class PitchTable:
+    """Persistent lookup table of `min_pitch` results stored in JSON file"""
+
+    def __init__(self, path: Union[str, os.PathLike]) -> None:
+        self.path = path
+        self._table: Dict[str, int] = {}
+        self._modified = False
+        if os.path.isfile(path):
+            with open(path, encoding="utf-8") as f:
+                self._table = json.load(f)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    @staticmethod
+    def _key(*args: Any) -> str:
+        return repr(args)
+
+    def min_pitch(
+        self,
+        direction: Tuple[float, float],
+        via_a: ViaShape,
+        via_b: ViaShape,
+        clearance: int,
+        tracks_a: Tuple[EscapeTrack, ...] = (),
+        tracks_b: Tuple[EscapeTrack, ...] = (),
+    ) -> int:
+        key = self._key(direction, via_a, via_b, clearance, tracks_a, tracks_b)
+        if key not in self._table:
+            self._table[key] = min_pitch(
+                direction, via_a, via_b, clearance, tracks_a, tracks_b
+            )
+            self._modified = True
+        return self._table[key]
+
+    def save(self) -> None:
+        if not self._modified:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self._table, f, indent=1, sort_keys=True)
+        self._modified = False
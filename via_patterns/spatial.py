@@ -0,0 +1,146 @@
+"""Uniform grid indexes of board copper and via positions.
+
+Copper items are approximated by capsules (segments with round ends), vias
+and pads are capsules of zero length. Each item is stored in all grid cells
+overlapped by its bounding box, so queries check only cells around queried
+position. Grid of positions is used for Poisson-disk thinning of vias.
+Does not require pcbnew.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Sequence, Set, Tuple
+
+from .geometry import Position
+
+
+@dataclass(frozen=True)
+class CopperShape:
+    start: Position
+    end: Position
+    radius: int
+    net: int
+    clearance: int
+
+
+def _segment_distance(point: Position, start: Position, end: Position) -> float:
+    """Distance of `point` to line segment from `start` to `end`"""
+    (px, py), (x1, y1), (x2, y2) = point, start, end
+    dx, dy = x2 - x1, y2 - y1
+    length = dx * dx + dy * dy
+    t = 0.0
+    if length:
+        t = max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / length))
+    return math.hypot(px - x1 - t * dx, py - y1 - t * dy)
+
+
+class CopperIndex:
+    """Copper shapes in hash grid with cells of `cell` size"""
+
+    def __init__(self, cell: int) -> None:
+        if cell < 1:
+            msg = "The `cell` argument must be greater than 0"
+            raise ValueError(msg)
+        self.cell = cell
+        self.shapes: List[CopperShape] = []
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        self._max_clearance = 0
+
+    def __len__(self) -> int:
+        return len(self.shapes)
+
+    def add(
+        self,
+        start: Position,
+        end: Position,
+        radius: int,
+        net: int = 0,
+        clearance: int = 0,
+    ) -> None:
+        i = len(self.shapes)
+        self.shapes.append(CopperShape(start, end, radius, net, clearance))
+        self._max_clearance = max(self._max_clearance, clearance)
+        xmin, xmax = sorted((start[0], end[0]))
+        ymin, ymax = sorted((start[1], end[1]))
+        for cx in range((xmin - radius) // self.cell, (xmax + radius) // self.cell + 1):
+            for cy in range(
+                (ymin - radius) // self.cell, (ymax + radius) // self.cell + 1
+            ):
+                self._grid.setdefault((cx, cy), []).append(i)
+
+    def add_circle(
+        self, center: Position, radius: int, net: int = 0, clearance: int = 0
+    ) -> None:
+        self.add(center, center, radius, net, clearance)
+
+    def query(self, position: Position, distance: int) -> Iterator[CopperShape]:
+        """Get shapes which may be closer than `distance` to `position`"""
+        x, y = position
+        seen: Set[int] = set()
+        for cx in range((x - distance) // self.cell, (x + distance) // self.cell + 1):
+            for cy in range(
+                (y - distance) // self.cell, (y + distance) // self.cell + 1
+            ):
+                for i in self._grid.get((cx, cy), []):
+                    if i not in seen:
+                        seen.add(i)
+                        yield self.shapes[i]
+
+    def slack(
+        self,
+        center: Position,
+        radius: int,
+        net: int,
+        clearance: int,
+        limit: int,
+    ) -> int:
+        """Smallest excess of copper gap over required clearance.
+
+        Gap to copper of other nets must be at least the larger of both
+        clearances, copper of the same `net` must only not overlap.
+        Returns `limit` when there is no copper closer than that, negative
+        value means that circle at `center` would violate clearance.
+        """
+        distance = radius + limit + max(clearance, self._max_clearance)
+        result = limit
+        for shape in self.query(center, distance):
+            gap = _segment_distance(center, shape.start, shape.end)
+            gap -= radius + shape.radius
+            required = 0 if shape.net == net else max(clearance, shape.clearance)
+            result = min(result, math.floor(gap) - required)
+        return result
+
+
+def poisson_disk_select(
+    positions: Sequence[Position], radius: int, fixed: Sequence[Position] = ()
+) -> List[int]:
+    """Greedy Poisson-disk selection, returns indices of kept `positions`.
+
+    Positions are visited in order and kept only when no `fixed` or already
+    kept position is closer than `radius`, so every dropped position is
+    within `radius` of kept one.
+    """
+    if radius < 1:
+        msg = "The `radius` argument must be greater than 0"
+        raise ValueError(msg)
+
+    # cell size equal to radius, only adjacent cells need to be checked
+    grid: Dict[Tuple[int, int], List[Position]] = {}
+    for x, y in fixed:
+        grid.setdefault((x // radius, y // radius), []).append((x, y))
+
+    kept: List[int] = []
+    for i, (x, y) in enumerate(positions):
+        cx, cy = x // radius, y // radius
+        if any(
+            math.hypot(x - px, y - py) < radius
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            for px, py in grid.get((cx + dx, cy + dy), [])
+        ):
+            continue
+        grid.setdefault((cx, cy), []).append((x, y))
+        kept.append(i)
+    return kept
@@ -0,0 +1,240 @@
+"""Via patterns stored as reusable footprints (stamps).
+
+Stamp is a footprint with one plated through hole pad per pattern via.
+Placing it adds single item to the board no matter how many vias it has,
+stamps can be converted to regular vias with `flatten_stamps` when needed.
+Stamps are identified by fingerprint of pattern spec and design rules and
+cached in project local footprint library.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+from typing import Dict, List, Optional, Union
+
+import pcbnew
+
+from .geometry import Direction, Pattern
+from .via_patterns import (
+    ClearanceResolver,
+    PatternSpec,
+    _default_via,
+    _fingerprint,
+    _pattern_positions,
+    _resolve_design_rules,
+)
+
+logger = logging.getLogger(__name__)
+
+STAMP_LIBRARY_NAME = "via_patterns"
+STAMP_PREFIX = "ViaPatternStamp_"
+
+
+def stamp_library_path(board: pcbnew.BOARD) -> str:
+    """Path of footprint library next to the board file"""
+    file_name = board.GetFileName()
+    if not file_name:
+        msg = "Board is not saved, use `StampCache` with explicit library path"
+        raise ValueError(msg)
+    board_dir = os.path.dirname(os.path.abspath(file_name))
+    return os.path.join(board_dir, f"{STAMP_LIBRARY_NAME}.pretty")
+
+
+def is_stamp(footprint: pcbnew.FOOTPRINT) -> bool:
+    return str(footprint.GetFPID().GetLibItemName()).startswith(STAMP_PREFIX)
+
+
+class StampCache:
+    """Stamp footprints by name, backed by footprint library on disk"""
+
+    def __init__(self, library_path: str) -> None:
+        self.library_path = library_path
+        self._footprints: Dict[str, pcbnew.FOOTPRINT] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def get(self, name: str) -> Optional[pcbnew.FOOTPRINT]:
+        if name not in self._footprints:
+            path = os.path.join(self.library_path, f"{name}.kicad_mod")
+            if not os.path.isfile(path):
+                return None
+            logger.debug("Loading stamp '%s'", name)
+            footprint = pcbnew.FootprintLoad(self.library_path, name)
+            footprint.SetFPID(pcbnew.LIB_ID(STAMP_LIBRARY_NAME, name))
+            self._footprints[name] = footprint
+        return self._footprints[name]
+
+    def put(self, footprint: pcbnew.FOOTPRINT) -> None:
+        name = str(footprint.GetFPID().GetLibItemName())
+        if not os.path.isdir(self.library_path):
+            pcbnew.FootprintLibCreate(self.library_path)
+        pcbnew.FootprintSave(self.library_path, footprint)
+        self._footprints[name] = footprint
+
+
+# caches of already opened libraries, keyed by library path
+_stamp_caches: Dict[str, StampCache] = {}
+
+
+def _get_stamp_cache(board: pcbnew.BOARD) -> StampCache:
+    path = stamp_library_path(board)
+    if path not in _stamp_caches:
+        _stamp_caches[path] = StampCache(path)
+    return _stamp_caches[path]
+
+
+def _stamp_name(
+    spec: PatternSpec,
+    template: pcbnew.PCB_VIA,
+    via_width: int,
+    via_clearance: int,
+    track_width: int,
+) -> str:
+    # pads copy drill of the template
+    inputs = (
+        _fingerprint(spec, via_width, via_clearance, track_width),
+        template.GetDrillValue(),
+    )
+    return STAMP_PREFIX + hashlib.sha1(repr(inputs).encode()).hexdigest()[:12]
+
+
+def create_stamp(
+    board: pcbnew.BOARD,
+    count: int,
+    pattern: Union[Pattern, str],
+    *,
+    via: Optional[pcbnew.PCB_VIA] = None,
+    direction: Direction = Direction.HORIZONTAL,
+    track_width: int = 0,
+    extra_space: int = 0,
+    cache: Optional[StampCache] = None,
+) -> pcbnew.FOOTPRINT:
+    """Get stamp footprint of a pattern, creating it only if not cached yet.
+
+    Design rules are resolved for `via` (or default via) the same way as
+    in `add_via_pattern`. Stamp pads are plated through holes, so `via`
+    must be through via. Returned footprint is not added to the board,
+    use `place_stamp` for that.
+    """
+    if pattern not in [
+        Pattern.DIAGONAL,
+        Pattern.PERPENDICULAR,
+        Pattern.STAGGER,
+        Pattern.AUTO,
+    ]:
+        msg = "Unsupported pattern"
+        raise ValueError(msg)
+
+    if count < 1:
+        msg = "The `count` argument must be greater than 0"
+        raise ValueError(msg)
+
+    if via and via.GetViaType() != pcbnew.VIATYPE_THROUGH:
+        msg = "Stamps support only through vias"
+        raise ValueError(msg)
+
+    spec = PatternSpec(
+        pattern=Pattern(pattern),
+        count=count,
+        direction=direction,
+        track_width=track_width,
+        extra_space=extra_space,
+    )
+    template = via if via else _default_via(board)
+    resolver = ClearanceResolver(board)
+    via_width, via_clearance, track_width = _resolve_design_rules(
+        board, template, track_width, resolver
+    )
+    via_clearance, positions = _pattern_positions(
+        spec, template, via_width, via_clearance, track_width, resolver
+    )
+
+    name = _stamp_name(spec, template, via_width, via_clearance, track_width)
+    cache = cache or _get_stamp_cache(board)
+    stamp = cache.get(name)
+    if stamp is not None:
+        return stamp
+
+    logger.info("Creating stamp '%s' for %s", name, spec.to_name())
+    stamp = pcbnew.FOOTPRINT(board)
+    stamp.SetFPID(pcbnew.LIB_ID(STAMP_LIBRARY_NAME, name))
+    stamp.SetAttributes(pcbnew.FP_EXCLUDE_FROM_BOM | pcbnew.FP_EXCLUDE_FROM_POS_FILES)
+    stamp.SetLibDescription(spec.to_name())
+    stamp.Reference().SetVisible(False)
+    stamp.Value().SetText(name)
+    stamp.Value().SetVisible(False)
+
+    drill = template.GetDrillValue()
+    for x, y in positions:
+        pad = pcbnew.PAD(stamp)
+        pad.SetAttribute(pcbnew.PAD_ATTRIB_PTH)
+        pad.SetShape(pcbnew.PAD_SHAPE_CIRCLE)
+        pad.SetLayerSet(pad.PTHMask())
+        pad.SetSize(pcbnew.VECTOR2I(via_width, via_width))
+        pad.SetDrillSize(pcbnew.VECTOR2I(drill, drill))
+        pad.SetPosition(pcbnew.VECTOR2I(x, y))
+        # all pads are the same pin, stamp is always connected to single net
+        pad.SetNumber("1")
+        stamp.Add(pad)
+
+    cache.put(stamp)
+    return stamp
+
+
+def place_stamp(
+    board: pcbnew.BOARD,
+    stamp: pcbnew.FOOTPRINT,
+    position: pcbnew.VECTOR2I,
+    *,
+    net: Union[str, int] = 0,
+    select: bool = False,
+) -> pcbnew.FOOTPRINT:
+    """Add instance of `stamp` with first via at `position`"""
+    footprint = stamp.Duplicate().Cast()
+    footprint.SetPosition(position)
+    if net:
+        if isinstance(net, str):
+            netcode = board.GetNetsByName()[net].GetNetCode()
+        elif isinstance(net, int):
+            netcode = net
+        else:
+            msg = "The `net` argument must be str or int"
+            raise TypeError(msg)
+        for pad in footprint.Pads():
+            pad.SetNetCode(netcode)
+    if select:
+        footprint.SetSelected()
+    board.Add(footprint)
+    return footprint
+
+
+def flatten_stamps(
+    board: pcbnew.BOARD, footprints: List[pcbnew.FOOTPRINT]
+) -> List[pcbnew.PCB_VIA]:
+    """Replace placed stamps with regular vias, other footprints are ignored"""
+    stamps = [f for f in footprints if is_stamp(f)]
+    vias: List[pcbnew.PCB_VIA] = []
+    for footprint in stamps:
+        for pad in footprint.Pads():
+            v = pcbnew.PCB_VIA(board)
+            v.SetViaType(pcbnew.VIATYPE_THROUGH)
+            v.SetTopLayer(pcbnew.F_Cu)
+            v.SetBottomLayer(pcbnew.B_Cu)
+            v.SetWidth(pad.GetSize().x)
+            v.SetDrill(pad.GetDrillSize().x)
+            v.SetPosition(pad.GetPosition())
+            v.SetNetCode(pad.GetNetCode())
+            v.SetIsFree(True)
+            vias.append(v)
+
+    # stamps are removed and all vias added in single pass
+    for footprint in stamps:
+        board.Remove(footprint)
+    for v in vias:
+        board.Add(v)
+
+    logger.debug("Flattened %s stamps to %s vias", len(stamps), len(vias))
+    return vias
@@ -1,43 +1,129 @@
 from __future__ import annotations
 
+import hashlib
 import logging
 import math
-from enum import Enum, auto
-from typing import List, Optional, Union
+from dataclasses import dataclass, field, replace
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 import pcbnew
 
+from .export import ViaTable
+from .geometry import (
+    PATTERN_GROUP_PREFIX,
+    Direction,
+    Pattern,
+    RotateDirection,
+    Transform,
+    effective_pattern,
+    get_companion_offsets,
+    get_pattern_offsets,
+    get_pattern_positions,
+    get_ring_positions,
+    get_sequence_positions,
+    transform_positions,
+)
+from .project import expand_net_range
+from .solver import shortest_pattern
+from .spatial import CopperIndex, poisson_disk_select
+
 logger = logging.getLogger(__name__)
 ZERO_POSITION = pcbnew.VECTOR2I(0, 0)
-SQRT2 = math.sqrt(2)
-SQRT3 = math.sqrt(3)
+MAX_RULE_ITERATIONS = 3
 
 
-class Pattern(str, Enum):
-    PERPENDICULAR = "Perpendicular"
-    DIAGONAL = "Diagonal"
-    STAGGER = "Stagger"
+# escape directions of stub tracks for each layer, tracks on both sides of
+# pattern are routed away from the pattern line
+DEFAULT_STUB_DIRECTIONS = {
+    Direction.HORIZONTAL: {pcbnew.F_Cu: (0, 1), pcbnew.B_Cu: (0, -1)},
+    Direction.VERTICAL: {pcbnew.F_Cu: (1, 0), pcbnew.B_Cu: (-1, 0)},
+}
 
-    @classmethod
-    def get(cls, name: str) -> Pattern:
-        if isinstance(name, str):
-            try:
-                return Pattern(name.title())
-            except ValueError:
-                # fallback to error below to use 'name' before converting to titlecase
-                pass
-        msg = f"'{name}' is not a valid Pattern"
-        raise ValueError(msg)
 
+# nets of pattern vias: sequence of names or codes, range expression
+# like `D[0..31]` or function of via index
+NetsArgument = Union[Sequence[Union[str, int]], str, Callable[[int], Union[str, int]]]
 
-class Direction(int, Enum):
-    HORIZONTAL = auto()
-    VERTICAL = auto()
 
+@dataclass
+class PatternSpec:
+    """Arguments of `add_via_pattern` stored in name of pattern's group"""
+
+    pattern: Pattern
+    count: int
+    direction: Direction = Direction.HORIZONTAL
+    track_width: int = 0
+    extra_space: int = 0
+    stub_length: int = 0
+    stub_directions: Optional[Dict[int, Tuple[int, int]]] = None
+    # uuid of template via, fingerprint of design rules and angle (degrees)
+    # of the last via in not rotated pattern at creation time,
+    # used by `regenerate_patterns`, not a part of pattern definition
+    template: str = field(default="", compare=False)
+    fingerprint: str = field(default="", compare=False)
+    angle: Optional[float] = field(default=None, compare=False)
+
+    def to_name(self) -> str:
+        fields = [
+            f"{PATTERN_GROUP_PREFIX}{self.pattern.value}",
+            f"count={self.count}",
+            f"direction={self.direction.name}",
+            f"track_width={self.track_width}",
+            f"extra_space={self.extra_space}",
+        ]
+        if self.stub_length:
+            fields.append(f"stub_length={self.stub_length}")
+        if self.stub_directions:
+            directions = "/".join(
+                f"{layer},{dx},{dy}" for layer, (dx, dy) in self.stub_directions.items()
+            )
+            fields.append(f"stub_directions={directions}")
+        if self.template:
+            fields.append(f"template={self.template}")
+        if self.fingerprint:
+            fields.append(f"fingerprint={self.fingerprint}")
+        if self.angle is not None:
+            fields.append(f"angle={self.angle:.3f}")
+        return ";".join(fields)
 
-class RotateDirection(int, Enum):
-    CLOCKWISE = 1
-    COUNTERCLOCKWISE = -1
+    @classmethod
+    def from_name(cls, name: str) -> Optional[PatternSpec]:
+        if not name.startswith(PATTERN_GROUP_PREFIX):
+            return None
+        pattern, *fields = name[len(PATTERN_GROUP_PREFIX) :].split(";")
+        values = dict(f.split("=", 1) for f in fields if "=" in f)
+        try:
+            stub_directions = None
+            if "stub_directions" in values:
+                stub_directions = {}
+                for d in values["stub_directions"].split("/"):
+                    layer, dx, dy = map(int, d.split(","))
+                    stub_directions[layer] = (dx, dy)
+            return cls(
+                pattern=Pattern.get(pattern),
+                count=int(values["count"]),
+                direction=Direction[values.get("direction", "HORIZONTAL")],
+                track_width=int(values.get("track_width", 0)),
+                extra_space=int(values.get("extra_space", 0)),
+                stub_length=int(values.get("stub_length", 0)),
+                stub_directions=stub_directions,
+                template=values.get("template", ""),
+                fingerprint=values.get("fingerprint", ""),
+                angle=float(values["angle"]) if "angle" in values else None,
+            )
+        except (KeyError, ValueError):
+            logger.warning("Ignoring malformed pattern group name: '%s'", name)
+            return None
 
 
 def _default_via(board: pcbnew.BOARD) -> pcbnew.PCB_VIA:
@@ -51,6 +137,13 @@ def _default_via(board: pcbnew.BOARD) -> pcbnew.PCB_VIA:
     return via
 
 
+def _netclass_via(board: pcbnew.BOARD, netclass: pcbnew.NETCLASS) -> pcbnew.PCB_VIA:
+    via = _default_via(board)
+    via.SetWidth(netclass.GetViaDiameter())
+    via.SetDrill(netclass.GetViaDrill())
+    return via
+
+
 def get_netclass(
     board: pcbnew.BOARD, item: pcbnew.BOARD_CONNECTED_ITEM
 ) -> pcbnew.NETCLASS:
@@ -64,6 +157,277 @@ def get_netclass(
         return board.GetAllNetClasses()["Default"]
 
 
+def _net_codes(board: pcbnew.BOARD) -> Dict[str, int]:
+    """Net name to net code map, built once per batch of lookups"""
+    return {net.GetNetname(): code for code, net in board.GetNetsByNetcode().items()}
+
+
+def _net_code(codes: Dict[str, int], name: str) -> int:
+    if name not in codes:
+        msg = f"Net '{name}' not found"
+        raise ValueError(msg)
+    return codes[name]
+
+
+def _resolve_nets(board: pcbnew.BOARD, nets: NetsArgument, count: int) -> List[int]:
+    values: Sequence[Union[str, int]]
+    if callable(nets):
+        values = [nets(i) for i in range(count)]
+    elif isinstance(nets, str):
+        values = expand_net_range(nets)
+    else:
+        values = list(nets)
+
+    if len(values) != count:
+        msg = f"The `nets` must define net of each of {count} vias, got {len(values)}"
+        raise ValueError(msg)
+
+    names: Optional[Dict[str, int]] = None
+    codes = []
+    for value in values:
+        if isinstance(value, int):
+            codes.append(value)
+        elif isinstance(value, str):
+            if names is None:
+                names = _net_codes(board)
+            codes.append(_net_code(names, value))
+        else:
+            msg = "The `nets` values must be str or int"
+            raise TypeError(msg)
+    return codes
+
+
+class ClearanceResolver:
+    """Clearance evaluation through board's design rules with memoization.
+
+    Clearance is evaluated by KiCad's rule engine (`GetOwnClearance`), so
+    custom rules are respected. Results are cached per net, netclass, layer
+    and rule areas containing evaluated position, which are the only inputs
+    of typical rule conditions.
+    """
+
+    def __init__(self, board: pcbnew.BOARD) -> None:
+        self.board = board
+        self._rule_areas = [z for z in board.Zones() if z.GetIsRuleArea()]
+        self._cache: Dict[Tuple[int, str, int, Tuple[str, ...]], int] = {}
+
+    def _areas(self, position: pcbnew.VECTOR2I, layer: int) -> Tuple[str, ...]:
+        return tuple(
+            z.GetZoneName()
+            for z in self._rule_areas
+            if z.IsOnLayer(layer) and z.Outline().Contains(position)
+        )
+
+    def _probe(
+        self, item: pcbnew.BOARD_CONNECTED_ITEM, position: pcbnew.VECTOR2I
+    ) -> pcbnew.BOARD_CONNECTED_ITEM:
+        # fresh copy (not added to board) for each evaluation, KiCad caches
+        # some rule conditions results by item
+        probe = item.Duplicate()
+        probe.SetNetCode(item.GetNetCode())
+        probe.SetPosition(position)
+        return probe
+
+    def clearance(
+        self,
+        item: pcbnew.BOARD_CONNECTED_ITEM,
+        layer: int,
+        position: Optional[pcbnew.VECTOR2I] = None,
+    ) -> int:
+        if position is None:
+            position = item.GetPosition()
+        key = (
+            item.GetNetCode(),
+            item.GetNetClassName(),
+            layer,
+            self._areas(position, layer),
+        )
+        if key not in self._cache:
+            probe = item
+            if position != item.GetPosition():
+                probe = self._probe(item, position)
+            self._cache[key] = probe.GetOwnClearance(layer)
+            logger.debug("Clearance for %s: %s", key, self._cache[key])
+        return self._cache[key]
+
+    def via_clearance(
+        self, via: pcbnew.PCB_VIA, position: Optional[pcbnew.VECTOR2I] = None
+    ) -> int:
+        """Get the largest clearance of all via's copper layers"""
+        layers = [
+            layer
+            for layer in range(pcbnew.F_Cu, pcbnew.B_Cu + 1)
+            if pcbnew.IsCopperLayer(layer) and via.IsOnLayer(layer)
+        ]
+        return max(
+            (self.clearance(via, layer, position) for layer in layers), default=0
+        )
+
+    def pair_clearance(
+        self,
+        a: pcbnew.BOARD_CONNECTED_ITEM,
+        b: pcbnew.BOARD_CONNECTED_ITEM,
+        layer: int,
+    ) -> int:
+        """Clearance between two items, the larger of both item constraints"""
+        return max(self.clearance(a, layer), self.clearance(b, layer))
+
+
+def _resolve_design_rules(
+    board: pcbnew.BOARD,
+    via: pcbnew.PCB_VIA,
+    track_width: int,
+    resolver: Optional[ClearanceResolver] = None,
+) -> Tuple[int, int, int]:
+    """Get via width, via clearance and track width used for pitch calculation"""
+    resolver = resolver or ClearanceResolver(board)
+    via_width = via.GetWidth()
+    via_clearance = resolver.via_clearance(via)
+
+    if track_width == 0 or via_clearance == 0:
+        via_netclass = get_netclass(board, via)
+        if track_width == 0:
+            track_width = via_netclass.GetTrackWidth()
+            logger.debug(
+                "The `track_width` argument not specified, using via's "
+                "netclass (%s) value: %s",
+                via_netclass.GetName(),
+                track_width,
+            )
+        if via_clearance == 0:
+            via_clearance = via_netclass.GetClearance()
+            logger.debug(
+                "The `via_clearance` not specified, using via's "
+                "netclass (%s) value: %s",
+                via_netclass.GetName(),
+                via_clearance,
+            )
+
+    return via_width, via_clearance, track_width
+
+
+def _fingerprint(
+    spec: PatternSpec, via_width: int, via_clearance: int, track_width: int
+) -> str:
+    inputs = (
+        spec.pattern.value,
+        spec.count,
+        spec.direction.name,
+        spec.track_width,
+        spec.extra_space,
+        spec.stub_length,
+        sorted(spec.stub_directions.items()) if spec.stub_directions else None,
+        via_width,
+        via_clearance,
+        track_width,
+    )
+    return hashlib.sha1(repr(inputs).encode()).hexdigest()[:12]
+
+
+class ViaIndex:
+    """Board vias in hash grid keyed by quantized position and layer span.
+
+    Used to find vias placed at the same position (within `quantum`)
+    without scanning whole board for each lookup.
+    """
+
+    def __init__(self, board: pcbnew.BOARD, quantum: int = 1000) -> None:
+        if quantum < 1:
+            msg = "The `quantum` argument must be greater than 0"
+            raise ValueError(msg)
+        self.quantum = quantum
+        self._grid: Dict[Tuple[int, int, int, int], List[pcbnew.PCB_VIA]] = {}
+        for item in board.GetTracks():
+            if item.Type() == pcbnew.PCB_VIA_T:
+                self._insert(pcbnew.Cast_to_PCB_VIA(item))
+        # vias added after the index was built
+        self.added: List[pcbnew.PCB_VIA] = []
+
+    def __len__(self) -> int:
+        return sum(len(vias) for vias in self._grid.values())
+
+    def __iter__(self) -> Iterator[pcbnew.PCB_VIA]:
+        for vias in self._grid.values():
+            yield from vias
+
+    def add(self, via: pcbnew.PCB_VIA) -> None:
+        self._insert(via)
+        self.added.append(via)
+
+    def _insert(self, via: pcbnew.PCB_VIA) -> None:
+        position = via.GetPosition()
+        key = (
+            position.x // self.quantum,
+            position.y // self.quantum,
+            via.TopLayer(),
+            via.BottomLayer(),
+        )
+        self._grid.setdefault(key, []).append(via)
+
+    def find(
+        self, position: pcbnew.VECTOR2I, top_layer: int, bottom_layer: int
+    ) -> Optional[pcbnew.PCB_VIA]:
+        """Get via with given layer span placed at `position`"""
+        x, y = position.x // self.quantum, position.y // self.quantum
+        # position may be quantized to neighbouring cell
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                key = (x + dx, y + dy, top_layer, bottom_layer)
+                for via in self._grid.get(key, []):
+                    move = via.GetPosition() - position
+                    if abs(move.x) < self.quantum and abs(move.y) < self.quantum:
+                        return via
+        return None
+
+
+def _pattern_positions(
+    spec: PatternSpec,
+    via: pcbnew.PCB_VIA,
+    via_width: int,
+    via_clearance: int,
+    track_width: int,
+    resolver: ClearanceResolver,
+) -> Tuple[int, List[Tuple[int, int]]]:
+    """Get final via clearance and positions of pattern relative to `via`"""
+    pattern = spec.pattern
+    if pattern == Pattern.AUTO:
+        pattern = shortest_pattern(
+            spec.count,
+            via_width,
+            via_clearance,
+            track_width,
+            extra_space=spec.extra_space,
+        ).pattern
+        logger.debug("Using '%s' pattern", pattern)
+    pattern = effective_pattern(pattern, via_width, track_width)
+
+    def positions_for(clearance: int) -> List[Tuple[int, int]]:
+        offset_x, offset_y = get_pattern_offsets(
+            pattern, via_width, clearance, track_width, spec.extra_space
+        )
+        return get_pattern_positions(
+            pattern, spec.count, offset_x, offset_y, spec.direction
+        )
+
+    positions = positions_for(via_clearance)
+
+    # rule areas may require bigger clearance at some of the pattern positions,
+    # each enlargement can move vias to another area so repeat few times
+    origin = via.GetPosition()
+    for _ in range(MAX_RULE_ITERATIONS):
+        clearance = max(
+            resolver.via_clearance(via, origin + pcbnew.VECTOR2I(x, y))
+            for x, y in positions
+        )
+        if clearance <= via_clearance:
+            break
+        logger.debug("Clearance at pattern positions: %s", clearance)
+        via_clearance = clearance
+        positions = positions_for(via_clearance)
+
+    return via_clearance, positions
+
+
 def add_via_pattern(
     board: pcbnew.BOARD,
     count: int,
@@ -73,13 +437,34 @@ def add_via_pattern(
     start_position: pcbnew.VECTOR2I = ZERO_POSITION,
     direction: Direction = Direction.HORIZONTAL,
     net: Union[str, int] = 0,
+    nets: Optional[NetsArgument] = None,
     track_width: int = 0,
     extra_space: int = 0,
     select: bool = False,
+    stub_length: int = 0,
+    stub_directions: Optional[Dict[int, Tuple[int, int]]] = None,
+    group: bool = False,
+    clearance_resolver: Optional[ClearanceResolver] = None,
+    index: Optional[ViaIndex] = None,
 ) -> List[pcbnew.PCB_VIA]:
+    """Add pattern of vias, returns list of all pattern vias.
+
+    Only the first via gets the `net`, unless `nets` is specified, then
+    each via gets its own net (first one included).
+    When `index` is given, pattern positions already occupied by via with
+    the same layer span are skipped and the existing via is returned in
+    its place. Vias which existed before the call (`via` included) are left
+    untouched, only new vias get `nets`, stubs and are added to the group.
+    New vias are added to the `index`.
+    """
     vias: List[pcbnew.PCB_VIA] = []
 
-    if pattern not in [Pattern.DIAGONAL, Pattern.PERPENDICULAR, Pattern.STAGGER]:
+    if pattern not in [
+        Pattern.DIAGONAL,
+        Pattern.PERPENDICULAR,
+        Pattern.STAGGER,
+        Pattern.AUTO,
+    ]:
         msg = "Unsupported pattern"
         raise ValueError(msg)
 
@@ -95,19 +480,42 @@ def add_via_pattern(
         msg = "The `extra_space` argument must be greater or equal 0"
         raise ValueError(msg)
 
+    if stub_length < 0:
+        msg = "The `stub_length` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    netcodes = _resolve_nets(board, nets, count) if nets is not None else None
+
+    spec = PatternSpec(
+        pattern=Pattern(pattern),
+        count=count,
+        direction=direction,
+        track_width=track_width,
+        extra_space=extra_space,
+        stub_length=stub_length,
+        stub_directions=stub_directions,
+    )
+
+    if not via and index is not None:
+        via = index.find(start_position, pcbnew.F_Cu, pcbnew.B_Cu)
+
+    created_first = False
     if not via:
+        created_first = True
         _via = _default_via(board)
         _via.SetStart(start_position)
         if net:
             if isinstance(net, str) and net != "":
-                nets = board.GetNetsByName()
-                _via.SetNet(nets[net])
+                nets_by_name = board.GetNetsByName()
+                _via.SetNet(nets_by_name[net])
             elif isinstance(net, int) and net != 0:
                 _via.SetNetCode(net)
             else:
                 msg = "The `net` argument must be str or int"
                 raise TypeError(msg)
         board.Add(_via)
+        if index is not None:
+            index.add(_via)
     else:
         _via = via
         if via.GetParent().m_Uuid != board.m_Uuid:
@@ -116,101 +524,589 @@ def add_via_pattern(
 
     vias.append(_via)
 
-    via_width = _via.GetWidth()
-    via_clearance = _via.GetOwnClearance(_via.GetLayer())
+    resolver = clearance_resolver or ClearanceResolver(board)
+    via_width, via_clearance, track_width = _resolve_design_rules(
+        board, _via, track_width, resolver
+    )
 
-    if track_width == 0 or via_clearance == 0:
-        via_netclass = get_netclass(board, _via)
-        if track_width == 0:
-            track_width = via_netclass.GetTrackWidth()
-            logger.debug(
-                "The `track_width` argument not specified, using via's "
-                f"netclass ({via_netclass.GetName()}) value: {track_width}"
-            )
-        if via_clearance == 0:
-            via_clearance = via_netclass.GetClearance()
-            logger.debug(
-                "The `via_clearance` not specified, using via's "
-                f"netclass ({via_netclass.GetName()}) value: {via_clearance}"
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "via_width: %s, via_clearance: %s, track_width: %s, extra_space: %s, "
+            "netclass: %s",
+            via_width,
+            via_clearance,
+            track_width,
+            extra_space,
+            _via.GetNetClassName(),
+        )
+
+    via_clearance, positions = _pattern_positions(
+        spec, _via, via_width, via_clearance, track_width, resolver
+    )
+
+    origin = _via.GetPosition()
+    new_vias: List[pcbnew.PCB_VIA] = []
+    for x, y in positions[1:]:
+        if index is not None:
+            existing = index.find(
+                origin + pcbnew.VECTOR2I(x, y), _via.TopLayer(), _via.BottomLayer()
             )
+            if existing:
+                vias.append(existing)
+                continue
+        v = _via.Duplicate()
+        assert v, "Failed to duplicate via item"
+        v.SetNetCode(0)
+        v.SetIsFree(True)
+        v.Move(pcbnew.VECTOR2I(x, y))
+        vias.append(v)
+        new_vias.append(v)
 
-    logger.debug(f"via_width: {via_width}, via_clearance: {via_clearance}")
-    logger.debug(f"track_width: {track_width}")
-    logger.debug(f"extra_space: {extra_space}")
-    logger.debug(f"netclass: {_via.GetNetClassName()}")
+    # with index, vias existing before this call are left untouched
+    if index is None:
+        modified = vias
+    else:
+        modified = ([_via] if created_first else []) + new_vias
+    modified_uuids = {v.m_Uuid.AsString() for v in modified}
 
-    if pattern in [Pattern.STAGGER, Pattern.DIAGONAL] and track_width > via_width:
-        logger.debug(
-            f"The '{pattern}' pattern when `track_width` > `via_width` makes no sense, "
-            f"replacing with '{Pattern.PERPENDICULAR}' pattern"
-        )
-        pattern = Pattern.PERPENDICULAR
-
-    move = pcbnew.VECTOR2I(0, 0)
-    offset_x = 0
-    offset_y = 0
-
-    if pattern == Pattern.PERPENDICULAR:
-        offset_x = via_clearance + max(via_width, track_width) + extra_space
-        offset_y = 0
-    elif pattern == Pattern.DIAGONAL:
-        if track_width > 2 * int(
-            ((via_width + via_clearance) / SQRT2) - via_clearance - via_width / 2
-        ):
-            # track too wide to be ignored in DIAGONAL pattern
-            offset_x = int(via_width / 2) + via_clearance + int(track_width / 2)
+    if netcodes is not None:
+        for v, netcode in zip(vias, netcodes):
+            if v.m_Uuid.AsString() in modified_uuids:
+                v.SetNetCode(netcode)
+
+    stubs: List[pcbnew.PCB_TRACK] = []
+    if stub_length:
+        if stub_directions is None:
+            stub_directions = DEFAULT_STUB_DIRECTIONS[direction]
+        stubs = _create_stubs(
+            board, modified, stub_length, stub_directions, track_width
+        )
+
+    # all new items are created first and added in single pass
+    for item in new_vias + stubs:
+        if select:
+            item.SetSelected()
+        board.Add(item)
+    if index is not None:
+        for v in new_vias:
+            index.add(v)
+
+    if group:
+        spec.template = _via.m_Uuid.AsString()
+        spec.fingerprint = _fingerprint(spec, via_width, via_clearance, track_width)
+        spec.angle = _position_angle(*positions[-1])
+        pattern_group = pcbnew.PCB_GROUP(board)
+        pattern_group.SetName(spec.to_name())
+        board.Add(pattern_group)
+        for item in modified + stubs:
+            pattern_group.AddItem(item)
+
+    return vias
+
+
+@dataclass
+class PatternReport:
+    """Result of `ensure_via_pattern`"""
+
+    # all vias of the pattern, in pattern order
+    vias: List[pcbnew.PCB_VIA]
+    created: List[pcbnew.PCB_VIA]
+    # vias which already existed at pattern positions
+    skipped: List[pcbnew.PCB_VIA]
+
+
+def ensure_via_pattern(
+    board: pcbnew.BOARD,
+    count: int,
+    pattern: Union[Pattern, str],
+    *,
+    index: Optional[ViaIndex] = None,
+    **kwargs: Any,
+) -> PatternReport:
+    """Idempotent version of `add_via_pattern`, accepts the same arguments.
+
+    Re-applying the same pattern does not stack duplicated vias. The `index`
+    can be shared by many calls, so it is built only once per run.
+    """
+    index = index or ViaIndex(board)
+    start = len(index.added)
+    vias = add_via_pattern(board, count, pattern, index=index, **kwargs)
+    new = {v.m_Uuid.AsString() for v in index.added[start:]}
+    created = [v for v in vias if v.m_Uuid.AsString() in new]
+    skipped = [v for v in vias if v.m_Uuid.AsString() not in new]
+    logger.debug("Created %s vias, skipped %s", len(created), len(skipped))
+    return PatternReport(vias, created, skipped)
+
+
+@dataclass(frozen=True)
+class ViaDefinition:
+    """Properties of single via of `add_via_sequence`"""
+
+    width: int
+    drill: int
+    top_layer: int = pcbnew.F_Cu
+    bottom_layer: int = pcbnew.B_Cu
+
+    @classmethod
+    def from_via(cls, via: pcbnew.PCB_VIA) -> ViaDefinition:
+        return cls(
+            via.GetWidth(), via.GetDrillValue(), via.TopLayer(), via.BottomLayer()
+        )
+
+    def create(self, board: pcbnew.BOARD) -> pcbnew.PCB_VIA:
+        via = pcbnew.PCB_VIA(board)
+        if self.top_layer == pcbnew.F_Cu and self.bottom_layer == pcbnew.B_Cu:
+            via.SetViaType(pcbnew.VIATYPE_THROUGH)
         else:
-            logger.debug("Track width small enough to be ignored")
-            offset_x = via_clearance + max(via_width, track_width) + extra_space
-            offset_x = int(offset_x / SQRT2)
-        offset_y = offset_x
-    else:  # Pattern.STAGGER
-        offset_x = (
-            2 * via_clearance + max(via_width, track_width) + track_width + extra_space
-        )
-        r = via_width // 2
-        offset_y = int(
-            math.sqrt(
-                (3 * r * r)
-                + (2 * r * via_clearance)
-                - (r * track_width)
-                - (via_clearance * track_width)
-                - (track_width * track_width) / 4
-            )
+            via.SetViaType(pcbnew.VIATYPE_BLIND_BURIED)
+        via.SetWidth(self.width)
+        via.SetDrill(self.drill)
+        via.SetTopLayer(self.top_layer)
+        via.SetBottomLayer(self.bottom_layer)
+        return via
+
+
+def add_via_sequence(
+    board: pcbnew.BOARD,
+    definitions: Sequence[ViaDefinition],
+    *,
+    start_position: pcbnew.VECTOR2I = ZERO_POSITION,
+    direction: Direction = Direction.HORIZONTAL,
+    net: Union[str, int] = 0,
+    track_width: int = 0,
+    extra_space: int = 0,
+    select: bool = False,
+    clearance_resolver: Optional[ClearanceResolver] = None,
+) -> List[pcbnew.PCB_VIA]:
+    """Add in-line vias of different sizes, one via per definition.
+
+    Distance between neighbouring vias depends on sizes and clearances of
+    both of them. First via gets the `net`, remaining ones have no net
+    assigned, like in `add_via_pattern`.
+    """
+    if not definitions:
+        msg = "The `definitions` must not be empty"
+        raise ValueError(msg)
+
+    if direction not in [Direction.HORIZONTAL, Direction.VERTICAL]:
+        msg = "Unsupported direction"
+        raise ValueError(msg)
+
+    if track_width < 0:
+        msg = "The `track_width` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    if extra_space < 0:
+        msg = "The `extra_space` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    resolver = clearance_resolver or ClearanceResolver(board)
+
+    # one template per distinct definition, vias are duplicated from these
+    templates: Dict[ViaDefinition, pcbnew.PCB_VIA] = {}
+    clearances: Dict[ViaDefinition, int] = {}
+    for definition in definitions:
+        if definition not in templates:
+            template = definition.create(board)
+            template.SetPosition(start_position)
+            templates[definition] = template
+
+    first = templates[definitions[0]]
+    if net:
+        if isinstance(net, str):
+            first.SetNet(board.GetNetsByName()[net])
+        elif isinstance(net, int):
+            first.SetNetCode(net)
+        else:
+            msg = "The `net` argument must be str or int"
+            raise TypeError(msg)
+
+    for definition, template in templates.items():
+        _, clearance, width = _resolve_design_rules(
+            board, template, track_width, resolver
         )
+        clearances[definition] = clearance
+        track_width = track_width or width
+
+    positions = get_sequence_positions(
+        [d.width for d in definitions],
+        [clearances[d] for d in definitions],
+        track_width,
+        extra_space,
+        direction,
+    )
+
+    vias: List[pcbnew.PCB_VIA] = []
+    for i, (definition, (x, y)) in enumerate(zip(definitions, positions)):
+        v = templates[definition].Duplicate()
+        assert v, "Failed to duplicate via item"
+        if i != 0:
+            v.SetNetCode(0)
+            v.SetIsFree(True)
+        v.Move(pcbnew.VECTOR2I(x, y))
+        vias.append(v)
 
-    # used for STAGGER pattern:
-    zigzag = [(0.5, 1), (0.5, -1)]
+    for v in vias:
+        if select:
+            v.SetSelected()
+        board.Add(v)
 
-    if direction == Direction.VERTICAL:
-        offset_x, offset_y = offset_y, offset_x
-        zigzag = [(1, 0.5), (-1, 0.5)]
+    return vias
 
-    logger.debug(f"offsets: x: {offset_x} y: {offset_y}")
 
-    for i in range(0, count - 1):
-        v = _via.Duplicate()
+def add_via_ring(
+    board: pcbnew.BOARD,
+    pattern: Union[Pattern, str] = Pattern.RING,
+    *,
+    rings: int = 1,
+    radius: int = 0,
+    center: pcbnew.VECTOR2I = ZERO_POSITION,
+    pad: Optional[pcbnew.PAD] = None,
+    via: Optional[pcbnew.PCB_VIA] = None,
+    net: Union[str, int] = 0,
+    extra_space: int = 0,
+    select: bool = False,
+    clearance_resolver: Optional[ClearanceResolver] = None,
+) -> List[pcbnew.PCB_VIA]:
+    """Add vias evenly distributed on a ring (or `rings` rings for RADIAL).
+
+    Rings are centered at `pad` position when given, otherwise at `center`.
+    When `radius` is 0, the first ring is placed as close to the `pad` as
+    clearance allows. Number of vias of each ring is derived from its
+    circumference and via pitch. All vias get the `net` (or net of the `via`
+    template when not specified), the `via` itself is not modified.
+    """
+    if pattern not in [Pattern.RING, Pattern.RADIAL]:
+        msg = "Unsupported pattern"
+        raise ValueError(msg)
+
+    if rings < 1 or (pattern == Pattern.RING and rings != 1):
+        msg = "The `rings` must be 1 for RING and greater than 0 for RADIAL pattern"
+        raise ValueError(msg)
+
+    if radius < 0:
+        msg = "The `radius` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    if extra_space < 0:
+        msg = "The `extra_space` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    if radius == 0 and pad is None:
+        msg = "The `radius` must be specified when `pad` is not used"
+        raise ValueError(msg)
+
+    template = via.Duplicate() if via else _default_via(board)
+    assert template, "Failed to duplicate via item"
+    if pad is not None:
+        center = pad.GetPosition()
+    template.SetPosition(center)
+    if net:
+        if isinstance(net, str):
+            template.SetNet(board.GetNetsByName()[net])
+        elif isinstance(net, int):
+            template.SetNetCode(net)
+        else:
+            msg = "The `net` argument must be str or int"
+            raise TypeError(msg)
+
+    resolver = clearance_resolver or ClearanceResolver(board)
+    via_width, via_clearance, _ = _resolve_design_rules(board, template, 0, resolver)
+    pitch = via_width + via_clearance + extra_space
+
+    if radius == 0:
+        assert pad is not None
+        pad_clearance = resolver.pair_clearance(pad, template, pcbnew.F_Cu)
+        radius = pad.GetBoundingRadius() + pad_clearance + via_width // 2 + extra_space
+
+    positions = get_ring_positions(radius, pitch, rings)
+    logger.debug("%s ring vias, radius: %s, pitch: %s", len(positions), radius, pitch)
+
+    vias: List[pcbnew.PCB_VIA] = []
+    for x, y in positions:
+        v = template.Duplicate()
         assert v, "Failed to duplicate via item"
-        v.SetNetCode(0)
         v.SetIsFree(True)
-        if pattern == Pattern.PERPENDICULAR:
-            move += pcbnew.VECTOR2I(offset_x, offset_y)
-        elif pattern == Pattern.DIAGONAL:
-            move += pcbnew.VECTOR2I(offset_x, offset_y)
-        else:  # Pattern.STAGGER
-            coeffs = zigzag[i % 2]
-            x = int(offset_x * coeffs[0])
-            y = int(offset_y * coeffs[1])
-            move += pcbnew.VECTOR2I(x, y)
-        v.Move(move)
+        v.Move(pcbnew.VECTOR2I(x, y))
+        vias.append(v)
+
+    for v in vias:
         if select:
             v.SetSelected()
         board.Add(v)
-        vias.append(v)
 
     return vias
 
 
+def get_pattern_groups(
+    board: pcbnew.BOARD,
+) -> List[Tuple[pcbnew.PCB_GROUP, PatternSpec]]:
+    """Find groups created by `add_via_pattern` with their pattern specs"""
+    groups = []
+    for group in board.Groups():
+        spec = PatternSpec.from_name(group.GetName())
+        if spec:
+            groups.append((group, spec))
+    return groups
+
+
+def get_pattern_vias(group: pcbnew.PCB_GROUP) -> List[pcbnew.PCB_VIA]:
+    return [
+        pcbnew.Cast_to_PCB_VIA(item)
+        for item in group.GetItems()
+        if item.Type() == pcbnew.PCB_VIA_T
+    ]
+
+
+def get_via_table(
+    board: pcbnew.BOARD, vias: Optional[Sequence[pcbnew.PCB_VIA]] = None
+) -> ViaTable:
+    """Collect data of `vias` (all board vias by default) for export"""
+    if vias is None:
+        tracks = board.GetTracks()
+        vias = [
+            pcbnew.Cast_to_PCB_VIA(t) for t in tracks if t.Type() == pcbnew.PCB_VIA_T
+        ]
+
+    table = ViaTable(len(vias))
+    table.net_names = {
+        code: net.GetNetname() for code, net in board.GetNetsByNetcode().items()
+    }
+    pattern_members: Dict[str, int] = {}
+    for group, _ in get_pattern_groups(board):
+        for item in group.GetItems():
+            pattern_members[item.m_Uuid.AsString()] = len(table.pattern_names)
+        table.pattern_names.append(group.GetName())
+
+    for v in vias:
+        position = v.GetPosition()
+        table.append(
+            position.x,
+            position.y,
+            v.GetWidth(),
+            v.GetDrillValue(),
+            v.TopLayer(),
+            v.BottomLayer(),
+            v.GetNetCode(),
+            pattern_members.get(v.m_Uuid.AsString(), -1),
+        )
+    return table
+
+
+def _position_angle(x: int, y: int) -> float:
+    return math.degrees(math.atan2(y, x))
+
+
+def _pattern_angle(origin: pcbnew.VECTOR2I, vias: List[pcbnew.PCB_VIA]) -> float:
+    # the farthest via is always the last one of the pattern
+    last = max(vias, key=lambda v: (v.GetPosition() - origin).EuclideanNorm())
+    move = last.GetPosition() - origin
+    return _position_angle(move.x, move.y)
+
+
+def regenerate_patterns(board: pcbnew.BOARD) -> List[pcbnew.PCB_GROUP]:
+    """Rebuild pattern groups which design rules changed since creation.
+
+    Template via of each pattern is kept, remaining items are replaced with
+    new ones placed with current rules. Pattern orientation and nets
+    of vias are preserved.
+    Returns list of new groups.
+    """
+    outdated = []
+    resolver = ClearanceResolver(board)
+    for group, spec in get_pattern_groups(board):
+        vias = get_pattern_vias(group)
+        template = next((v for v in vias if v.m_Uuid.AsString() == spec.template), None)
+        if template is None:
+            logger.warning("Template via of '%s' not found, skipping", group.GetName())
+            continue
+        via_width, via_clearance, track_width = _resolve_design_rules(
+            board, template, spec.track_width, resolver
+        )
+        # fingerprint of `add_via_pattern` uses clearance enlarged by rule areas
+        via_clearance, _ = _pattern_positions(
+            spec, template, via_width, via_clearance, track_width, resolver
+        )
+        fingerprint = _fingerprint(spec, via_width, via_clearance, track_width)
+        if fingerprint != spec.fingerprint:
+            outdated.append((group, spec, template, vias))
+
+    logger.debug("Patterns to regenerate: %s", len(outdated))
+
+    new_groups = []
+    for group, spec, template, vias in outdated:
+        origin = template.GetPosition()
+        angle = _pattern_angle(origin, vias)
+        vias.sort(key=lambda v: (v.GetPosition() - origin).EuclideanNorm())
+        netcodes = [v.GetNetCode() for v in vias]
+
+        items = list(group.GetItems())
+        group.RemoveAll()
+        for item in items:
+            if item.m_Uuid.AsString() != spec.template:
+                board.Remove(item)
+        board.Remove(group)
+
+        new_vias = add_via_pattern(
+            board,
+            spec.count,
+            spec.pattern,
+            via=template,
+            direction=spec.direction,
+            track_width=spec.track_width,
+            extra_space=spec.extra_space,
+            stub_length=spec.stub_length,
+            stub_directions=spec.stub_directions,
+            group=True,
+            clearance_resolver=resolver,
+        )
+        new_group = template.GetParentGroup()
+
+        for v, netcode in zip(new_vias, netcodes):
+            v.SetNetCode(netcode)
+        via_nets = {(v.GetX(), v.GetY()): v.GetNetCode() for v in new_vias}
+        for item in new_group.GetItems():
+            if item.Type() == pcbnew.PCB_TRACE_T:
+                start = item.GetStart()
+                item.SetNetCode(via_nets.get((start.x, start.y), 0))
+
+        # rotation applied to the pattern since its creation, patterns
+        # created before the angle was stored are assumed to keep their shape
+        if spec.angle is not None:
+            rotation = angle - spec.angle
+        else:
+            rotation = angle - _pattern_angle(origin, new_vias)
+        rotation = (rotation + 180) % 360 - 180
+        if abs(rotation) > 1e-3:
+            new_group.Rotate(origin, pcbnew.EDA_ANGLE(-rotation, pcbnew.DEGREES_T))
+        new_groups.append(new_group)
+
+    return new_groups
+
+
+def replicate_via_pattern(
+    board: pcbnew.BOARD,
+    pattern: Union[pcbnew.PCB_GROUP, Sequence[pcbnew.PCB_VIA]],
+    transforms: Sequence[Transform],
+    *,
+    nets: Optional[Sequence[NetsArgument]] = None,
+    select: bool = False,
+) -> List[List[pcbnew.PCB_VIA]]:
+    """Add copy of pattern for each transform, returns vias of each copy.
+
+    The `pattern` is list of vias or pattern group (then stub tracks are
+    copied too and each copy gets its own group). Transform is translation
+    `(dx, dy)` or translation and rotation `(dx, dy, degrees)`, rotation is
+    around the first via (template via of pattern group). Copies keep nets
+    of the pattern unless `nets` of each copy are specified.
+    """
+    group: Optional[pcbnew.PCB_GROUP] = None
+    spec: Optional[PatternSpec] = None
+    tracks: List[pcbnew.PCB_TRACK] = []
+    if isinstance(pattern, pcbnew.PCB_GROUP):
+        group = pattern
+        spec = PatternSpec.from_name(group.GetName())
+        vias = get_pattern_vias(group)
+        tracks = [
+            pcbnew.Cast_to_PCB_TRACK(item)
+            for item in group.GetItems()
+            if item.Type() == pcbnew.PCB_TRACE_T
+        ]
+    else:
+        vias = list(pattern)
+
+    if not vias:
+        msg = "The `pattern` must contain at least one via"
+        raise ValueError(msg)
+
+    if nets is not None and len(nets) != len(transforms):
+        msg = "The `nets` must define nets of each of the pattern copies"
+        raise ValueError(msg)
+
+    if spec and spec.template:
+        # template first, so it is rotation origin and its copy is easy to find
+        template = spec.template
+        vias.sort(key=lambda v: v.m_Uuid.AsString() != template)
+
+    points = [(v.GetX(), v.GetY()) for v in vias]
+    for t in tracks:
+        points.extend([(t.GetStart().x, t.GetStart().y), (t.GetEnd().x, t.GetEnd().y)])
+    instances = transform_positions(points, transforms, points[0])
+
+    copies: List[List[pcbnew.PCB_VIA]] = []
+    items: List[pcbnew.BOARD_CONNECTED_ITEM] = []
+    copy_items: List[List[pcbnew.BOARD_CONNECTED_ITEM]] = []
+    for i, positions in enumerate(instances):
+        new_vias = []
+        for v, position in zip(vias, positions):
+            new_via = v.Duplicate()
+            assert new_via, "Failed to duplicate via item"
+            new_via.SetPosition(pcbnew.VECTOR2I(*position))
+            new_vias.append(new_via)
+        if nets is not None:
+            netcodes = _resolve_nets(board, nets[i], len(new_vias))
+            for v, netcode in zip(new_vias, netcodes):
+                v.SetNetCode(netcode)
+
+        via_nets = {(v.GetX(), v.GetY()): v.GetNetCode() for v in new_vias}
+        new_tracks = []
+        ends = positions[len(vias) :]
+        for t, start, end in zip(tracks, ends[::2], ends[1::2]):
+            new_track = t.Duplicate()
+            assert new_track, "Failed to duplicate track item"
+            new_track.SetStart(pcbnew.VECTOR2I(*start))
+            new_track.SetEnd(pcbnew.VECTOR2I(*end))
+            if nets is not None:
+                new_track.SetNetCode(via_nets.get(start, 0))
+            new_tracks.append(new_track)
+
+        copies.append(new_vias)
+        copy_items.append(new_vias + new_tracks)
+        items.extend(new_vias + new_tracks)
+
+    # all copies are created first and added in single pass
+    for item in items:
+        if select:
+            item.SetSelected()
+        board.Add(item)
+
+    if group is not None:
+        for new_vias, new_items in zip(copies, copy_items):
+            name = group.GetName()
+            if spec and spec.template:
+                name = replace(spec, template=new_vias[0].m_Uuid.AsString()).to_name()
+            new_group = pcbnew.PCB_GROUP(board)
+            new_group.SetName(name)
+            board.Add(new_group)
+            for item in new_items:
+                new_group.AddItem(item)
+
+    logger.debug("Replicated pattern of %s vias %s times", len(vias), len(copies))
+    return copies
+
+
+def _create_stubs(
+    board: pcbnew.BOARD,
+    vias: List[pcbnew.PCB_VIA],
+    length: int,
+    directions: Dict[int, Tuple[int, int]],
+    width: int,
+) -> List[pcbnew.PCB_TRACK]:
+    stubs = []
+    for layer, (dx, dy) in directions.items():
+        move = pcbnew.VECTOR2I(dx * length, dy * length)
+        for v in vias:
+            start = v.GetPosition()
+            t = pcbnew.PCB_TRACK(board)
+            t.SetWidth(width)
+            t.SetLayer(layer)
+            t.SetStart(start)
+            t.SetEnd(start + move)
+            t.SetNetCode(v.GetNetCode())
+            stubs.append(t)
+    return stubs
+
+
 def rotate_via_pattern(
     vias: List[pcbnew.PCB_VIA],
     direction: RotateDirection,
@@ -232,3 +1128,480 @@ def rotate_via_pattern(
         via.Rotate(
             reference_position, pcbnew.EDA_ANGLE(direction * -90, pcbnew.DEGREES_T)
         )
+
+
+def compact_vias(
+    board: pcbnew.BOARD,
+    vias: Sequence[pcbnew.PCB_VIA],
+    pattern: Union[Pattern, str] = Pattern.PERPENDICULAR,
+    *,
+    track_width: int = 0,
+    extra_space: int = 0,
+    clearance_resolver: Optional[ClearanceResolver] = None,
+) -> List[pcbnew.PCB_VIA]:
+    """Re-pack existing vias to the pattern pitch used by `add_via_pattern`.
+
+    Vias are ordered along their dominant axis, the first one stays in place
+    and remaining ones are moved to pattern positions, on the same side of
+    the pattern line as they were. Endpoints of tracks attached to moved vias
+    are moved too. Returns vias in pattern order.
+    """
+    if pattern not in [
+        Pattern.DIAGONAL,
+        Pattern.PERPENDICULAR,
+        Pattern.STAGGER,
+        Pattern.AUTO,
+    ]:
+        msg = "Unsupported pattern"
+        raise ValueError(msg)
+
+    if len(vias) < 2:
+        msg = "The `vias` must contain at least 2 vias"
+        raise ValueError(msg)
+
+    if track_width < 0:
+        msg = "The `track_width` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    if extra_space < 0:
+        msg = "The `extra_space` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    xs = [v.GetX() for v in vias]
+    ys = [v.GetY() for v in vias]
+    horizontal = max(xs) - min(xs) >= max(ys) - min(ys)
+    direction = Direction.HORIZONTAL if horizontal else Direction.VERTICAL
+    ordered = sorted(vias, key=lambda v: v.GetX() if horizontal else v.GetY())
+
+    anchor = ordered[0]
+    resolver = clearance_resolver or ClearanceResolver(board)
+    via_width, via_clearance, track_width = _resolve_design_rules(
+        board, anchor, track_width, resolver
+    )
+    spec = PatternSpec(
+        pattern=Pattern(pattern),
+        count=len(ordered),
+        direction=direction,
+        track_width=track_width,
+        extra_space=extra_space,
+    )
+    _, positions = _pattern_positions(
+        spec, anchor, via_width, via_clearance, track_width, resolver
+    )
+
+    origin = anchor.GetPosition()
+    second = ordered[1].GetPosition() - origin
+    sign = -1 if (second.y if horizontal else second.x) < 0 else 1
+    if horizontal:
+        targets = [origin + pcbnew.VECTOR2I(x, sign * y) for x, y in positions]
+    else:
+        targets = [origin + pcbnew.VECTOR2I(sign * x, y) for x, y in positions]
+
+    # all changes are computed first and applied in single pass
+    moved = {(v.GetX(), v.GetY()): (v, t) for v, t in zip(ordered[1:], targets[1:])}
+    endpoints = []
+    for track in board.GetTracks():
+        if track.Type() != pcbnew.PCB_TRACE_T:
+            continue
+        for is_start, point in ((True, track.GetStart()), (False, track.GetEnd())):
+            match = moved.get((point.x, point.y))
+            if match is None:
+                continue
+            via, target = match
+            same_net = via.GetNetCode() == track.GetNetCode()
+            if same_net and via.IsOnLayer(track.GetLayer()):
+                endpoints.append((track, is_start, target))
+
+    for track, is_start, target in endpoints:
+        if is_start:
+            track.SetStart(target)
+        else:
+            track.SetEnd(target)
+    for via, target in moved.values():
+        via.SetPosition(target)
+
+    logger.debug(
+        "Compacted %s vias, moved %s track endpoints", len(ordered), len(endpoints)
+    )
+    return ordered
+
+
+def _copper_index(
+    board: pcbnew.BOARD, resolver: ClearanceResolver, cell: int
+) -> CopperIndex:
+    """Index of vias, tracks and pads of all copper layers"""
+    index = CopperIndex(cell)
+    for item in board.GetTracks():
+        kind = item.Type()
+        if kind == pcbnew.PCB_VIA_T:
+            via = pcbnew.Cast_to_PCB_VIA(item)
+            index.add_circle(
+                (via.GetX(), via.GetY()),
+                via.GetWidth() // 2,
+                via.GetNetCode(),
+                resolver.via_clearance(via),
+            )
+            continue
+        track = item.Cast()
+        points = [track.GetStart(), track.GetEnd()]
+        if kind == pcbnew.PCB_ARC_T:
+            # arcs approximated by two chords
+            points.insert(1, track.GetMid())
+        clearance = resolver.clearance(track, track.GetLayer())
+        for start, end in zip(points, points[1:]):
+            index.add(
+                (start.x, start.y),
+                (end.x, end.y),
+                track.GetWidth() // 2,
+                track.GetNetCode(),
+                clearance,
+            )
+    for footprint in board.GetFootprints():
+        for pad in footprint.Pads():
+            position = pad.GetPosition()
+            index.add_circle(
+                (position.x, position.y),
+                pad.GetBoundingRadius(),
+                pad.GetNetCode(),
+                resolver.clearance(pad, pad.GetPrincipalLayer()),
+            )
+    return index
+
+
+def add_return_vias(
+    board: pcbnew.BOARD,
+    vias: Sequence[pcbnew.PCB_VIA] = (),
+    *,
+    nets: Union[Sequence[Union[str, int]], str] = (),
+    ground_net: Union[str, int],
+    via: Optional[pcbnew.PCB_VIA] = None,
+    directions: int = 8,
+    extra_space: int = 0,
+    select: bool = False,
+    clearance_resolver: Optional[ClearanceResolver] = None,
+) -> List[pcbnew.PCB_VIA]:
+    """Add return via of `ground_net` next to each signal via.
+
+    Signal vias are `vias` and all vias of `nets` (names, codes or range
+    expression like `D[0..31]`). Return via has size and layers of `via`
+    (by default of its signal via) and is placed at clearance derived pitch,
+    in the one of `directions` evenly spread directions with the most free
+    space.
+    Free space is checked against copper index built once per call, signal
+    vias without any free position are skipped. Returns added vias.
+    """
+    if directions < 1:
+        msg = "The `directions` argument must be greater than 0"
+        raise ValueError(msg)
+
+    if extra_space < 0:
+        msg = "The `extra_space` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    names = _net_codes(board)
+    if isinstance(ground_net, str):
+        ground = _net_code(names, ground_net)
+    elif isinstance(ground_net, int):
+        ground = ground_net
+    else:
+        msg = "The `ground_net` argument must be str or int"
+        raise TypeError(msg)
+
+    values = expand_net_range(nets) if isinstance(nets, str) else nets
+    netcodes = {v if isinstance(v, int) else _net_code(names, v) for v in values}
+    signals = {v.m_Uuid.AsString(): v for v in vias}
+    if netcodes:
+        for item in board.GetTracks():
+            if item.Type() == pcbnew.PCB_VIA_T and item.GetNetCode() in netcodes:
+                signals.setdefault(item.m_Uuid.AsString(), pcbnew.Cast_to_PCB_VIA(item))
+    signals = {k: v for k, v in signals.items() if v.GetNetCode() != ground}
+    if not signals:
+        return []
+
+    resolver = clearance_resolver or ClearanceResolver(board)
+    candidates: List[Tuple[pcbnew.PCB_VIA, pcbnew.PCB_VIA, int, int]] = []
+    for signal in signals.values():
+        # new via instead of `Duplicate` which would add it to the group of
+        # grouped signal via (like pattern group)
+        companion = ViaDefinition.from_via(via or signal).create(board)
+        companion.SetNetCode(ground)
+        clearance = resolver.via_clearance(companion, signal.GetPosition())
+        pitch = (
+            (signal.GetWidth() + companion.GetWidth() + 1) // 2
+            + max(clearance, resolver.via_clearance(signal))
+            + extra_space
+        )
+        candidates.append((signal, companion, clearance, pitch))
+
+    pitches = [pitch for *_, pitch in candidates]
+    index = _copper_index(board, resolver, 2 * max(pitches))
+    offsets = {pitch: get_companion_offsets(pitch, directions) for pitch in pitches}
+
+    added: List[pcbnew.PCB_VIA] = []
+    for signal, companion, clearance, pitch in candidates:
+        x, y = signal.GetX(), signal.GetY()
+        radius = companion.GetWidth() // 2
+        best, best_slack = None, -1
+        for dx, dy in offsets[pitch]:
+            position = (x + dx, y + dy)
+            slack = index.slack(position, radius, ground, clearance, pitch)
+            if slack > best_slack:
+                best, best_slack = position, slack
+        if best is None:
+            logger.debug("No free space for return via of %s", signal.GetNetname())
+            continue
+        companion.SetPosition(pcbnew.VECTOR2I(*best))
+        # following return vias must keep clearance to this one too
+        index.add_circle(best, radius, ground, clearance)
+        added.append(companion)
+
+    if len(added) < len(candidates):
+        logger.warning(
+            "Skipped %s of %s signal vias without free space for return via",
+            len(candidates) - len(added),
+            len(candidates),
+        )
+
+    # all new vias are created first and added in single pass
+    for v in added:
+        if select:
+            v.SetSelected()
+        board.Add(v)
+
+    return added
+
+
+def thin_vias(
+    board: pcbnew.BOARD,
+    vias: Optional[Sequence[pcbnew.PCB_VIA]] = None,
+    *,
+    area: Optional[pcbnew.ZONE] = None,
+    max_pitch: int = 0,
+    density: float = 0.0,
+) -> List[pcbnew.PCB_VIA]:
+    """Remove redundant vias so that remaining ones keep `max_pitch` coverage.
+
+    Thinned are `vias` or all vias inside `area` outline. Instead of
+    `max_pitch`, target `density` (vias per mm^2) can be given, it is
+    converted to pitch of square grid. Vias are thinned separately for each
+    net with Poisson-disk selection, every removed via is closer than
+    `max_pitch` to kept via of its net. Vias with attached tracks are always
+    kept. Returns kept vias.
+    """
+    if (max_pitch > 0) == (density > 0):
+        msg = "Exactly one of `max_pitch` and `density` must be greater than 0"
+        raise ValueError(msg)
+    if density > 0:
+        max_pitch = round(pcbnew.FromMM(1) / math.sqrt(density))
+
+    if vias is None:
+        if area is None:
+            msg = "The `vias` or `area` argument must be specified"
+            raise ValueError(msg)
+        outline = area.Outline()
+        vias = [
+            pcbnew.Cast_to_PCB_VIA(item)
+            for item in board.GetTracks()
+            if item.Type() == pcbnew.PCB_VIA_T and outline.Contains(item.GetPosition())
+        ]
+
+    endpoints = set()
+    for track in board.GetTracks():
+        if track.Type() != pcbnew.PCB_VIA_T:
+            for point in (track.GetStart(), track.GetEnd()):
+                endpoints.add((point.x, point.y, track.GetNetCode()))
+
+    by_net: Dict[int, List[pcbnew.PCB_VIA]] = {}
+    for v in vias:
+        by_net.setdefault(v.GetNetCode(), []).append(v)
+
+    kept: List[pcbnew.PCB_VIA] = []
+    removed: List[pcbnew.PCB_VIA] = []
+    for netcode, net_vias in by_net.items():
+        fixed, candidates = [], []
+        for v in net_vias:
+            if (v.GetX(), v.GetY(), netcode) in endpoints:
+                fixed.append(v)
+            else:
+                candidates.append(v)
+        # row by row order gives regular result on regular via grids
+        candidates.sort(key=lambda v: (v.GetY(), v.GetX()))
+        selected = set(
+            poisson_disk_select(
+                [(v.GetX(), v.GetY()) for v in candidates],
+                max_pitch,
+                [(v.GetX(), v.GetY()) for v in fixed],
+            )
+        )
+        kept.extend(fixed)
+        for i, v in enumerate(candidates):
+            if i in selected:
+                kept.append(v)
+            else:
+                removed.append(v)
+
+    # all removals are applied in single pass
+    for v in removed:
+        board.Remove(v)
+
+    logger.debug("Thinned %s vias, removed %s", len(vias), len(removed))
+    return kept
+
+
+def _min_pitch(values: List[int]) -> int:
+    unique = sorted(set(values))
+    steps = [b - a for a, b in zip(unique, unique[1:]) if b - a > 0]
+    return min(steps) if steps else 0
+
+
+def _pad_index(
+    footprint: pcbnew.FOOTPRINT, resolver: ClearanceResolver, cell: int
+) -> CopperIndex:
+    """Index of `footprint` pads approximated by circles.
+
+    Exact for round BGA pads and conservative for other pad shapes.
+    """
+    index = CopperIndex(cell)
+    for pad in footprint.Pads():
+        position = pad.GetPosition()
+        index.add_circle(
+            (position.x, position.y),
+            pad.GetBoundingRadius(),
+            pad.GetNetCode(),
+            resolver.clearance(pad, pad.GetPrincipalLayer()),
+        )
+    return index
+
+
+def _violates_clearance(
+    index: CopperIndex, resolver: ClearanceResolver, via: pcbnew.PCB_VIA
+) -> bool:
+    position = via.GetPosition()
+    slack = index.slack(
+        (position.x, position.y),
+        via.GetWidth() // 2,
+        via.GetNetCode(),
+        resolver.via_clearance(via),
+        0,
+    )
+    return slack < 0
+
+
+def add_fanout_vias(
+    board: pcbnew.BOARD,
+    footprint: pcbnew.FOOTPRINT,
+    *,
+    via: Optional[pcbnew.PCB_VIA] = None,
+    offset: int = 0,
+    track_width: int = 0,
+    tracks: bool = True,
+    select: bool = False,
+) -> List[pcbnew.PCB_VIA]:
+    """Add dog-bone fanout via for each connected SMD pad of `footprint`.
+
+    Vias are moved diagonally away from the footprint center by `offset` in
+    both axes (by default half of the pad pitch, which puts via in the middle
+    of four neighbouring pads) and get net of its pad. The `via` is used only
+    as a template, it is not modified, by default via diameter and drill of
+    pad's netclass are used. Raises `ValueError` when any via would violate
+    clearance to other pads of the `footprint`, nothing is added then.
+    """
+    if offset < 0:
+        msg = "The `offset` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    if track_width < 0:
+        msg = "The `track_width` argument must be greater or equal 0"
+        raise ValueError(msg)
+
+    pads = [
+        p
+        for p in footprint.Pads()
+        if p.GetAttribute() == pcbnew.PAD_ATTRIB_SMD and p.GetNetCode() != 0
+    ]
+    if not pads:
+        msg = "The `footprint` has no connected SMD pads"
+        raise ValueError(msg)
+
+    positions = [p.GetPosition() for p in pads]
+    xs = [p.x for p in positions]
+    ys = [p.y for p in positions]
+
+    if offset == 0:
+        pitch = min(filter(None, [_min_pitch(xs), _min_pitch(ys)]), default=0)
+        if pitch == 0:
+            msg = "Unable to determine pad pitch, the `offset` must be specified"
+            raise ValueError(msg)
+        offset = pitch // 2
+
+    center_x = (min(xs) + max(xs)) // 2
+    center_y = (min(ys) + max(ys)) // 2
+    # each pad escapes towards the corner of its own quadrant,
+    # pads on center lines are treated as part of right/bottom quadrant
+    moves = [
+        pcbnew.VECTOR2I(
+            offset if x >= center_x else -offset,
+            offset if y >= center_y else -offset,
+        )
+        for x, y in zip(xs, ys)
+    ]
+    logger.debug("fanout of %s pads, offset: %s", len(pads), offset)
+
+    resolver = ClearanceResolver(board)
+    index = _pad_index(footprint, resolver, max(2 * offset, 1))
+
+    layer = footprint.GetLayer()
+    templates: Dict[str, pcbnew.PCB_VIA] = {}
+    track_widths: Dict[str, int] = {}
+
+    items: List[pcbnew.BOARD_CONNECTED_ITEM] = []
+    vias: List[pcbnew.PCB_VIA] = []
+    violations = 0
+    for pad, position, move in zip(pads, positions, moves):
+        template = via
+        if template is None:
+            netclass_name = pad.GetNetClassName()
+            if netclass_name not in templates:
+                netclass = get_netclass(board, pad)
+                templates[netclass_name] = _netclass_via(board, netclass)
+            template = templates[netclass_name]
+        v = template.Duplicate()
+        assert v, "Failed to duplicate via item"
+        v.SetPosition(position + move)
+        v.SetNetCode(pad.GetNetCode())
+        vias.append(v)
+        items.append(v)
+
+        if _violates_clearance(index, resolver, v):
+            logger.debug("Fanout via of %s violates clearance", pad.GetNetname())
+            violations += 1
+
+        if tracks:
+            width = track_width
+            if width == 0:
+                netclass_name = pad.GetNetClassName()
+                if netclass_name not in track_widths:
+                    netclass = get_netclass(board, pad)
+                    track_widths[netclass_name] = netclass.GetTrackWidth()
+                width = track_widths[netclass_name]
+            t = pcbnew.PCB_TRACK(board)
+            t.SetWidth(width)
+            t.SetLayer(layer)
+            t.SetStart(position)
+            t.SetEnd(position + move)
+            t.SetNetCode(pad.GetNetCode())
+            items.append(t)
+
+    if violations:
+        msg = (
+            f"Fanout vias of {violations} pads would violate clearance to "
+            "neighbouring pads, use smaller `via` or larger `offset`"
+        )
+        raise ValueError(msg)
+
+    for item in items:
+        if select:
+            item.SetSelected()
+        board.Add(item)
+
+    return vias